@@ -1,7 +1,12 @@
-from config import OPENAI_API_KEY
-import openai
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-openai.api_key = OPENAI_API_KEY
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL
+from pattern_detector import pattern_direction, trade_levels
 
 use_openai = OPENAI_API_KEY and not OPENAI_API_KEY.startswith("sk-...")
 
@@ -10,37 +15,201 @@ tone_templates = {
     "Chad 💪": "{pattern} pattern detected. You either ride or hide. Entry ${entry}, SL ${sl}, TP ${tp}. Don't be weak. 💪",
     "Pro 📊": "Pattern: {pattern}. Suggested entry at ${entry}, \n SL at ${sl},\n TP at ${tp}\n  Confidence is {confidence}%. Trade wisely."
 }
+DEFAULT_TONE = "Pro 📊"
 
-def generate_trade_advice(pattern_info, sl_percent, tp_percent, tone):
+MAX_TOKENS = 300
+# Seconds an LLM request may take before it is abandoned
+ADVICE_TIMEOUT = 8.0
+ADVICE_WORKERS = 2
+# Advice texts kept, keyed by (pattern, entry, sl, tp, confidence, tone)
+ADVICE_CACHE_SIZE = 256
+# Budget shared by every session in the process
+REQUESTS_PER_MINUTE = 20
+TOKENS_PER_MINUTE = 20_000
+# Seconds before a failed signal is sent to the LLM again
+ERROR_BACKOFF = 60.0
+
+log = logging.getLogger("ai_advisor")
+
+
+def _levels(pattern_info, sl_percent, tp_percent):
+    # (entry, sl, tp, short), with SL/TP on the side the pattern trades
     entry = pattern_info['entry']
-    sl = round(entry * (1 - sl_percent / 100), 2)
-    tp = round(entry * (1 + tp_percent / 100), 2)
-    confidence = pattern_info['confidence']
-    pattern = pattern_info['name']
+    short = pattern_direction(pattern_info) == "bearish"
+    sl, tp = trade_levels(entry, sl_percent, tp_percent, short=short)
+    return entry, sl, tp, short
+
+
+def _price(value):
+    # Enough significant digits for sub-cent symbols, no float noise on large ones
+    return f"{float(value):.8g}"
+
+
+def template_advice(pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE):
+    entry, sl, tp, _ = _levels(pattern_info, sl_percent, tp_percent)
+    return tone_templates[tone].format(pattern=pattern_info['name'], entry=_price(entry), sl=_price(sl),
+                                       tp=_price(tp), confidence=pattern_info['confidence'])
 
-    if not use_openai:
-        return tone_templates[tone].format(pattern=pattern, entry=entry, sl=sl, tp=tp, confidence=confidence)
 
-    prompt = f"""
+def advice_prompt(pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE):
+    entry, sl, tp, short = _levels(pattern_info, sl_percent, tp_percent)
+    return f"""
 You're BTC Buddy, a trading pal.
 
-Pattern Detected: {pattern}
-Entry Price: ${entry}
-Stop Loss: ${sl}
-Take Profit: ${tp}
-Confidence: {confidence}%
+Pattern Detected: {pattern_info['name']}
+Side: {"Short" if short else "Long"}
+Entry Price: ${_price(entry)}
+Stop Loss: ${_price(sl)}
+Take Profit: ${_price(tp)}
+Confidence: {pattern_info['confidence']}%
 
 {tone_templates[tone]}
 
 Now give trading advice in this tone.
 """
-    try:
-        res = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300,
-            temperature=0.8
-        )
-        return res.choices[0].message.content.strip()
-    except Exception as e:
-        return f"⚠️ OpenAI Error: {e}"
+
+
+def advice_key(pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE):
+    entry, sl, tp, _ = _levels(pattern_info, sl_percent, tp_percent)
+    return (pattern_info['name'], float(entry), sl, tp, float(pattern_info['confidence']), tone)
+
+
+class TokenBucket:
+    # Non-blocking: take() either spends the amount now or refuses
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if amount > self._tokens:
+                return False
+            self._tokens -= amount
+            return True
+
+
+# LLM advice off the render thread. Every signal is sent at most once: finished texts
+# are cached, concurrent requests for the same signal share one in-flight call, and
+# calls are only made while the request and token budgets allow. Whenever the LLM is
+# off, over budget, failing or not done yet, advice() answers with the tone template,
+# so callers never wait longer than they ask to.
+class AdviceService:
+    def __init__(self, client=None, model=OPENAI_MODEL, workers=ADVICE_WORKERS,
+                 cache_size=ADVICE_CACHE_SIZE, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, timeout=ADVICE_TIMEOUT):
+        if client is None and use_openai:
+            import openai  # heavy; only loaded when advice will actually call the API
+
+            client = openai.OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL,
+                                   timeout=timeout, max_retries=0)
+        self.client = client
+        self.model = model
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.calls = 0
+        self.errors = 0
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="advice")
+
+    def cached(self, key):
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def request(self, pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE):
+        # Future of the LLM text (None on failure), or None if no call can be made now
+        if self.client is None:
+            return None
+        key = advice_key(pattern_info, sl_percent, tp_percent, tone)
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                future = Future()
+                future.set_result(text)
+                return future
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if time.time() < self._failed.get(key, 0):
+                return None
+            prompt = advice_prompt(pattern_info, sl_percent, tp_percent, tone)
+            # Rough prompt size (4 characters a token) plus the completion
+            if not self.requests.take() or not self.tokens.take(len(prompt) // 4 + MAX_TOKENS):
+                return None
+            future = self._pending[key] = self._executor.submit(self._call, key, prompt)
+        return future
+
+    def _call(self, key, prompt):
+        with self._lock:
+            self.calls += 1
+        try:
+            res = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=MAX_TOKENS,
+                temperature=0.8,
+                timeout=self.timeout,
+            )
+            text = res.choices[0].message.content.strip()
+        except Exception as e:
+            log.warning("OpenAI error, template advice for %.0fs: %s", ERROR_BACKOFF, e)
+            with self._lock:
+                self.errors += 1
+                self._failed[key] = time.time() + ERROR_BACKOFF
+                self._pending.pop(key, None)
+            return None
+        with self._lock:
+            self._cache[key] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._failed.pop(key, None)
+            self._pending.pop(key, None)
+        return text
+
+    def advice(self, pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE, wait=0.0):
+        # (text, source): source is "llm" for LLM text, "pending" while a call is in flight
+        # (text is the template meanwhile) and "template" otherwise
+        future = self.request(pattern_info, sl_percent, tp_percent, tone)
+        if future is not None:
+            try:
+                text = future.result(timeout=wait) if wait or future.done() else None
+            except FutureTimeoutError:
+                text = None
+            if text is not None:
+                return text, "llm"
+            if not future.done():
+                return template_advice(pattern_info, sl_percent, tp_percent, tone), "pending"
+        return template_advice(pattern_info, sl_percent, tp_percent, tone), "template"
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def advice_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AdviceService()
+        return _service
+
+
+def generate_trade_advice(pattern_info, sl_percent, tp_percent, tone=DEFAULT_TONE, wait=ADVICE_TIMEOUT):
+    text, _ = advice_service().advice(pattern_info, sl_percent, tp_percent, tone, wait)
+    return text
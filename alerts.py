@@ -0,0 +1,237 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from pattern_detector import signal_fingerprint
+from publishers import make_publisher
+
+# Seconds a (symbol, interval) stays quiet after an alert
+COOLDOWN = 30 * 60
+# Fingerprints remembered for dedupe before the oldest are forgotten
+SEEN_LIMIT = 10_000
+# Alerts waiting per sink; past this the oldest waiting alert is dropped
+QUEUE_SIZE = 1000
+# A sink gets at most this many alerts per publish() call, and waits at most this many
+# seconds for a batch to fill once the first alert is queued
+BATCH_SIZE = 50
+BATCH_WAIT = 0.5
+CLOSE_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+def _iso(value):
+    return pd.Timestamp(value).isoformat()
+
+
+def signal_payload(symbol, interval, df, pattern_info, sl, tp):
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "pattern": pattern_info["name"],
+        "confidence": float(pattern_info["confidence"]),
+        "entry": float(pattern_info["entry"]),
+        "sl": sl,
+        "tp": tp,
+        "close": float(df["close"].iloc[-1]),
+        "time": _iso(df.index[-1]),
+        "detected_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "fingerprint": signal_fingerprint(pattern_info, symbol, interval),
+        "key_points": {
+            name: [_iso(point[0]), float(point[1])] if isinstance(point, tuple) else float(point)
+            for name, point in pattern_info.get("key_points", {}).items()
+        },
+    }
+
+
+# Delivers to one publisher from its own thread. submit() never blocks: when the queue
+# is full the oldest waiting alert is dropped, so a slow or dead sink only loses its
+# own backlog and never holds up detection or the other sinks. on_done(alerts, ok) is
+# called from the worker thread as each alert is delivered, fails or is dropped.
+class SinkWorker:
+    def __init__(self, publisher, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT,
+                 on_done=None):
+        self.publisher = publisher
+        self.on_done = on_done
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"alerts-{type(publisher).__name__}", daemon=True)
+        self._thread.start()
+
+    def submit(self, alert):
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(alert)
+                    return
+                except queue.Full:
+                    try:
+                        self._drop(self._queue.get_nowait())
+                    except queue.Empty:
+                        pass
+
+    def _drop(self, alert):
+        self.dropped += 1
+        self._done([alert], False)
+
+    def _done(self, alerts, ok):
+        if self.on_done is not None:
+            self.on_done(alerts, ok)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self.publisher.publish(batch)
+            except Exception as e:
+                print(f"Error in {type(self.publisher).__name__}: {e}")
+                self.failed += len(batch)
+                self._done(batch, False)
+            else:
+                self.delivered += len(batch)
+                self._done(batch, True)
+            if stop:
+                return
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        # Delivers what is already queued, waiting up to timeout seconds
+        with self._lock:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                self._drop(self._queue.get_nowait())
+                self._queue.put_nowait(_STOP)
+        self._thread.join(timeout)
+
+
+# Turns detections into alerts: a signal (see signal_payload) is sent once per fingerprint,
+# and at most once per cooldown seconds for each (symbol, interval). Both are recorded only
+# once a sink has delivered the alert: a signal held back by cooldown, or one that failed on
+# every sink, fires again when it is next submitted. While an alert is in flight its
+# fingerprint counts as a duplicate and its pair as cooling. Accepted alerts go to every
+# sink through its own SinkWorker. Pass clock to run cooldowns on another time base, e.g.
+# candle time in replays.
+class AlertManager:
+    def __init__(self, sinks=(), cooldown=COOLDOWN, seen_limit=SEEN_LIMIT, queue_size=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, clock=time.time):
+        self.cooldown = cooldown
+        self.seen_limit = seen_limit
+        self.clock = clock
+        self.workers = [SinkWorker(make_publisher(sink) if isinstance(sink, str) else sink,
+                                   queue_size, batch_size, batch_wait, on_done=self._settle) for sink in sinks]
+        self.accepted = 0
+        self.duplicates = 0
+        self.cooling = 0
+        self.undelivered = 0
+        self._seen = OrderedDict()
+        self._last_alert = {}
+        # fingerprint -> [pair, submit time, sinks still to report, delivered anywhere]
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pair(alert):
+        return alert.get("symbol"), alert.get("interval")
+
+    def _admit(self, alert, now):
+        fingerprint = alert["fingerprint"]
+        if fingerprint in self._seen or fingerprint in self._in_flight:
+            self.duplicates += 1
+            return False
+        key = self._pair(alert)
+        last = self._last_alert.get(key)
+        if (last is not None and now - last < self.cooldown) or any(
+                flight[0] == key for flight in self._in_flight.values()):
+            self.cooling += 1
+            return False
+        self.accepted += 1
+        if self.workers:
+            self._in_flight[fingerprint] = [key, now, len(self.workers), False]
+        else:
+            self._record(fingerprint, key, now)
+        return True
+
+    def _record(self, fingerprint, key, sent_at):
+        self._seen[fingerprint] = None
+        if len(self._seen) > self.seen_limit:
+            self._seen.popitem(last=False)
+        self._last_alert[key] = sent_at
+
+    def _settle(self, alerts, ok):
+        # SinkWorker callback: the first delivery records the alert as sent
+        with self._lock:
+            for alert in alerts:
+                flight = self._in_flight.get(alert["fingerprint"])
+                if flight is None:
+                    continue
+                key, sent_at, remaining, delivered = flight
+                if ok and not delivered:
+                    self._record(alert["fingerprint"], key, sent_at)
+                    flight[3] = delivered = True
+                flight[2] = remaining = remaining - 1
+                if remaining == 0:
+                    del self._in_flight[alert["fingerprint"]]
+                    if not delivered:
+                        self.undelivered += 1
+
+    def submit(self, alerts):
+        # Returns the alerts that passed dedupe and cooldown; delivery happens in the background
+        now = self.clock()
+        with self._lock:
+            accepted = [alert for alert in alerts if self._admit(alert, now)]
+        for alert in accepted:
+            for worker in self.workers:
+                worker.submit(alert)
+        return accepted
+
+    def alert(self, symbol, interval, df, pattern_info, sl, tp):
+        return bool(self.submit([signal_payload(symbol, interval, df, pattern_info, sl, tp)]))
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "cooling": self.cooling,
+            "undelivered": self.undelivered,
+            "in_flight": len(self._in_flight),
+            "sinks": {
+                f"{position}:{type(worker.publisher).__name__}": {
+                    "delivered": worker.delivered,
+                    "failed": worker.failed,
+                    "dropped": worker.dropped,
+                    "pending": worker.pending,
+                }
+                for position, worker in enumerate(self.workers)
+            },
+        }
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        for worker in self.workers:
+            worker.close(timeout)
@@ -1,10 +1,17 @@
 import streamlit as st
 from datetime import datetime
-from data_fetcher import fetch_ohlc_data
-from pattern_detector import detect_patterns
-from chart_plotter import plot_chart
-from ai_advisor import generate_trade_advice
+from functools import partial
+from market_cache import MarketCache
+from multi_timeframe import detect_multi_timeframe, history_bars
+from chart_plotter import live_chart
+from ai_advisor import DEFAULT_TONE, advice_service
 from logger import log_trade
+from alerts import AlertManager
+from pattern_detector import pattern_direction, trade_levels
+from config import ALERT_COOLDOWN, ALERT_SINKS, MULTI_TIMEFRAME
+
+# Candles per detection window and chart
+WINDOW = 100
 
 st.set_page_config(page_title="BTC Buddy 💹", layout="wide", initial_sidebar_state="expanded")
 
@@ -13,39 +20,74 @@ st.sidebar.title("⚙️ BTC Buddy Settings")
 sl_percent = st.sidebar.number_input("🔧 Stop Loss %", min_value=0.1, max_value=10.0, value=1.5, step=0.1)
 tp_percent = st.sidebar.number_input("🎯 Take Profit %", min_value=0.1, max_value=10.0, value=3.0, step=0.1)
 confidence_threshold = st.sidebar.slider("🧠 Confidence Threshold", 50, 100, 70)
+multi_timeframe = st.sidebar.checkbox("🕰️ Confirm on 1h/4h", value=MULTI_TIMEFRAME,
+                                      help="Blend in patterns on 1h and 4h candles built from the 30m ones")
 #tone = st.sidebar.radio("🎭 Tone", ["Pro 📊"])
 
+
+@st.cache_resource
+def market_cache(multi_timeframe=False):
+    # One cache and refresher per server process and mode, shared by every session
+    if not multi_timeframe:
+        return MarketCache().start()
+    detect = partial(detect_multi_timeframe, base_interval="30m", max_bars=WINDOW)
+    return MarketCache(detect=detect, limit=history_bars("30m", max_bars=WINDOW)).start()
+
+
+@st.cache_resource
+def alert_manager():
+    # Shared too, so reruns and extra tabs don't alert the same signal again
+    return AlertManager(ALERT_SINKS, cooldown=ALERT_COOLDOWN)
+
+
 st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 # Main app
 st.title("🚀 BTC Buddy – Your Pattern-Powered Crypto Pal")
 
 with st.spinner("Fetching BTC data..."):
-    ohlc_df = fetch_ohlc_data()
-    if ohlc_df is not None:
-        pattern_info = detect_patterns(ohlc_df)
+    snapshot = market_cache(multi_timeframe).get("BTCUSDT", "30m")
+    if snapshot is not None:
+        # Multi-timeframe snapshots carry the longer history the higher intervals need
+        ohlc_df = snapshot["df"].tail(WINDOW)
+        pattern_info = snapshot["pattern"]
 
         if pattern_info and pattern_info['confidence'] >= confidence_threshold:
             st.success(f"📉 Pattern Detected: {pattern_info['name']} with {pattern_info['confidence']}% confidence!")
 
-            entry = pattern_info['entry']
-            sl = round(entry * (1 - sl_percent / 100), 2)
-            tp = round(entry * (1 + tp_percent / 100), 2)
+            # Bearish patterns are traded short: stop above the entry, target below
+            short = pattern_direction(pattern_info) == "bearish"
+            sl, tp = trade_levels(pattern_info['entry'], sl_percent, tp_percent, short=short)
 
             # Log the trade
-            log_trade(pattern_info, sl, tp)
+            log_trade(pattern_info, sl, tp, "BTCUSDT", "30m")
+            # Delivery happens in the background, and without sinks nothing goes out at all
+            manager = alert_manager()
+            if manager.alert("BTCUSDT", "30m", ohlc_df, pattern_info, sl, tp) and manager.workers:
+                st.toast(f"🔔 Alert queued: {pattern_info['name']}")
 
             # Plot chart with pattern, entry, SL, TP
-            fig = plot_chart(ohlc_df, pattern_info, sl, tp)
-            st.plotly_chart(fig, use_container_width=True)
+            with live_chart(ohlc_df, pattern_info, sl, tp, symbol="BTCUSDT", interval="30m") as fig:
+                st.plotly_chart(fig, use_container_width=True)
 
-            advice = generate_trade_advice(pattern_info, sl_percent, tp_percent)
             st.subheader("🤖 Trade Suggestion")
-            st.markdown(advice)
+            # Never wait on the LLM: show the template until its advice is cached, and
+            # re-check just this block every couple of seconds while it is in flight
+            _, source = advice_service().advice(pattern_info, sl_percent, tp_percent, DEFAULT_TONE)
+
+            @st.fragment(run_every=2 if source == "pending" else None)
+            def trade_suggestion():
+                advice, current = advice_service().advice(pattern_info, sl_percent, tp_percent, DEFAULT_TONE)
+                if source == "pending" and current != "pending":
+                    # Done, failed or timed out: a full rerun redraws the fragment without polling
+                    st.rerun()
+                st.markdown(advice)
+
+            trade_suggestion()
         else:
             # Plot chart without patterns
-            fig = plot_chart(ohlc_df)
-            st.plotly_chart(fig, use_container_width=True)
+            with live_chart(ohlc_df, symbol="BTCUSDT", interval="30m") as fig:
+                st.plotly_chart(fig, use_container_width=True)
 
             st.warning("📡 No strong patterns detected right now. Try again later!")
     else:
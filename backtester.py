@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from batch_detector import WINDOW, detect_patterns_batch, signal_rows
+from pattern_detector import PATTERN_BIAS, pattern_functions, trade_levels
+from scanner import make_executor
+
+# Bars a trade may stay open before it is closed at market
+MAX_HOLD = 48
+
+SIGNAL_COLUMNS = ["time", "bar", "pattern", "confidence", "entry"]
+TRADE_COLUMNS = SIGNAL_COLUMNS + ["side", "sl", "tp", "exit_bar", "exit_price", "outcome", "return_pct"]
+
+
+def generate_signals(df, window=WINDOW, detectors=None, mode="each"):
+    # Every bar e is evaluated on the window df[e - window + 1 : e + 1], as
+    # detect_patterns would see it live (see batch_detector). mode="each" keeps every
+    # detector's hits; mode="best" keeps the single highest-confidence hit per bar,
+    # like detect_patterns.
+    detectors = detectors or pattern_functions
+    signals = signal_rows(detect_patterns_batch(df, window, detectors))
+    if mode == "best" and len(signals):
+        # Ties go to the detector listed first, as with detect_patterns' stable sort
+        signals = signals.sort_values(["bar", "confidence"], ascending=[True, False], kind="stable")
+        signals = signals.drop_duplicates("bar").sort_values("bar", kind="stable", ignore_index=True)
+    return signals[SIGNAL_COLUMNS]
+
+
+def signal_shorts(patterns, entry, close):
+    # True where a signal is traded short: bearish patterns per PATTERN_BIAS, and for
+    # patterns without a fixed bias (Symmetrical Triangle) a close below the entry level,
+    # i.e. a breakdown rather than a breakout
+    bias = [PATTERN_BIAS.get(pattern) for pattern in patterns]
+    fixed = np.array([direction is not None for direction in bias], dtype=bool)
+    bearish = np.array([direction == "bearish" for direction in bias], dtype=bool)
+    return np.where(fixed, bearish, close < entry)
+
+
+def resolve_exits(high, low, close, bars, sl, tp, max_hold=MAX_HOLD, short=None):
+    # Exit bar, price and outcome ("sl", "tp" or "timeout") of positions opened at the
+    # given bars, scanning the next max_hold bars. Positions are long unless short says
+    # otherwise (by default a stop above the target marks a short). If a bar touches both
+    # levels the stop is assumed to hit first; trades still open after max_hold bars (or
+    # at the end of the data) are closed at that bar's close.
+    n = len(close)
+    if short is None:
+        short = sl > tp
+    short = np.broadcast_to(short, bars.shape)[:, None]
+    pad = np.full(max_hold, np.nan)
+    future_high = sliding_window_view(np.concatenate([high, pad]), max_hold)[bars + 1]
+    future_low = sliding_window_view(np.concatenate([low, pad]), max_hold)[bars + 1]
+    hit_sl = np.where(short, future_high >= sl[:, None], future_low <= sl[:, None])
+    hit_tp = np.where(short, future_low <= tp[:, None], future_high >= tp[:, None])
+
+    first_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), max_hold)
+    first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), max_hold)
+    last_bar = np.minimum(bars + max_hold, n - 1)
+
+    outcome = np.where(first_sl <= first_tp, "sl", "tp")
+    outcome = np.where((first_sl == max_hold) & (first_tp == max_hold), "timeout", outcome)
+    exit_bar = np.where(outcome == "sl", bars + 1 + first_sl, np.where(outcome == "tp", bars + 1 + first_tp, last_bar))
+    exit_price = np.where(outcome == "sl", sl, np.where(outcome == "tp", tp, close[last_bar]))
+    return exit_bar, exit_price, outcome
+
+
+def trade_returns(entry, exit_price, short):
+    return np.where(short, 1 - exit_price / entry, exit_price / entry - 1) * 100
+
+
+def trade_arrays(high, low, close, bars, entry, patterns, sl_percent, tp_percent, max_hold=MAX_HOLD,
+                 overlap=False, short=False):
+    # NumPy core of simulate_trades over signal arrays (bars in order): which signals
+    # become trades, plus every signal's sl, tp, exit bar, exit price and outcome.
+    # Levels keep full precision, so sub-cent symbols get distinct SL/TP.
+    short = np.broadcast_to(short, bars.shape)
+    sl, tp = trade_levels(entry, sl_percent, tp_percent, short)
+    exit_bar, exit_price, outcome = resolve_exits(high, low, close, bars, sl, tp, max_hold, short)
+
+    # Signals on the very last bar have nothing to trade against
+    keep = bars < len(close) - 1
+    if not overlap:
+        # One position per pattern at a time: skip signals while the last trade is open
+        busy_until = {}
+        for position in np.flatnonzero(keep):
+            pattern = patterns[position]
+            if bars[position] > busy_until.get(pattern, -1):
+                busy_until[pattern] = exit_bar[position]
+            else:
+                keep[position] = False
+    return keep, sl, tp, exit_bar, exit_price, outcome
+
+
+def simulate_trades(df, signals, sl_percent, tp_percent, max_hold=MAX_HOLD, overlap=False):
+    # Entry at the signal's entry price, exits checked from the next bar (see
+    # resolve_exits). Bullish patterns are traded long, bearish ones short (see
+    # signal_shorts), with the SL/TP percentages mirrored around the entry.
+    if signals.empty:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    close = df["close"].to_numpy(dtype="float64")
+    bars = signals["bar"].to_numpy()
+    entry = signals["entry"].to_numpy(dtype="float64")
+    short = signal_shorts(signals["pattern"].to_numpy(), entry, close[bars])
+    keep, sl, tp, exit_bar, exit_price, outcome = trade_arrays(
+        df["high"].to_numpy(dtype="float64"),
+        df["low"].to_numpy(dtype="float64"),
+        close, bars, entry, signals["pattern"].to_numpy(),
+        sl_percent, tp_percent, max_hold, overlap, short,
+    )
+    trades = signals.assign(
+        side=np.where(short, "short", "long"), sl=sl, tp=tp, exit_bar=exit_bar, exit_price=exit_price,
+        outcome=outcome, return_pct=trade_returns(entry, exit_price, short),
+    )[keep]
+    return trades.reset_index(drop=True)[TRADE_COLUMNS]
+
+
+def _max_drawdown(returns_pct):
+    equity = np.cumprod(1 + np.asarray(returns_pct) / 100)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return float(((peaks - equity) / peaks).max() * 100) if len(equity) else 0.0
+
+
+def summarize(trades):
+    rows = []
+    for pattern, group in trades.groupby("pattern"):
+        returns = group["return_pct"]
+        rows.append({
+            "pattern": pattern,
+            "trades": len(group),
+            "hit_rate": (group["outcome"] == "tp").mean() * 100,
+            "expectancy_pct": returns.mean(),
+            "avg_win_pct": returns[returns > 0].mean(),
+            "avg_loss_pct": returns[returns <= 0].mean(),
+            "total_return_pct": (np.prod(1 + returns / 100) - 1) * 100,
+            "max_drawdown_pct": _max_drawdown(returns),
+        })
+    columns = ["pattern", "trades", "hit_rate", "expectancy_pct", "avg_win_pct", "avg_loss_pct",
+               "total_return_pct", "max_drawdown_pct"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def backtest(df, sl_percent=1.5, tp_percent=3.0, window=WINDOW, detectors=None, mode="each",
+             max_hold=MAX_HOLD):
+    signals = generate_signals(df, window, detectors, mode)
+    trades = simulate_trades(df, signals, sl_percent, tp_percent, max_hold)
+    return summarize(trades), trades
+
+
+def _backtest_frame(item):
+    (symbol, interval), df, kwargs = item
+    _, trades = backtest(df, **kwargs)
+    return trades.assign(symbol=symbol, interval=interval)
+
+
+def backtest_many(frames, backend="process", workers=None, **kwargs):
+    # frames: {(symbol, interval): DataFrame}. Each frame is backtested on its own
+    # worker and the trades are pooled before summarizing per pattern.
+    with make_executor(backend, workers) as executor:
+        trades = list(executor.map(_backtest_frame, [(key, df, kwargs) for key, df in frames.items()]))
+    trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS)
+    return summarize(trades), trades
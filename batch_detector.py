@@ -0,0 +1,326 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pattern_detector import (
+    compute_features,
+    detector_name,
+    detector_params,
+    rolling_slope,
+    detect_ascending_triangle,
+    detect_bullish_flag,
+    detect_cup_and_handle,
+    detect_double_bottom,
+    detect_head_and_shoulders,
+    detect_rising_wedge,
+    detect_symmetrical_triangle,
+    detect_triple_top,
+    pattern_functions,
+)
+
+# Bars per detection window, same as the live fetch limit
+WINDOW = 100
+# Rows of the cup-and-handle sliding views processed at once, to bound memory on long histories
+CHUNK = 8192
+
+# Every detector, evaluated for every bar e of a history as if e were the last bar of
+# the window df[e - window + 1 : e + 1], using rolling/strided NumPy primitives instead
+# of calling the detector once per bar. Each batch function returns per-bar confidence
+# and entry arrays (NaN where the pattern did not fire) computed with the same formulas
+# as the detectors. Indicators come from one compute_features() pass over the whole
+# history, so RSI/MACD are the converged values rather than restarting per window, and
+# a swing point at e is ignored because it needs bar e + 1 to be known.
+
+
+def _seconds(index):
+    return np.asarray(index, dtype="datetime64[ns]").astype("int64") / 1e9
+
+
+def _rolling(values, window, how):
+    return getattr(pd.Series(values).rolling(window), how)().to_numpy()
+
+
+def _last_swings(mask, k, window):
+    # For every bar e, positions of the last k swing points in [e - window + 1, e - 1]
+    # (oldest first) plus a validity mask
+    n = len(mask)
+    positions = np.flatnonzero(mask)
+    seen = np.concatenate([[0], np.cumsum(mask)[:-1]])
+    picks = []
+    valid = seen >= k
+    for back in range(k, 0, -1):
+        slot = np.clip(seen - back, 0, max(len(positions) - 1, 0))
+        picks.append(positions[slot] if len(positions) else np.zeros(n, dtype=int))
+    valid &= picks[0] >= np.arange(n) - window + 1
+    return picks, valid
+
+
+def _slope(arrays, features, column, window):
+    name = f"slope_{column}_{window}"
+    if name in features:
+        return features[name]
+    return rolling_slope(pd.Series(arrays[column]), window).to_numpy()
+
+
+def _result(fired, confidence, entry):
+    return np.where(fired, np.round(confidence, 2), np.nan), np.where(fired, entry, np.nan)
+
+
+def _batch_head_and_shoulders(arrays, features, window, p):
+    close, times = arrays["close"], arrays["times"]
+    (i1, i2, i3), valid = _last_swings(features["peak_close"], 3, window)
+    left, head, right = close[i1], close[i2], close[i3]
+    confidence = 80 + 10 * (1 - np.abs(left - right) / head)
+    entry = np.minimum(left, right)
+    gap = p["min_gap_hours"] * 3600
+    fired = (
+        valid
+        & (times[i3] - times[i2] >= gap) & (times[i2] - times[i1] >= gap)
+        & ~(features["rsi"] > p["rsi_max"])
+        & (confidence >= p["min_confidence"])
+        & (close >= entry * p["breakout"])
+    )
+    if p["shoulder_tolerance"] is not None:
+        fired &= (head > left) & (head > right) & (np.abs(left - right) / head < p["shoulder_tolerance"])
+    return _result(fired, confidence, entry)
+
+
+def _batch_double_bottom(arrays, features, window, p):
+    close, times = arrays["close"], arrays["times"]
+    troughs = features["trough_close"]
+    (i1, i2), valid = _last_swings(troughs, 2, window)
+
+    # Highest close between each pair of consecutive troughs, ends included
+    positions = np.flatnonzero(troughs)
+    peak_between = np.full(len(close), np.nan)
+    if len(positions) >= 2:
+        pair_max = np.maximum(np.maximum.reduceat(close, positions)[:-1], close[positions[1:]])
+        slot = np.clip(np.searchsorted(positions, i2) - 1, 0, len(pair_max) - 1)
+        peak_between = pair_max[slot]
+
+    first, second = close[i1], close[i2]
+    similarity = np.abs(first - second) / np.maximum(first, second)
+    confidence = 75 + 15 * (1 - similarity)
+    with np.errstate(invalid="ignore"):
+        fired = (
+            valid
+            & (times[i2] - times[i1] >= p["min_gap_hours"] * 3600)
+            & (similarity < p["low_tolerance"]) & (peak_between > first)
+            & ~(features["rsi"][i2] > p["rsi_max"])
+            & (confidence >= p["min_confidence"])
+            & (close >= peak_between * p["breakout"])
+        )
+    return _result(fired, confidence, peak_between)
+
+
+def _batch_ascending_triangle(arrays, features, window, p):
+    high, close = arrays["high"], arrays["close"]
+    n, w = len(close), p["window"]
+    flatness = np.full(n, np.nan)
+    if n >= w:
+        flatness[w - 1:] = sliding_window_view(high, w).std(axis=1, ddof=1)
+    resistance = _rolling(high, w, "max")
+    flatness /= resistance
+    confidence = 70 + 20 * (1 - flatness)
+    with np.errstate(invalid="ignore"):
+        fired = (
+            ~(features["macd_diff"] < 0)
+            & (_slope(arrays, features, "low", w) > 0)
+            & (flatness < p["flatness"])
+            & (confidence >= p["min_confidence"])
+            & (close >= resistance * p["breakout"])
+        )
+    return _result(fired, confidence, resistance)
+
+
+def _batch_triple_top(arrays, features, window, p):
+    high, close, times = arrays["high"], arrays["close"], arrays["times"]
+    (i1, i2, i3), valid = _last_swings(features["peak_high"], 3, window)
+    peaks = np.stack([high[i1], high[i2], high[i3]])
+    top, spread = peaks.max(axis=0), peaks.max(axis=0) - peaks.min(axis=0)
+    confidence = 75 + 10 * (1 - spread / top)
+    gap = p["min_gap_hours"] * 3600
+    fired = (
+        valid
+        & (spread <= p["peak_tolerance"] * top)
+        & (times[i2] - times[i1] >= gap) & (times[i3] - times[i2] >= gap)
+        & (close >= top * p["breakout"])
+    )
+    return _result(fired, confidence, top)
+
+
+def _batch_bullish_flag(arrays, features, window, p):
+    close = arrays["close"]
+    n, w = len(close), p["window"]
+    confidence, entry = np.full(n, np.nan), np.full(n, np.nan)
+    if window < 2 * w or n < 2 * w:
+        return confidence, entry
+    # For a bar e the pole runs over close[e - 2w + 1 : e - w + 1], the flag over the last w bars
+    first = 2 * w - 1
+    pole_start, pole_end = close[:n - first], close[w - 1:n - w]
+    flag_max, flag_min = _rolling(close, w, "max")[first:], _rolling(close, w, "min")[first:]
+    rise = (pole_end - pole_start) / pole_start
+    fired = (
+        (rise >= p["min_rise"])
+        & ((flag_max - flag_min) / flag_min <= p["max_flag_range"])
+        & (_slope(arrays, features, "close", w)[first:] <= p["max_slope"])
+        & (close[first:] >= flag_max * p["breakout"])
+    )
+    confidence[first:], entry[first:] = _result(fired, np.minimum(80 + 10 * (rise / 0.1), 95), flag_max)
+    return confidence, entry
+
+
+def _cup_rows(close, smooth, ends, p):
+    # Rows hold the w - 4 valid 5-bar averages (and closes) of the w-bar tail ending at each bar
+    span = p["window"] - 4
+    windows = sliding_window_view(smooth, span)[ends - span + 1]
+    closes = sliding_window_view(close, span)[ends - span + 1]
+    rows, columns = np.arange(len(ends)), np.arange(span)
+
+    bottom = windows.argmin(axis=1)
+    cup_min = windows[rows, bottom]
+    after_bottom = columns >= bottom[:, None]
+    left_max = np.where(columns <= bottom[:, None], windows, -np.inf).max(axis=1)
+    right_side = np.where(after_bottom, windows, -np.inf)
+    handle_start = right_side.argmax(axis=1)
+    right_max = right_side[rows, handle_start]
+
+    in_handle = columns >= handle_start[:, None]
+    handle_min = np.where(in_handle, closes, np.inf).min(axis=1)
+    handle_range = np.where(in_handle, closes, -np.inf).max(axis=1) - handle_min
+
+    confidence = 75 + 15 * (1 - handle_range / handle_min)
+    fired = (
+        # At least 5 bars from the bottom and from the handle start to the end
+        (bottom <= span - 5) & (handle_start <= span - 5)
+        & (np.abs(left_max - right_max) / np.maximum(left_max, right_max) <= p["rim_tolerance"])
+        & ((left_max - cup_min) / cup_min >= p["min_depth"])
+        & (handle_range / handle_min <= p["max_handle_range"])
+        & (close[ends] >= right_max * p["breakout"])
+    )
+    return _result(fired, confidence, right_max)
+
+
+def _batch_cup_and_handle(arrays, features, window, p):
+    close = arrays["close"]
+    n, w = len(close), p["window"]
+    confidence, entry = np.full(n, np.nan), np.full(n, np.nan)
+    if window < w or n < w:
+        return confidence, entry
+    smooth = sliding_window_view(close, 5).mean(axis=1)
+    for start in range(w - 1, n, CHUNK):
+        ends = np.arange(start, min(start + CHUNK, n))
+        # smooth[j] is the average of close[j : j + 5], so rows are offset by 4
+        confidence[ends], entry[ends] = _cup_rows(close[4:], smooth, ends - 4, p)
+    return confidence, entry
+
+
+def _lines(arrays, features, w):
+    high, low = arrays["high"], arrays["low"]
+    n = len(high)
+    distance_start = np.full(n, np.nan)
+    if n >= w:
+        distance_start[w - 1:] = (high - low)[:n - w + 1]
+    return _slope(arrays, features, "high", w), _slope(arrays, features, "low", w), distance_start, high - low
+
+
+def _batch_rising_wedge(arrays, features, window, p):
+    high_slope, low_slope, distance_start, distance_end = _lines(arrays, features, p["window"])
+    entry = _rolling(arrays["low"], p["window"], "min")
+    confidence = 75 + 15 * (distance_start - distance_end) / distance_start
+    with np.errstate(invalid="ignore"):
+        fired = (
+            (high_slope > 0) & (low_slope > 0)
+            & (distance_end < distance_start)
+            & ~(arrays["close"] > entry * p["breakout"])
+        )
+    return _result(fired, confidence, entry)
+
+
+def _batch_symmetrical_triangle(arrays, features, window, p):
+    high_slope, low_slope, distance_start, distance_end = _lines(arrays, features, p["window"])
+    close = arrays["close"]
+    entry_high = _rolling(arrays["high"], p["window"], "max")
+    entry_low = _rolling(arrays["low"], p["window"], "min")
+    bullish = close > entry_high * p["breakout"]
+    bearish = ~bullish & (close < entry_low * p["breakdown"])
+    confidence = 75 + 15 * (distance_start - distance_end) / distance_start
+    with np.errstate(invalid="ignore"):
+        fired = (
+            (high_slope < 0) & (low_slope > 0)
+            & (distance_end < distance_start)
+            & (bullish | bearish)
+        )
+    return _result(fired, confidence, np.where(bullish, entry_high, entry_low))
+
+
+BATCH_FUNCTIONS = {
+    detect_head_and_shoulders: ("Head & Shoulders", _batch_head_and_shoulders),
+    detect_double_bottom: ("Double Bottom", _batch_double_bottom),
+    detect_ascending_triangle: ("Ascending Triangle", _batch_ascending_triangle),
+    detect_cup_and_handle: ("Cup and Handle", _batch_cup_and_handle),
+    detect_rising_wedge: ("Rising Wedge", _batch_rising_wedge),
+    detect_symmetrical_triangle: ("Symmetrical Triangle", _batch_symmetrical_triangle),
+    detect_bullish_flag: ("Bullish Flag", _batch_bullish_flag),
+    detect_triple_top: ("Triple Top", _batch_triple_top),
+}
+
+
+def batch_inputs(df, features=None):
+    # (arrays, features) as the batch functions take them, shared across parameter sets
+    if features is None:
+        features = compute_features(df)
+    features = {column: features[column].to_numpy() for column in features.columns}
+    arrays = {
+        "high": df["high"].to_numpy(dtype="float64"),
+        "low": df["low"].to_numpy(dtype="float64"),
+        "close": df["close"].to_numpy(dtype="float64"),
+        "times": _seconds(df.index),
+    }
+    return arrays, features
+
+
+def batch_detect(func, arrays, features, window=WINDOW, params=None):
+    # Per-bar (confidence float32, entry float64) of one detector; params overrides its
+    # DETECTOR_PARAMS as in detect_patterns
+    _, batch = BATCH_FUNCTIONS[func]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        confidence, entry = batch(arrays, features, window, detector_params(detector_name(func), params))
+    too_early = np.arange(len(entry)) < window - 1
+    confidence[too_early] = np.nan
+    entry[too_early] = np.nan
+    return confidence.astype("float32"), entry
+
+
+def detect_patterns_batch(df, window=WINDOW, detectors=None, features=None, params=None):
+    # Per-bar signal table indexed like df. Columns are a (field, pattern) MultiIndex:
+    # "confidence" (float32, NaN when the pattern did not fire on that bar) and
+    # "entry" (float64), one column per detector, in pattern_functions order.
+    # params: {detector name: overrides}, as in detect_patterns.
+    detectors = detectors or pattern_functions
+    arrays, features = batch_inputs(df, features)
+
+    confidence, entry = {}, {}
+    for func in detectors:
+        name = BATCH_FUNCTIONS[func][0]
+        overrides = params.get(detector_name(func)) if params else None
+        confidence[name], entry[name] = batch_detect(func, arrays, features, window, overrides)
+
+    return pd.concat(
+        {"confidence": pd.DataFrame(confidence, index=df.index), "entry": pd.DataFrame(entry, index=df.index)},
+        axis=1,
+    )
+
+
+def signal_rows(table):
+    # Long (time, bar, pattern, confidence, entry) rows for the bars where something fired
+    confidence = table["confidence"].to_numpy()
+    bars, columns = np.nonzero(~np.isnan(confidence))
+    names = table["confidence"].columns
+    return pd.DataFrame({
+        "time": table.index[bars],
+        "bar": bars,
+        "pattern": names[columns],
+        "confidence": confidence[bars, columns].astype("float64").round(2),
+        "entry": table["entry"].to_numpy()[bars, columns],
+    })
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import pattern_kernels
+import synthetic
+from batch_detector import detect_patterns_batch
+from binance_stub import KlineStubServer, to_klines
+from candle_buffer import CandleBuffer
+from chart_plotter import plot_chart
+from data_fetcher import fetch_ohlc_data, parse_klines
+from pattern_detector import compute_features, detect_patterns, pattern_functions
+
+SIZES = [100, 10_000, 1_000_000]
+# Per-call detectors are skipped above these sizes
+DETECT_MAX_BARS = 100_000
+FETCH_MAX_BARS = 1000
+MIN_TIME = 0.2
+MAX_REPEATS = 50
+DEFAULT_TOLERANCE = 0.25
+# Cold-import budgets in seconds (fresh interpreter, median of IMPORT_REPEATS) for the
+# modules short-lived jobs start from. About twice what they measured when set; pandas
+# alone is most of the detection modules' share.
+IMPORT_BUDGETS = {
+    "config": 0.05,
+    "ai_advisor": 0.1,
+    "pattern_detector": 1.0,
+    "logger": 1.0,
+    "market_cache": 1.0,
+    "chart_plotter": 1.0,
+    "scanner_service": 1.2,
+    "optimizer": 1.2,
+}
+# Loaded on first use only; importing any module above must not pull these in
+LAZY_IMPORTS = ["ta", "plotly", "openai", "streamlit", "requests"]
+IMPORT_REPEATS = 5
+IMPORT_SCRIPT = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "__import__(sys.argv[1])\n"
+    "print(json.dumps({'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}))\n"
+)
+
+
+def synthetic_ohlc(n, seed=0):
+    # Seeded geometric random walk in fetch_ohlc_data's frame layout, no patterns planted
+    df, _ = synthetic.synthetic_ohlc(n, seed=seed)
+    return df
+
+
+def load_fixture(path):
+    # Recorded candles: a Binance klines JSON dump or a CSV with open_time + OHLCV columns
+    if path.endswith(".json"):
+        with open(path) as f:
+            return parse_klines(json.load(f))
+    df = pd.read_csv(path, parse_dates=["open_time"], index_col="open_time")
+    return df[["open", "high", "low", "close", "volume"]]
+
+
+def measure(func, min_time=MIN_TIME, max_repeats=MAX_REPEATS):
+    func()  # warm-up (imports, caches)
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (not timings or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": len(timings),
+    }
+
+
+def benchmark_frame(label, df, only=None):
+    results = {}
+    tail = df.tail(100)
+
+    def run(name, func):
+        key = f"{name}[{label}]"
+        if only and not any(part in key for part in only):
+            return
+        results[key] = {"bars": len(df), **measure(func)}
+        print(f"{key:55s} {results[key]['median_s'] * 1e3:10.3f} ms")
+
+    run("compute_features", lambda: compute_features(df))
+    if len(df) <= DETECT_MAX_BARS:
+        features = compute_features(df)
+        for func in pattern_functions:
+            run(func.__name__, lambda func=func: func(df, features))
+        run("detect_patterns", lambda: detect_patterns(df))
+    # Long frames are decimated, so this should stay flat as history grows
+    run("plot_chart", lambda: plot_chart(df))
+
+    arrays = pattern_kernels.frame_arrays(tail)
+    run("kernels.detect_patterns[last100]", lambda: pattern_kernels.detect_patterns(*arrays))
+    run("detect_patterns_batch", lambda: detect_patterns_batch(df))
+
+    if len(df) <= FETCH_MAX_BARS:
+        payload = to_klines(df, "30m")
+        run("parse_klines", lambda: parse_klines(payload))
+        run("CandleBuffer.extend_klines", lambda: CandleBuffer(len(df)).extend_klines(payload))
+        with KlineStubServer({("BTCUSDT", "30m"): df}) as server:
+            run("fetch_ohlc_data[stub]", lambda: fetch_ohlc_data("BTCUSDT", "30m", len(df), server.url))
+    return results
+
+
+def measure_import(module, repeats=IMPORT_REPEATS):
+    # Each run is a fresh interpreter, so nothing is cached in sys.modules
+    root = os.path.dirname(os.path.abspath(__file__))
+    timings, loaded = [], set()
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, module], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        timings.append(run["seconds"])
+        loaded.update(name.partition(".")[0] for name in run["modules"])
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": repeats,
+        "lazy_loaded": sorted(loaded.intersection(LAZY_IMPORTS)),
+    }
+
+
+def benchmark_imports(only=None):
+    # (results, failures): modules over their budget or loading a LAZY_IMPORTS module
+    results, failures = {}, []
+    for module, budget in IMPORT_BUDGETS.items():
+        key = f"import[{module}]"
+        if only and not any(part in key for part in only):
+            continue
+        result = results[key] = {"budget_s": budget, **measure_import(module)}
+        problems = []
+        if result["median_s"] > budget:
+            problems.append(f"over its {budget * 1e3:.0f} ms budget")
+        if result["lazy_loaded"]:
+            problems.append(f"loads {', '.join(result['lazy_loaded'])}")
+        print(f"{key:55s} {result['median_s'] * 1e3:10.3f} ms  {'; '.join(problems)}")
+        if problems:
+            failures.append(key)
+    return results, failures
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get("results", {}).get(key)
+        if not before:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{key:55s} {before['median_s'] * 1e3:10.3f} -> {result['median_s'] * 1e3:10.3f} ms  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pattern detection, fetching and chart building")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated synthetic bar counts")
+    parser.add_argument("--fixture", action="append", default=[], help="recorded candles (.json klines or .csv)")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    args = parser.parse_args(argv)
+
+    results, import_failures = benchmark_imports(args.only)
+    for size in [int(size) for size in args.sizes.split(",") if size]:
+        results.update(benchmark_frame(f"synthetic-{size}", synthetic_ohlc(size, args.seed), args.only))
+    for path in args.fixture:
+        results.update(benchmark_frame(path, load_fixture(path), args.only))
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+
+    if import_failures:
+        print(f"{len(import_failures)} module(s) over their import budget or loading lazy dependencies")
+        return 1
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
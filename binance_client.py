@@ -0,0 +1,170 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from config import BINANCE_API_URL
+from data_fetcher import INTERVAL_MS, parse_klines, to_millis
+
+MAX_LIMIT = 1000
+
+# Binance's default IP limit is 6000 request weight per minute; keep some headroom
+# for anything else sharing the IP.
+WEIGHT_LIMIT = 6000
+WEIGHT_HEADROOM = 0.9
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+
+class BinanceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class RateLimitError(BinanceError):
+    def __init__(self, status, message, retry_after):
+        super().__init__(status, message)
+        self.retry_after = retry_after
+
+
+def kline_weight(limit):
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def _backoff(attempt):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+# asyncio kline client sharing one keep-alive session. Concurrency is capped by a
+# semaphore, request weight is budgeted against the X-MBX-USED-WEIGHT-1M header and
+# 429/418 responses are retried after Binance's Retry-After.
+class AsyncKlineClient:
+    def __init__(self, base_url=None, max_concurrency=10, max_retries=MAX_RETRIES,
+                 weight_limit=WEIGHT_LIMIT, timeout=10):
+        self.base_url = base_url or BINANCE_API_URL
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.weight_budget = int(weight_limit * WEIGHT_HEADROOM)
+        self.timeout = timeout
+        self.used_weight = 0
+        self._window = None
+        self._session = None
+        self._semaphore = None
+        self._weight_lock = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._weight_lock = asyncio.Lock()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _reserve_weight(self, weight):
+        # Binance counts weight per wall-clock minute
+        async with self._weight_lock:
+            while True:
+                window = int(time.time() // 60)
+                if window != self._window:
+                    self._window = window
+                    self.used_weight = 0
+                if self.used_weight + weight <= self.weight_budget:
+                    self.used_weight += weight
+                    return
+                await asyncio.sleep((window + 1) * 60 - time.time())
+
+    def _record_weight(self, headers):
+        used = headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None and int(time.time() // 60) == self._window:
+            self.used_weight = max(self.used_weight, int(used))
+
+    async def _get(self, params, weight):
+        await self.open()
+        url = f"{self.base_url}/api/v3/klines"
+        for attempt in range(self.max_retries + 1):
+            await self._reserve_weight(weight)
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params) as response:
+                        self._record_weight(response.headers)
+                        if response.status == 200:
+                            return await response.json()
+                        body = await response.text()
+                        if response.status in (418, 429):
+                            retry_after = float(response.headers.get("Retry-After", _backoff(attempt)))
+                            error = RateLimitError(response.status, body, retry_after)
+                        elif response.status >= 500:
+                            error = BinanceError(response.status, body)
+                            retry_after = _backoff(attempt)
+                        else:
+                            raise BinanceError(response.status, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+                retry_after = _backoff(attempt)
+
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(retry_after)
+
+    async def klines(self, symbol, interval, limit=100, start_time=None, end_time=None):
+        params = {"symbol": symbol, "interval": interval, "limit": limit}
+        if start_time is not None:
+            params["startTime"] = to_millis(start_time)
+        if end_time is not None:
+            params["endTime"] = to_millis(end_time)
+        return await self._get(params, kline_weight(limit))
+
+    async def fetch_ohlc(self, symbol="BTCUSDT", interval="30m", limit=100):
+        return parse_klines(await self.klines(symbol, interval, limit))
+
+    async def fetch_history(self, symbol, interval, start_time, end_time=None):
+        # Every page covers a fixed span of open times, so all pages can be requested at once
+        start = to_millis(start_time)
+        end = to_millis(end_time) if end_time is not None else int(time.time() * 1000)
+        page_span = MAX_LIMIT * INTERVAL_MS[interval]
+        pages = await asyncio.gather(*[
+            self.klines(symbol, interval, MAX_LIMIT, page_start, min(page_start + page_span - 1, end))
+            for page_start in range(start, end + 1, page_span)
+        ])
+        df = parse_klines([row for page in pages for row in page])
+        return df[~df.index.duplicated(keep="last")]
+
+    async def fetch_many(self, pairs, limit=100):
+        # Returns {(symbol, interval): DataFrame or the exception that stopped it}
+        pairs = [tuple(pair) for pair in pairs]
+        results = await asyncio.gather(
+            *[self.fetch_ohlc(symbol, interval, limit) for symbol, interval in pairs],
+            return_exceptions=True,
+        )
+        return dict(zip(pairs, results))
+
+
+def fetch_history(symbol, interval, start_time, end_time=None, base_url=None):
+    async def run():
+        async with AsyncKlineClient(base_url) as client:
+            return await client.fetch_history(symbol, interval, start_time, end_time)
+    return asyncio.run(run())
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from aiohttp import web
+
+from binance_client import kline_weight
+from data_fetcher import INTERVAL_MS
+
+MAX_LIMIT = 1000
+
+
+def to_klines(df, interval):
+    # Render an OHLCV frame in Binance's /api/v3/klines row format
+    open_times = df.index.as_unit("ms").asi8
+    close_times = open_times + INTERVAL_MS[interval] - 1
+    rows = []
+    for open_time, close_time, o, h, l, c, v in zip(
+        open_times, close_times,
+        df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(),
+        df["close"].to_numpy(), df["volume"].to_numpy(),
+    ):
+        rows.append([
+            int(open_time), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}",
+            int(close_time), f"{c * v:.8f}", 0, "0", "0", "0",
+        ])
+    return rows
+
+
+def select_klines(df, params):
+    # Apply Binance's limit/startTime/endTime rules to a stored frame
+    limit = min(int(params.get("limit", 500)), MAX_LIMIT)
+    open_times = df.index.as_unit("ms").asi8
+    lo, hi = 0, len(df)
+    if "startTime" in params:
+        lo = int(np.searchsorted(open_times, int(params["startTime"]), side="left"))
+    if "endTime" in params:
+        hi = int(np.searchsorted(open_times, int(params["endTime"]), side="right"))
+    if "startTime" in params:
+        return df.iloc[lo:min(hi, lo + limit)]
+    return df.iloc[max(lo, hi - limit):hi]
+
+
+# Local stand-in for the Binance REST API, serving klines from in-memory frames
+# keyed by (symbol, interval). Used to run the fetch/scan paths without network.
+# With weight_limit set it reports X-MBX-USED-WEIGHT-1M and answers 429 once the
+# per-minute budget is spent, like the real API.
+class KlineStubServer:
+    def __init__(self, frames, host="127.0.0.1", port=0, weight_limit=None, retry_after=1):
+        self.frames = frames
+        self.requests = 0
+        self.weight_limit = weight_limit
+        self.retry_after = retry_after
+        self._weight = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                if url.path != "/api/v3/klines":
+                    return self._send(404, {"code": -1, "msg": "Not found"})
+
+                used = stub._use_weight(kline_weight(int(params.get("limit", 500))))
+                self.used_weight = used
+                if stub.weight_limit is not None and used > stub.weight_limit:
+                    return self._send(429, {"code": -1003, "msg": "Too many requests."},
+                                      {"Retry-After": str(stub.retry_after)})
+
+                df = stub.frames.get((params.get("symbol"), params.get("interval")))
+                if df is None:
+                    return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+                self._send(200, to_klines(select_klines(df, params), params["interval"]))
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(getattr(self, "used_weight", 0)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def _use_weight(self, weight):
+        with self._lock:
+            self.requests += 1
+            window = int(time.time() // 60)
+            self._weight[window] = self._weight.get(window, 0) + weight
+            return self._weight[window]
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def kline_event(symbol, interval, open_time, o, h, l, c, v, closed):
+    # One message of Binance's combined kline stream
+    return {
+        "stream": f"{symbol.lower()}@kline_{interval}",
+        "data": {
+            "e": "kline",
+            "E": int(time.time() * 1000),
+            "s": symbol,
+            "k": {
+                "t": int(open_time), "T": int(open_time) + INTERVAL_MS[interval] - 1,
+                "s": symbol, "i": interval,
+                "o": f"{o:.8f}", "h": f"{h:.8f}", "l": f"{l:.8f}", "c": f"{c:.8f}", "v": f"{v:.8f}",
+                "x": bool(closed),
+            },
+        },
+    }
+
+
+# Local stand-in for Binance's kline websocket (/stream?streams=...). Tests push
+# events with send()/send_candle() and can drop every connection with disconnect()
+# to exercise reconnects; subscribers only receive the streams they asked for.
+class KlineStreamStub:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self._sockets = set()
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = None
+        self._connected = threading.Condition()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        streams = set(request.query.get("streams", "").split("/"))
+        with self._connected:
+            self._sockets.add((ws, frozenset(streams)))
+            self.connections += 1
+            self._connected.notify_all()
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            with self._connected:
+                self._sockets.discard((ws, frozenset(streams)))
+        return ws
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def wait_for_connections(self, count=1, timeout=5):
+        with self._connected:
+            return self._connected.wait_for(lambda: self.connections >= count, timeout)
+
+    def send(self, message):
+        async def broadcast():
+            for ws, streams in list(self._sockets):
+                if message.get("stream") in streams and not ws.closed:
+                    await ws.send_str(json.dumps(message))
+        self._call(broadcast())
+
+    def send_candle(self, symbol, interval, open_time, row, closed):
+        self.send(kline_event(symbol, interval, open_time, *row, closed))
+
+    def disconnect(self):
+        async def close_all():
+            for ws, _ in list(self._sockets):
+                await ws.close()
+        self._call(close_all())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._call(self._start())
+        return self
+
+    def stop(self):
+        self.disconnect()
+        self._call(self._runner.cleanup())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
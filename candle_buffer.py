@@ -0,0 +1,151 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import INTERVAL_MS, fetch_klines, kline_arrays
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+CAPACITY = 1000
+MAX_LIMIT = 1000
+
+
+# Fixed-capacity OHLCV ring buffer backed by preallocated arrays: int64 open times and
+# one float64 (5, 2 * capacity) block. Every row is written twice, capacity apart, so
+# the newest rows are always one contiguous slice and arrays()/frame() can return
+# views without copying. Views share memory with the buffer: the forming candle
+# changes in place, and once the buffer is full a later write reuses the slot of the
+# oldest row of a full-length view. Copy anything that must outlive the next write.
+class CandleBuffer:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._open_time = np.zeros(2 * capacity, dtype="int64")
+        self._values = np.zeros((len(PRICE_COLUMNS), 2 * capacity), dtype="float64")
+        self._head = -1  # slot of the newest row, in [0, capacity)
+        self._size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_open_time(self):
+        if not self._size:
+            return None
+        return int(self._open_time[self._head])
+
+    def _write(self, slot, open_time, values):
+        for position in (slot, slot + self.capacity):
+            self._open_time[position] = open_time
+            self._values[:, position] = values
+
+    def update(self, open_time, open, high, low, close, volume=0.0):
+        # A candle with the newest open time replaces it (still forming); older ones are ignored
+        last = self.last_open_time
+        if last is not None and open_time < last:
+            return False
+        values = (open, high, low, close, volume)
+        if open_time == last:
+            self._write(self._head, open_time, values)
+            return True
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._write(self._head, open_time, values)
+        return True
+
+    def extend(self, open_time, values):
+        # open_time: (n,) int64 ms, values: (n, 5) float64, both in open-time order.
+        # Rows older than the newest buffered candle are skipped; an equal one replaces it.
+        last = self.last_open_time
+        start = 0 if last is None else int(np.searchsorted(open_time, last, side="left"))
+        if start < len(open_time) and open_time[start] == last:
+            self._write(self._head, last, values[start])
+            start += 1
+        open_time, values = open_time[start:], values[start:]
+        n = len(open_time)
+        if not n:
+            return 0
+        if n > self.capacity:
+            open_time, values = open_time[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+        slots = (self._head + 1 + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self._open_time[slots + offset] = open_time
+            self._values[:, slots + offset] = values.T
+        self._head = int(slots[-1])
+        self._size = min(self._size + n, self.capacity)
+        return n
+
+    def extend_klines(self, data):
+        # Raw /api/v3/klines rows, parsed straight into the buffer
+        if not data:
+            return 0
+        return self.extend(*kline_arrays(data))
+
+    def _span(self, n):
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity + 1
+        return end - n, end
+
+    def arrays(self, n=None):
+        # Views of the newest n rows: {"open_time": int64 ms, "open": float64, ...}
+        start, end = self._span(n)
+        arrays = {"open_time": self._open_time[start:end]}
+        for row, column in enumerate(PRICE_COLUMNS):
+            arrays[column] = self._values[row, start:end]
+        return arrays
+
+    def frame(self, n=None):
+        # fetch_ohlc_data-shaped DataFrame over the buffer's memory (no copy)
+        start, end = self._span(n)
+        index = pd.DatetimeIndex(self._open_time[start:end].view("datetime64[ms]"), copy=False, name="open_time")
+        return pd.DataFrame(self._values[:, start:end].T, index=index, columns=PRICE_COLUMNS, copy=False)
+
+
+# One CandleBuffer per (symbol, interval), refreshed from REST by fetching only from the
+# newest buffered candle onwards (which also refreshes the forming candle).
+class CandleStore:
+    def __init__(self, capacity=CAPACITY, base_url=None):
+        self.capacity = capacity
+        self.base_url = base_url
+        self.buffers = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, symbol, interval):
+        with self._lock:
+            buffer = self.buffers.get((symbol, interval))
+            if buffer is None:
+                buffer = self.buffers[(symbol, interval)] = CandleBuffer(self.capacity)
+            return buffer
+
+    def _request(self, symbol, interval, limit):
+        # (buffer, limit, start_time) of the next top-up request
+        buffer = self.buffer(symbol, interval)
+        last = buffer.last_open_time
+        if last is not None and len(buffer) >= limit:
+            missing = (int(time.time() * 1000) - last) // INTERVAL_MS[interval]
+            if missing < MAX_LIMIT:
+                return buffer, int(missing) + 1, last
+            # Too far behind to top up contiguously: start over
+            with self._lock:
+                buffer = self.buffers[(symbol, interval)] = CandleBuffer(self.capacity)
+        return buffer, min(max(limit, len(buffer)), MAX_LIMIT), None
+
+    def fetch(self, symbol="BTCUSDT", interval="30m", limit=100):
+        # Same frame fetch_ohlc_data returns, as a view over the buffer; None if nothing
+        # could be fetched and nothing is buffered
+        buffer, request_limit, start_time = self._request(symbol, interval, limit)
+        data = fetch_klines(symbol, interval, request_limit, self.base_url, start_time)
+        with buffer.lock:
+            if data:
+                buffer.extend_klines(data)
+            return buffer.frame(limit) if len(buffer) else None
+
+    async def fetch_async(self, client, symbol="BTCUSDT", interval="30m", limit=100):
+        # Same as fetch(), over a binance_client.AsyncKlineClient
+        buffer, request_limit, start_time = self._request(symbol, interval, limit)
+        data = await client.klines(symbol, interval, request_limit, start_time=start_time)
+        with buffer.lock:
+            buffer.extend_klines(data)
+            return buffer.frame(limit) if len(buffer) else None
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from config import CANDLE_CACHE_DIR
+from data_fetcher import INTERVAL_MS, fetch_ohlc_data
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer assumed
+    fcntl = None
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+MAX_LIMIT = 1000
+
+
+def _closed(df, interval, now_ms):
+    # A candle is closed once its full interval has elapsed
+    open_times = df.index.as_unit("ms").asi8
+    return df[open_times + INTERVAL_MS[interval] <= now_ms]
+
+
+# Append-only columnar store of closed candles, one raw little-endian file per column
+# under <root>/<symbol>/<interval>/. Reads memory-map the files, so loading the tail
+# of a long history only touches the pages it needs.
+class CandleCache:
+    def __init__(self, root=CANDLE_CACHE_DIR, base_url=None):
+        self.root = root
+        self.base_url = base_url
+
+    def _dir(self, symbol, interval):
+        safe = [re.sub(r"[^A-Za-z0-9_-]", "_", part) for part in (symbol, interval)]
+        return os.path.join(self.root, *safe)
+
+    def _column_path(self, symbol, interval, column):
+        suffix = "i8" if column == "open_time" else "f8"
+        return os.path.join(self._dir(symbol, interval), f"{column}.{suffix}")
+
+    @contextmanager
+    def _locked(self, symbol, interval):
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _columns(self, symbol, interval):
+        columns = {}
+        for column in ["open_time"] + PRICE_COLUMNS:
+            path = self._column_path(symbol, interval, column)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            columns[column] = np.memmap(path, dtype="<i8" if column == "open_time" else "<f8", mode="r")
+        # A writer killed mid-append can leave columns of different lengths
+        length = min(len(values) for values in columns.values())
+        return {column: values[:length] for column, values in columns.items()}
+
+    def last_open_time(self, symbol, interval):
+        columns = self._columns(symbol, interval)
+        if columns is None:
+            return None
+        return int(columns["open_time"][-1])
+
+    def load(self, symbol, interval, limit=None):
+        columns = self._columns(symbol, interval)
+        if columns is None:
+            return None
+        start = 0 if limit is None else max(0, len(columns["open_time"]) - limit)
+        index = pd.DatetimeIndex(pd.to_datetime(np.array(columns["open_time"][start:]), unit="ms"), name="open_time")
+        return pd.DataFrame({column: np.array(columns[column][start:]) for column in PRICE_COLUMNS}, index=index)
+
+    def append(self, symbol, interval, df):
+        # Only candles newer than what is on disk are written; returns how many were
+        if df is None or df.empty:
+            return 0
+        with self._locked(symbol, interval):
+            last = self.last_open_time(symbol, interval)
+            open_times = df.index.as_unit("ms").asi8
+            new = open_times > last if last is not None else np.ones(len(df), dtype=bool)
+            if not new.any():
+                return 0
+
+            columns = self._columns(symbol, interval)
+            if columns is not None:
+                # Trim any torn tail before appending so the columns stay aligned
+                length = len(columns["open_time"])
+                for column in ["open_time"] + PRICE_COLUMNS:
+                    path = self._column_path(symbol, interval, column)
+                    if os.path.getsize(path) != length * 8:
+                        os.truncate(path, length * 8)
+
+            for column in ["open_time"] + PRICE_COLUMNS:
+                values = open_times[new].astype("<i8") if column == "open_time" else df[column].to_numpy()[new].astype("<f8")
+                with open(self._column_path(symbol, interval, column), "ab") as f:
+                    f.write(values.tobytes())
+            return int(new.sum())
+
+    def rebuild(self, symbol, interval, df):
+        # Replaces everything stored for the pair with df (closed candles only)
+        with self._locked(symbol, interval):
+            columns = {"open_time": df.index.as_unit("ms").asi8.astype("<i8")}
+            columns.update({column: df[column].to_numpy().astype("<f8") for column in PRICE_COLUMNS})
+            for column, values in columns.items():
+                with open(self._column_path(symbol, interval, column), "wb") as f:
+                    f.write(values.tobytes())
+        return len(df)
+
+    def _fetch_gap(self, symbol, interval, start_ms):
+        from binance_client import fetch_history
+
+        try:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return fetch_history(symbol, interval, start_ms, base_url=self.base_url)
+            # fetch_history runs its own event loop, which cannot nest in the caller's
+            with ThreadPoolExecutor(1) as pool:
+                return pool.submit(fetch_history, symbol, interval, start_ms, base_url=self.base_url).result()
+        except Exception as e:
+            print(f"Error fetching {symbol} {interval} history: {e}")
+            return None
+
+    def fetch(self, symbol="BTCUSDT", interval="30m", limit=100):
+        # Same frame fetch_ohlc_data(symbol, interval, limit) returns, but only bars newer
+        # than the last stored candle go over the network. The still-forming candle is
+        # returned but never stored, so it is fetched fresh on the next call.
+        now_ms = int(time.time() * 1000)
+        step = INTERVAL_MS[interval]
+        stored = self.load(symbol, interval, limit)
+
+        if stored is None:
+            fresh = fetch_ohlc_data(symbol, interval, limit, self.base_url)
+            if fresh is None:
+                return None
+            self.append(symbol, interval, _closed(fresh, interval, now_ms))
+            return fresh
+
+        if len(stored) < limit:
+            # Fewer candles on disk than asked for, and the store only grows forward: fetch
+            # the whole window and rebuild from it, keeping stored candles it continues
+            fresh = fetch_ohlc_data(symbol, interval, limit, self.base_url)
+            if fresh is None or fresh.empty:
+                return stored
+            closed = _closed(fresh, interval, now_ms)
+            if not closed.empty and closed.index[0] <= stored.index[-1] + pd.Timedelta(milliseconds=step):
+                closed = pd.concat([stored[stored.index < closed.index[0]], closed])
+            self.rebuild(symbol, interval, closed)
+            return fresh
+
+        last = int(stored.index[-1:].as_unit("ms").asi8[0])
+        missing = (now_ms - last) // step
+        if missing > MAX_LIMIT:
+            # More than one request can return: page through the whole gap so the
+            # store stays contiguous
+            fresh = self._fetch_gap(symbol, interval, last + step)
+        else:
+            fresh = fetch_ohlc_data(symbol, interval, max(1, missing), self.base_url, start_time=last + step)
+        if fresh is None or fresh.empty:
+            return stored
+
+        self.append(symbol, interval, _closed(fresh, interval, now_ms))
+        combined = pd.concat([stored, fresh[fresh.index > stored.index[-1]]])
+        return combined.tail(limit)
+
+
+_default_cache = None
+
+
+def fetch_cached_ohlc(symbol="BTCUSDT", interval="30m", limit=100):
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CandleCache()
+    return _default_cache.fetch(symbol, interval, limit)
@@ -1,151 +1,252 @@
-import plotly.graph_objects as go
-
-def plot_chart(df, pattern_info=None, sl=None, tp=None):
-    fig = go.Figure(data=[go.Candlestick(
-        x=df.index,
-        open=df['open'],
-        high=df['high'],
-        low=df['low'],
-        close=df['close'],
-        increasing_line_color='lime',
-        decreasing_line_color='red',
-        name="Price"
-    )])
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Above this many candles the chart is aggregated down to about this many, roughly
+# one candle per couple of pixels on a wide screen
+MAX_CANDLES = 1000
+
+
+def decimate_ohlc(df, max_candles=MAX_CANDLES):
+    # OHLC-preserving downsampling: consecutive rows are merged into buckets that keep
+    # the first open, highest high, lowest low, last close and summed volume, so wicks
+    # and gaps stay visible at any zoom level. Buckets are labelled with their first time.
+    n = len(df)
+    if n <= max_candles:
+        return df
+    size = -(-n // max_candles)
+    starts = np.arange(0, n, size)
+    ends = np.append(starts[1:], n) - 1
+    columns = {
+        "open": df['open'].to_numpy()[starts],
+        "high": np.maximum.reduceat(df['high'].to_numpy(), starts),
+        "low": np.minimum.reduceat(df['low'].to_numpy(), starts),
+        "close": df['close'].to_numpy()[ends],
+    }
+    if "volume" in df:
+        columns["volume"] = np.add.reduceat(df['volume'].to_numpy(), starts)
+    return pd.DataFrame(columns, index=df.index[starts])
+
+
+# (symbol, interval, decimated) -> (lock, base figure); _templates_lock only guards the dict.
+# There is deliberately no serialized-figure cache: st.plotly_chart re-validates any JSON or
+# dict it is given, which costs ~4x more per rerun than patching the live figure.
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _title(symbol, interval):
+    if symbol is None:
+        return "BTC Binance 30M"
+    base = symbol[:-4] if symbol.endswith("USDT") else symbol
+    return f"{base} Binance {(interval or '').upper()}"
+
+
+def _new_figure(title, large):
+    # Layout, theme and trace styling only; candle data and the pattern overlay are
+    # patched in. Candlesticks have no WebGL variant, but the markers can use one.
+    import plotly.graph_objects as go  # loaded on the first chart, not on import
+
+    marker_trace = go.Scattergl if large else go.Scatter
+    fig = go.Figure(data=[
+        go.Candlestick(
+            increasing_line_color='lime',
+            decreasing_line_color='red',
+            name="Price"
+        ),
+        marker_trace(
+            mode='markers',
+            marker=dict(size=10, color='yellow', symbol='circle-open'),
+            showlegend=False,
+            hoverinfo='skip'
+        ),
+    ])
 
     fig.update_layout(
         xaxis_rangeslider_visible=False,
         template="plotly_dark",
-        title="BTC Binance 30M",
+        title=title,
         hovermode='x unified',
         margin=dict(l=40, r=40, t=60, b=40)
     )
+    return fig
+
+
+def _overlay(df, pattern_info, sl, tp):
+    # Entry/SL/TP lines, labels and key points (as (name, (time, price)) pairs)
+    name = pattern_info['name']
+    confidence = pattern_info['confidence']
+    entry = pattern_info['entry']
+    last_date = df.index[-1]
 
-    if pattern_info:
-        name = pattern_info['name']
-        confidence = pattern_info['confidence']
-        entry = pattern_info['entry']
-        last_date = df.index[-1]
+    shapes = []
+    annotations = []
 
-        shapes = []
-        annotations = []
+    # Entry line
+    shapes.append(dict(
+        type="line",
+        xref="paper",
+        x0=0,
+        x1=1,
+        y0=entry,
+        y1=entry,
+        line=dict(color="cyan", width=2, dash="dash"),
+        name="Entry Line"
+    ))
+    annotations.append(dict(
+        x=last_date,
+        y=entry,
+        xref="x",
+        yref="y",
+        text=f"Entry: {entry:.2f}",
+        showarrow=True,
+        arrowhead=3,
+        ax=40,
+        ay=-30,
+        font=dict(color="cyan")
+    ))
+
+    # SL line
+    if sl:
+        shapes.append(dict(
+            type="line",
+            xref="paper",
+            x0=0,
+            x1=1,
+            y0=sl,
+            y1=sl,
+            line=dict(color="red", width=2, dash="dot"),
+            name="Stop Loss"
+        ))
+        annotations.append(dict(
+            x=last_date,
+            y=sl,
+            xref="x",
+            yref="y",
+            text=f"Stop Loss: {sl:.2f}",
+            showarrow=True,
+            arrowhead=3,
+            ax=40,
+            ay=30,
+            font=dict(color="red")
+        ))
 
-        # Entry line
+    # TP line
+    if tp:
         shapes.append(dict(
             type="line",
             xref="paper",
             x0=0,
             x1=1,
-            y0=entry,
-            y1=entry,
-            line=dict(color="cyan", width=2, dash="dash"),
-            name="Entry Line"
+            y0=tp,
+            y1=tp,
+            line=dict(color="green", width=2, dash="dot"),
+            name="Take Profit"
         ))
         annotations.append(dict(
             x=last_date,
-            y=entry,
+            y=tp,
             xref="x",
             yref="y",
-            text=f"Entry: {entry:.2f}",
+            text=f"Take Profit: {tp:.2f}",
             showarrow=True,
             arrowhead=3,
             ax=40,
             ay=-30,
-            font=dict(color="cyan")
+            font=dict(color="green")
         ))
 
-        # SL line
-        if sl:
-            shapes.append(dict(
-                type="line",
-                xref="paper",
-                x0=0,
-                x1=1,
-                y0=sl,
-                y1=sl,
-                line=dict(color="red", width=2, dash="dot"),
-                name="Stop Loss"
-            ))
-            annotations.append(dict(
-                x=last_date,
-                y=sl,
-                xref="x",
-                yref="y",
-                text=f"Stop Loss: {sl:.2f}",
-                showarrow=True,
-                arrowhead=3,
-                ax=40,
-                ay=30,
-                font=dict(color="red")
-            ))
-
-        # TP line
-        if tp:
-            shapes.append(dict(
-                type="line",
-                xref="paper",
-                x0=0,
-                x1=1,
-                y0=tp,
-                y1=tp,
-                line=dict(color="green", width=2, dash="dot"),
-                name="Take Profit"
-            ))
-            annotations.append(dict(
-                x=last_date,
-                y=tp,
-                xref="x",
-                yref="y",
-                text=f"Take Profit: {tp:.2f}",
-                showarrow=True,
-                arrowhead=3,
-                ax=40,
-                ay=-30,
-                font=dict(color="green")
-            ))
-
-        # Pattern key points markers
-        for point_name, (idx, price) in pattern_info.get("key_points", {}).items():
-            # Place markers/arrows for key points
-            annotations.append(dict(
-                x=idx,
-                y=price,
-                xref="x",
-                yref="y",
-                text=point_name,
-                showarrow=True,
-                arrowhead=2,
-                ax=0,
-                ay=-40,
-                font=dict(color="yellow", size=12),
-                bgcolor="rgba(0,0,0,0.5)",
-                bordercolor="yellow",
-                borderwidth=1,
-                borderpad=2,
-                align="center"
-            ))
-
-            # Optional: add circle markers
-            fig.add_trace(go.Scatter(
-                x=[idx],
-                y=[price],
-                mode='markers',
-                marker=dict(size=10, color='yellow', symbol='circle-open'),
-                showlegend=False,
-                hoverinfo='skip'
-            ))
-
-        # Pattern title
+    # Pattern key points: one label per point and a single marker trace for all of them
+    points = [(point_name, point) for point_name, point in pattern_info.get("key_points", {}).items()
+              if isinstance(point, tuple)]
+    for point_name, (idx, price) in points:
         annotations.append(dict(
-            x=0.5,
-            y=1.05,
-            xref='paper',
-            yref='paper',
-            text=f"Pattern: {name} ({confidence}%)",
-            showarrow=False,
-            font=dict(size=18, color="yellow"),
+            x=idx,
+            y=price,
+            xref="x",
+            yref="y",
+            text=point_name,
+            showarrow=True,
+            arrowhead=2,
+            ax=0,
+            ay=-40,
+            font=dict(color="yellow", size=12),
+            bgcolor="rgba(0,0,0,0.5)",
+            bordercolor="yellow",
+            borderwidth=1,
+            borderpad=2,
             align="center"
         ))
 
-        fig.update_layout(shapes=shapes, annotations=annotations)
+    # Pattern title
+    annotations.append(dict(
+        x=0.5,
+        y=1.05,
+        xref='paper',
+        yref='paper',
+        text=f"Pattern: {name} ({confidence}%)",
+        showarrow=False,
+        font=dict(size=18, color="yellow"),
+        align="center"
+    ))
 
+    return shapes, annotations, points
+
+
+def _prepare(df, visible_range, max_candles):
+    # visible_range=(start, end) renders only that slice of df; long frames are
+    # decimated to max_candles (pass None to draw every candle)
+    if visible_range is not None:
+        df = df.loc[visible_range[0]:visible_range[1]]
+    large = max_candles is not None and len(df) > max_candles
+    return df, (decimate_ohlc(df, max_candles) if large else df), large
+
+
+def _patch(fig, df, candles, pattern_info, sl, tp):
+    shapes, annotations, points = _overlay(df, pattern_info, sl, tp) if pattern_info else ([], [], [])
+    with fig.batch_update():
+        fig.data[0].update(
+            x=candles.index,
+            open=candles['open'],
+            high=candles['high'],
+            low=candles['low'],
+            close=candles['close'],
+        )
+        fig.data[1].update(
+            x=[idx for _, (idx, _) in points],
+            y=[price for _, (_, price) in points],
+        )
+        fig.layout.shapes = shapes
+        fig.layout.annotations = annotations
     return fig
+
+
+def plot_chart(df, pattern_info=None, sl=None, tp=None, visible_range=None, max_candles=MAX_CANDLES,
+               symbol=None, interval=None):
+    # A new figure the caller owns; see live_chart for the reusable per-symbol figure
+    df, candles, large = _prepare(df, visible_range, max_candles)
+    return _patch(_new_figure(_title(symbol, interval), large), df, candles, pattern_info, sl, tp)
+
+
+def _template(symbol, interval, large):
+    key = (symbol, interval, large)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = _templates[key] = (threading.Lock(), _new_figure(_title(symbol, interval), large))
+        return template
+
+
+@contextmanager
+def live_chart(df, pattern_info=None, sl=None, tp=None, visible_range=None, max_candles=MAX_CANDLES,
+               symbol="BTCUSDT", interval="30m"):
+    # Reuses one base figure per (symbol, interval): layout and theme are built once and
+    # each call only swaps in the candles and the pattern overlay. The figure is shared,
+    # so it is only valid inside the with-block; render or serialize it there. Only
+    # callers drawing the same chart wait on each other.
+    df, candles, large = _prepare(df, visible_range, max_candles)
+    lock, fig = _template(symbol, interval, large)
+    with lock:
+        yield _patch(fig, df, candles, pattern_info, sl, tp)
@@ -1,6 +1,63 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+def find_env_file(start=None):
+    # Nearest .env from this package's directory upwards, as load_dotenv() finds it
+    path = os.path.abspath(start or os.path.dirname(__file__))
+    while True:
+        candidate = os.path.join(path, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def load_env(path=None):
+    # Variables already set in the environment win. python-dotenv is only imported
+    # when there is a file to read, so deployments configured through the
+    # environment skip it at startup.
+    path = path or find_env_file()
+    if path is None:
+        return False
+    from dotenv import load_dotenv
+
+    return load_dotenv(path)
+
+
+def _read_settings():
+    return {
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+        "BINANCE_API_URL": os.getenv("BINANCE_API_URL", "https://api.binance.com"),
+        "CANDLE_CACHE_DIR": os.getenv("CANDLE_CACHE_DIR", ".candle_cache"),
+        "PATTERN_METRICS": os.getenv("PATTERN_METRICS", "0") == "1",
+        "TRADE_LOG": os.getenv("TRADE_LOG", "trade_log.csv"),
+        "BINANCE_WS_URL": os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443"),
+        "OPENAI_BASE_URL": os.getenv("OPENAI_BASE_URL") or None,
+        "OPENAI_MODEL": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+        # Comma-separated publisher specs (see publishers.make_publisher) the app alerts through
+        "ALERT_SINKS": [spec.strip() for spec in os.getenv("ALERT_SINKS", "").split(",") if spec.strip()],
+        "ALERT_COOLDOWN": float(os.getenv("ALERT_COOLDOWN", 30 * 60)),
+        # Confirm detections against higher timeframes by default (app sidebar, scanner --multi-timeframe)
+        "MULTI_TIMEFRAME": os.getenv("MULTI_TIMEFRAME", "0") == "1",
+    }
+
+
+_settings = None
+
+
+def __getattr__(name):
+    # Settings are read on first access, with the .env file loaded just before, so
+    # importing config has no side effects and code that never reads a setting never
+    # touches .env or python-dotenv
+    global _settings
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if _settings is None:
+        load_env()
+        _settings = _read_settings()
+    try:
+        return _settings[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
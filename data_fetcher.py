@@ -1,29 +1,77 @@
-import requests
+import threading
+
+import numpy as np
 import pandas as pd
+from config import BINANCE_API_URL
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+# Binance weekly candles open on Monday; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * 86_400_000
+
+# Reused across calls so repeated fetches keep the TLS connection alive. Built on first
+# use: the async and cached paths never need requests at all.
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_maxsize=32))
+            _session.mount("http://", HTTPAdapter(pool_maxsize=32))
+        return _session
+
+def interval_open_ms(time_ms, interval):
+    # Open time of the `interval` candle containing time_ms (works on int64 arrays too)
+    step = INTERVAL_MS[interval]
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    return (time_ms - offset) // step * step + offset
 
-def fetch_ohlc_data():
-    url = "https://api.binance.com/api/v3/klines?symbol=BTCUSDT&interval=30m&limit=100"
+def to_millis(timestamp):
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value // 1_000_000
+
+def kline_arrays(data):
+    # Binance kline format:
+    # [ open_time, open, high, low, close, volume, close_time, ...]
+    # Only open_time and OHLCV are parsed, straight into int64 / (n, 5) float64 arrays
+    n = len(data)
+    open_time = np.fromiter((row[0] for row in data), dtype="int64", count=n)
+    values = np.fromiter((float(value) for row in data for value in row[1:6]), dtype="float64", count=5 * n)
+    return open_time, values.reshape(n, 5)
+
+def parse_klines(data):
+    open_time, values = kline_arrays(data)
+    index = pd.DatetimeIndex(pd.to_datetime(open_time, unit='ms'), name="open_time")
+    return pd.DataFrame(values, index=index, columns=['open', 'high', 'low', 'close', 'volume'], copy=False)
+
+def fetch_klines(symbol="BTCUSDT", interval="30m", limit=100, base_url=None, start_time=None):
+    # Raw kline rows, or None on failure
+    url = f"{base_url or BINANCE_API_URL}/api/v3/klines"
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = to_millis(start_time)
     try:
-        response = requests.get(url, timeout=10)
+        response = _get_session().get(url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-
-        # Binance kline format:
-        # [ open_time, open, high, low, close, volume, close_time, ...]
-        df = pd.DataFrame(data, columns=[
-            "open_time", "open", "high", "low", "close", "volume",
-            "close_time", "quote_asset_volume", "number_of_trades",
-            "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore"
-        ])
-        # Convert to correct types
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # Convert timestamp to datetime index
-        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-        df.set_index('open_time', inplace=True)
-        return df[['open', 'high', 'low', 'close', 'volume']]
+        return response.json()
 
     except Exception as e:
-        print(f"Error fetching Binance data: {e}")
+        print(f"Error fetching Binance data for {symbol} {interval}: {e}")
+        return None
+
+def fetch_ohlc_data(symbol="BTCUSDT", interval="30m", limit=100, base_url=None, start_time=None):
+    data = fetch_klines(symbol, interval, limit, base_url, start_time)
+    if data is None:
         return None
+    return parse_klines(data)
@@ -0,0 +1,195 @@
+import asyncio
+import inspect
+import json
+import time
+
+import aiohttp
+
+from binance_client import MAX_LIMIT, AsyncKlineClient, _backoff
+from candle_cache import _closed
+from config import BINANCE_WS_URL
+from data_fetcher import INTERVAL_MS
+from pattern_detector import detect_patterns
+from multi_timeframe import MultiTimeframeDetector, detect_snapshot, higher_intervals
+from stream_detector import StreamingPatternDetector
+
+# Candles kept per (symbol, interval), same window the REST path detects on
+MAX_BARS = 100
+HEARTBEAT = 30
+
+
+def stream_name(symbol, interval):
+    return f"{symbol.lower()}@kline_{interval}"
+
+
+# Live candles from Binance's kline websocket instead of REST polling. Every
+# (symbol, interval) keeps a StreamingPatternDetector as its ring buffer of the last
+# max_bars candles, updated in place as kline events arrive (the forming candle is
+# replaced until it closes). The receive loop only parses and buffers: a closed candle
+# is snapshotted and queued, and a separate task runs detection off the event loop and
+# calls on_close(symbol, interval, df, pattern_info), which may be a coroutine.
+# Buffers are seeded over REST with closed candles on every (re)connect, and a pair
+# whose events skip past a missing candle is queued for a REST resync; its events are
+# ignored until then, and closes they carried that the resync covers are detected once.
+# With multi_timeframe, every pair keeps a MultiTimeframeDetector instead and its
+# detections are confirmed against the higher intervals built from the same candles.
+class KlineStream:
+    def __init__(self, pairs, on_close=None, max_bars=MAX_BARS, ws_url=None, base_url=None,
+                 max_retries=None, multi_timeframe=False):
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.on_close = on_close
+        self.max_bars = max_bars
+        self.ws_url = ws_url or BINANCE_WS_URL
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.multi_timeframe = multi_timeframe
+        self.buffers = {pair: self._buffer(pair) for pair in self.pairs}
+        self.resyncs = 0
+        self._stale = set()
+        # Open time of the last close detected per pair
+        self._detected = {}
+        self._closes = asyncio.Queue()
+        self._by_stream = {stream_name(*pair): pair for pair in self.pairs}
+        self._stopped = None
+        self._ws = None
+
+    @property
+    def url(self):
+        return f"{self.ws_url}/stream?streams=" + "/".join(self._by_stream)
+
+    def _buffer(self, pair):
+        if self.multi_timeframe:
+            return MultiTimeframeDetector(pair[1], higher_intervals(pair[1]), self.max_bars)
+        return StreamingPatternDetector(self.max_bars)
+
+    def _snapshot(self, pair):
+        buffer = self.buffers[pair]
+        return buffer.snapshot() if self.multi_timeframe else buffer.frames()
+
+    async def resync(self, client, pair):
+        # Only closed candles are buffered: the forming one arrives over the stream next
+        symbol, interval = pair
+        buffer = self._buffer(pair)
+        limit = buffer.history_bars if self.multi_timeframe else self.max_bars
+        if limit > MAX_LIMIT:
+            start_ms = int(time.time() * 1000) - (limit + 1) * INTERVAL_MS[interval]
+            df = await client.fetch_history(symbol, interval, start_ms)
+        else:
+            df = await client.fetch_ohlc(symbol, interval, limit + 1)
+        buffer.extend(_closed(df, interval, int(time.time() * 1000)))
+        self.buffers[pair] = buffer
+        self.resyncs += 1
+
+    async def _closed(self, pair, snapshot):
+        if self.multi_timeframe:
+            pattern_info = await asyncio.to_thread(detect_snapshot, snapshot)
+            df = snapshot[0][0]
+        else:
+            df, features = snapshot
+            pattern_info = await asyncio.to_thread(detect_patterns, df, features)
+        if self.on_close is not None:
+            result = self.on_close(pair[0], pair[1], df, pattern_info)
+            if inspect.isawaitable(result):
+                await result
+
+    async def process(self, client):
+        # Consumes what handle() queues, in order: (pair, open time, frames, closed) with
+        # frames None when the pair needs a resync (or had one) and should be snapshotted here
+        while True:
+            pair, open_time, frames, closed = await self._closes.get()
+            try:
+                if frames is None:
+                    last = self.buffers[pair].last_open_time
+                    if pair in self._stale or last is None or open_time > last:
+                        # Stale, or this candle closed after the resync fetched
+                        await self.resync(client, pair)
+                        self._stale.discard(pair)
+                    # Closes queued while stale all snapshot the resynced buffer: detect
+                    # its last candle once
+                    open_time = self.buffers[pair].last_open_time
+                    if open_time is None or open_time <= self._detected.get(pair, -1):
+                        continue
+                    frames = self._snapshot(pair)
+                if closed:
+                    self._detected[pair] = open_time
+                    await self._closed(pair, frames)
+            except Exception as e:
+                print(f"Error processing {pair[0]} {pair[1]} candle: {e}")
+            finally:
+                self._closes.task_done()
+
+    def handle(self, message):
+        data = message.get("data", message)
+        if data.get("e") != "kline":
+            return
+        kline = data["k"]
+        pair = self._by_stream.get(stream_name(kline["s"], kline["i"]))
+        if pair is None:
+            return
+        closed = bool(kline["x"])
+        if pair in self._stale:
+            # The queued resync fetches this candle; a close still needs detecting after it
+            if closed:
+                self._closes.put_nowait((pair, int(kline["t"]), None, True))
+            return
+        open_time = int(kline["t"])
+        buffer = self.buffers[pair]
+        last = buffer.last_open_time
+        if last is not None and open_time < last:
+            return
+        if last is None or open_time > last + INTERVAL_MS[pair[1]]:
+            # Missed candles (or nothing buffered yet): rebuild from REST, which already
+            # includes this candle
+            self._stale.add(pair)
+            self._closes.put_nowait((pair, open_time, None, closed))
+            return
+        if self.multi_timeframe:
+            buffer.update(open_time, kline["o"], kline["h"], kline["l"], kline["c"], kline["v"], closed=closed)
+        else:
+            buffer.update(open_time, kline["o"], kline["h"], kline["l"], kline["c"], kline["v"])
+        if closed:
+            self._closes.put_nowait((pair, open_time, self._snapshot(pair), True))
+
+    async def join(self):
+        # Waits until every queued candle has been processed
+        await self._closes.join()
+
+    async def run(self):
+        self._stopped = asyncio.Event()
+        async with AsyncKlineClient(self.base_url) as client, aiohttp.ClientSession() as session:
+            processor = asyncio.create_task(self.process(client))
+            try:
+                await self._receive(client, session)
+            finally:
+                processor.cancel()
+
+    async def _receive(self, client, session):
+        attempt = 0
+        while not self._stopped.is_set():
+            try:
+                async with session.ws_connect(self.url, heartbeat=HEARTBEAT) as ws:
+                    self._ws = ws
+                    await asyncio.gather(*(self.resync(client, pair) for pair in self.pairs))
+                    self._stale.clear()
+                    attempt = 0
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self.handle(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Kline stream error: {e}")
+            finally:
+                self._ws = None
+            if self._stopped.is_set():
+                break
+            attempt += 1
+            if self.max_retries is not None and attempt > self.max_retries:
+                break
+            await asyncio.sleep(_backoff(attempt - 1))
+
+    async def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+        if self._ws is not None:
+            await self._ws.close()
@@ -1,21 +1,159 @@
+import atexit
 import csv
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 
-LOG_FILE = "trade_log.csv"
+from config import TRADE_LOG
+from pattern_detector import signal_fingerprint
 
-def log_trade(pattern_info, sl, tp):
-    entry = pattern_info['entry']
-    confidence = pattern_info['confidence']
-    name = pattern_info['name']
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer assumed
+    fcntl = None
 
-    headers = ["Time", "Pattern", "Confidence", "Entry", "SL", "TP"]
-    row = [now, name, confidence, entry, sl, tp]
+LOG_FILE = TRADE_LOG
 
-    file_exists = os.path.isfile(LOG_FILE)
-    with open(LOG_FILE, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(headers)
-        writer.writerow(row)
+HEADERS = ["Time", "Symbol", "Interval", "Pattern", "Confidence", "Entry", "SL", "TP", "Fingerprint"]
+# Flush once this many rows are buffered or this many seconds have passed
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 5.0
+# Fingerprints remembered for dedupe before the oldest are forgotten
+SEEN_LIMIT = 10_000
+# CSV logs are rotated to <file>.1 past this size
+MAX_CSV_BYTES = 10 * 1024 * 1024
+
+
+class CsvBackend:
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_CSV_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _header(self):
+        # Files started by older versions keep their own columns
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+            return None
+        with open(self.path, newline="") as f:
+            return next(csv.reader(f), None)
+
+    def recent_fingerprints(self, limit=SEEN_LIMIT):
+        header = self._header()
+        if not header or "Fingerprint" not in header:
+            return []
+        with open(self.path, newline="") as f:
+            return [row["Fingerprint"] for row in csv.DictReader(f)][-limit:]
+
+    def write(self, rows):
+        # One locked open/append per batch; the lock file also covers rotation, so other
+        # workers never append to a file that is being renamed
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self.max_bytes and os.path.isfile(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                header = self._header()
+                with open(self.path, "a", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=header or HEADERS, extrasaction="ignore")
+                    if header is None:
+                        writer.writeheader()
+                    writer.writerows(rows)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def make_backend(path=LOG_FILE):
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        # Indexed, queryable history; imported here so CSV logging stays import-light
+        from signal_store import SignalStore
+        return SignalStore(path)
+    return CsvBackend(path)
+
+
+# Buffers trade rows in memory and hands them to the backend in batches, either when
+# BATCH_SIZE rows are waiting or FLUSH_INTERVAL seconds after the first buffered row.
+# Signals already logged (same fingerprint) are skipped.
+class TradeLogger:
+    def __init__(self, backend=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.backend = backend or make_backend()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+        self._seen = OrderedDict((fingerprint, None) for fingerprint in self.backend.recent_fingerprints())
+        atexit.register(self.close)
+
+    def _remember(self, fingerprint):
+        if fingerprint in self._seen:
+            return False
+        self._seen[fingerprint] = None
+        if len(self._seen) > SEEN_LIMIT:
+            self._seen.popitem(last=False)
+        return True
+
+    def log(self, pattern_info, sl, tp, symbol=None, interval=None):
+        fingerprint = signal_fingerprint(pattern_info, symbol, interval)
+        row = {
+            # UTC, like candle times and the signal store, whatever the host's timezone
+            "Time": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "Symbol": symbol or "",
+            "Interval": interval or "",
+            "Pattern": pattern_info['name'],
+            "Confidence": pattern_info['confidence'],
+            "Entry": pattern_info['entry'],
+            "SL": sl,
+            "TP": tp,
+            "Fingerprint": fingerprint,
+        }
+        with self._lock:
+            if not self._remember(fingerprint):
+                return False
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="trade-log-flusher", daemon=True)
+                self._flusher.start()
+        if full:
+            self.flush()
+        else:
+            self._wake.set()
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            self.backend.write(rows)
+        except Exception as e:
+            print(f"Error writing trade log: {e}")
+            with self._lock:
+                self._buffer = rows + self._buffer
+
+    def close(self):
+        self.flush()
+
+
+_default_logger = None
+_default_lock = threading.Lock()
+
+
+def log_trade(pattern_info, sl, tp, symbol=None, interval=None):
+    global _default_logger
+    with _default_lock:
+        if _default_logger is None:
+            _default_logger = TradeLogger()
+    return _default_logger.log(pattern_info, sl, tp, symbol, interval)
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from candle_cache import fetch_cached_ohlc
+from data_fetcher import INTERVAL_MS
+from pattern_detector import detect_patterns
+
+# Seconds after a candle closes before it is fetched, so Binance has published it
+CLOSE_DELAY = 2.0
+# Seconds before a failed refresh is retried
+RETRY_DELAY = 10.0
+# Longest the refresher sleeps between checks for newly watched symbols
+MAX_SLEEP = 30.0
+# Seconds the forming candle is served before it is fetched again; without it a 4h
+# chart would show the same forming candle for up to 4 hours
+FORMING_TTL = 60.0
+
+
+# Process-wide cache of candles and detection results shared by every session. Entries
+# are keyed by (symbol, interval) and expire when the forming candle closes or after
+# ttl seconds, whichever comes first (ttl=None: only on close). Detection is memoized
+# per (symbol, interval, last candle), keyed on its open time, high, low and close, so
+# it only reruns when the frame's tail changes. Concurrent misses on the same key wait
+# for one fetch.
+# start() adds a background thread that refreshes every watched key right after each
+# candle close, so sessions normally never fetch themselves.
+class MarketCache:
+    def __init__(self, fetch=fetch_cached_ohlc, detect=detect_patterns, limit=100, ttl=FORMING_TTL):
+        self.fetch = fetch
+        self.detect = detect
+        self.limit = limit
+        self.ttl = ttl
+        self._entries = {}
+        self._watched = set()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() < entry["expires_at"]
+
+    def get(self, symbol="BTCUSDT", interval="30m"):
+        # Latest snapshot: {"df", "pattern", "last_open", "fetched_at", "expires_at", ...},
+        # or None if nothing could be fetched yet
+        key = (symbol, interval)
+        with self._lock:
+            self._watched.add(key)
+            entry = self._entries.get(key)
+        if self._fresh(entry):
+            return entry
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if self._fresh(entry):
+                return entry
+            return self.refresh(symbol, interval)
+
+    def refresh(self, symbol, interval):
+        key = (symbol, interval)
+        previous = self._entries.get(key)
+        df = self.fetch(symbol, interval, self.limit)
+        if df is None or df.empty:
+            # Keep serving what we have and back off before the next attempt
+            if previous is None:
+                return None
+            entry = dict(previous, expires_at=time.time() + RETRY_DELAY)
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+
+        now = time.time()
+        last_open = int(df.index[-1:].as_unit("ms").asi8[0])
+        # The forming candle keeps its open time while it trades, so the memo also
+        # covers its prices
+        last_bar = (last_open,) + tuple(float(df[column].iloc[-1]) for column in ("high", "low", "close"))
+        if previous is not None and previous.get("last_bar") == last_bar:
+            pattern = previous["pattern"]
+        else:
+            pattern = self.detect(df)
+
+        expires_at = (last_open + INTERVAL_MS[interval]) / 1000 + CLOSE_DELAY
+        if self.ttl is not None:
+            expires_at = min(expires_at, now + self.ttl)
+        entry = {
+            "symbol": symbol,
+            "interval": interval,
+            "df": df,
+            "pattern": pattern,
+            "last_open": last_open,
+            "last_bar": last_bar,
+            "fetched_at": now,
+            # Never busy-loop on a stale clock or a frame whose last candle already closed
+            "expires_at": max(expires_at, now + CLOSE_DELAY),
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                watched = list(self._watched)
+                entries = {key: self._entries.get(key) for key in watched}
+            for (symbol, interval), entry in entries.items():
+                if not self._fresh(entry):
+                    with self._key_lock((symbol, interval)):
+                        if not self._fresh(self._entries.get((symbol, interval))):
+                            try:
+                                self.refresh(symbol, interval)
+                            except Exception as e:
+                                print(f"Error refreshing {symbol} {interval}: {e}")
+            with self._lock:
+                expiries = [entry["expires_at"] for entry in self._entries.values()]
+            wait = min(expiries, default=time.time() + MAX_SLEEP) - time.time()
+            self._stop.wait(min(max(wait, 0.5), MAX_SLEEP))
+
+    def start(self):
+        if self._refresher is None:
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._run, name="market-refresher", daemon=True)
+            self._refresher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from config import PATTERN_METRICS
+
+# Upper bounds (seconds) of the per-detector latency histogram
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0]
+
+log = logging.getLogger("pattern_metrics")
+
+# Checked before any bookkeeping, so a disabled registry costs one attribute read per call
+enabled = PATTERN_METRICS
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _detector_stats(name):
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = {
+            "calls": 0,
+            "hits": 0,
+            "exceptions": 0,
+            "seconds": 0.0,
+            "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+            "rejections": {},
+        }
+    return stats
+
+
+def observe(func, *args):
+    # Runs one detector call and records its latency and outcome. Gates inside the
+    # detector report rejections through reject() while it runs.
+    name = func.__name__
+    _local.detector = name
+    started = time.perf_counter()
+    try:
+        result = func(*args)
+    except Exception:
+        with _lock:
+            _detector_stats(name)["exceptions"] += 1
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _local.detector = None
+        with _lock:
+            stats = _detector_stats(name)
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if elapsed <= bound), len(LATENCY_BUCKETS))
+            stats["buckets"][bucket] += 1
+    if result:
+        with _lock:
+            _detector_stats(name)["hits"] += 1
+    return result
+
+
+def reject(gate):
+    # Called by a detector when it bails out; counted against the detector observe() is running
+    name = getattr(_local, "detector", None)
+    if name is None:
+        return
+    with _lock:
+        rejections = _detector_stats(name)["rejections"]
+        rejections[gate] = rejections.get(gate, 0) + 1
+
+
+def snapshot():
+    with _lock:
+        return json.loads(json.dumps(_stats))
+
+
+def merge(other):
+    # Folds a snapshot() taken in another process (e.g. a scanner worker) into this registry
+    with _lock:
+        for name, theirs in other.items():
+            stats = _detector_stats(name)
+            for key in ("calls", "hits", "exceptions", "seconds"):
+                stats[key] += theirs[key]
+            stats["buckets"] = [a + b for a, b in zip(stats["buckets"], theirs["buckets"])]
+            for gate, count in theirs["rejections"].items():
+                stats["rejections"][gate] = stats["rejections"].get(gate, 0) + count
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    stats = snapshot()
+    lines = []
+
+    def header(metric, kind, text):
+        lines.append(f"# HELP {metric} {text}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+    for key, text in [("calls", "Detector calls."), ("hits", "Calls that returned a pattern."),
+                      ("exceptions", "Calls that raised.")]:
+        metric = f"pattern_detector_{key}_total"
+        header(metric, "counter", text)
+        for name, values in stats.items():
+            lines.append(f'{metric}{{detector="{_label(name)}"}} {values[key]}')
+
+    metric = "pattern_detector_rejections_total"
+    header(metric, "counter", "Calls that returned nothing, by the gate that rejected them.")
+    for name, values in stats.items():
+        for gate, count in sorted(values["rejections"].items()):
+            lines.append(f'{metric}{{detector="{_label(name)}",gate="{_label(gate)}"}} {count}')
+
+    metric = "pattern_detector_seconds"
+    header(metric, "histogram", "Wall time per detector call.")
+    for name, values in stats.items():
+        label = f'detector="{_label(name)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ["+Inf"], values["buckets"]):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f"{metric}_sum{{{label}}} {values['seconds']}")
+        lines.append(f"{metric}_count{{{label}}} {values['calls']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    # For node_exporter's textfile collector: write then rename so scrapes never see half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def log_metrics(logger=None):
+    # One JSON record per detector, for log pipelines that prefer structured events
+    logger = logger or log
+    for name, values in snapshot().items():
+        record = {
+            "event": "pattern_detector_stats",
+            "detector": name,
+            "calls": values["calls"],
+            "hits": values["hits"],
+            "exceptions": values["exceptions"],
+            "rejections": values["rejections"],
+            "seconds_total": round(values["seconds"], 6),
+            "seconds_mean": round(values["seconds"] / values["calls"], 6) if values["calls"] else None,
+        }
+        logger.info(json.dumps(record))
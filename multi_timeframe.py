@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from data_fetcher import INTERVAL_MS, interval_open_ms, to_millis
+from pattern_detector import detect_patterns, pattern_direction
+from stream_detector import StreamingPatternDetector
+
+HIGHER_INTERVALS = ("1h", "4h")
+# How far a higher-timeframe detection moves the base confidence: a same-direction
+# pattern at confidence c scales it by 1 + weight * c / 100, an opposite one by
+# 1 - weight * c / 100
+TIMEFRAME_WEIGHTS = {"1h": 0.10, "2h": 0.10, "4h": 0.15, "6h": 0.15, "12h": 0.15, "1d": 0.20}
+DEFAULT_WEIGHT = 0.10
+MAX_BARS = 100
+
+
+def resample_ohlc(df, interval):
+    # fetch_ohlc_data-shaped candles of a higher interval, built from base candles. A
+    # leading bucket without its first base candle is dropped; the last bucket is kept
+    # even if it is still forming, as a live frame's last candle is.
+    open_ms = df.index.as_unit("ms").asi8
+    buckets = interval_open_ms(open_ms, interval)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if len(starts) and open_ms[0] != buckets[0]:
+        starts = starts[1:]
+    if not len(starts):
+        return df.iloc[:0]
+    values = {column: df[column].to_numpy(dtype="float64") for column in ["open", "high", "low", "close", "volume"]}
+    ends = np.r_[starts[1:], len(df)] - 1
+    index = pd.DatetimeIndex(pd.to_datetime(buckets[starts], unit="ms"), name="open_time")
+    return pd.DataFrame({
+        "open": values["open"][starts],
+        "high": np.maximum.reduceat(values["high"][starts[0]:], starts - starts[0]),
+        "low": np.minimum.reduceat(values["low"][starts[0]:], starts - starts[0]),
+        "close": values["close"][ends],
+        "volume": np.add.reduceat(values["volume"][starts[0]:], starts - starts[0]),
+    }, index=index)
+
+
+def higher_intervals(base_interval, intervals=HIGHER_INTERVALS):
+    # Those of intervals that can be built from base_interval candles
+    base_step = INTERVAL_MS[base_interval]
+    return tuple(interval for interval in intervals
+                 if INTERVAL_MS[interval] > base_step and INTERVAL_MS[interval] % base_step == 0)
+
+
+def history_bars(base_interval, intervals=HIGHER_INTERVALS, max_bars=MAX_BARS):
+    # Base candles detect_multi_timeframe needs to fill max_bars of every higher interval
+    base_step = INTERVAL_MS[base_interval]
+    return max([max_bars] + [max_bars * INTERVAL_MS[interval] // base_step
+                             for interval in higher_intervals(base_interval, intervals)])
+
+
+def blend_confidence(result, confirmations, weights=None):
+    # result: a base-timeframe detection. confirmations: {interval: [detections]} on the
+    # higher timeframes. Returns a copy with the blended "confidence", the original as
+    # "base_confidence" and the deciding detection per interval under "timeframes".
+    weights = weights or TIMEFRAME_WEIGHTS
+    direction = pattern_direction(result)
+    factor = 1.0
+    timeframes = {}
+    for interval, detections in confirmations.items():
+        if not detections:
+            timeframes[interval] = None
+            continue
+        best = max(detections, key=lambda detection: detection["confidence"])
+        agrees = pattern_direction(best) == direction
+        weight = weights.get(interval, DEFAULT_WEIGHT)
+        factor += (1 if agrees else -1) * weight * best["confidence"] / 100
+        timeframes[interval] = {
+            "name": best["name"],
+            "confidence": best["confidence"],
+            "agrees": agrees,
+        }
+    return dict(
+        result,
+        base_confidence=result["confidence"],
+        confidence=round(min(100.0, result["confidence"] * factor), 2),
+        timeframes=timeframes,
+    )
+
+
+def _blend_all(base_results, confirmations, mode, weights):
+    blended = sorted((blend_confidence(result, confirmations, weights) for result in base_results),
+                     key=lambda result: -result["confidence"])
+    if mode == "best":
+        return blended[0] if blended else None
+    return blended
+
+
+def detect_multi_timeframe(df, base_interval="30m", intervals=HIGHER_INTERVALS, mode="best", weights=None,
+                           max_bars=MAX_BARS):
+    # One-shot version of MultiTimeframeDetector over a frame of base candles that reaches
+    # back far enough for the higher intervals (see history_bars). Only closed higher-interval
+    # candles are used, so confirmations never repaint; intervals that are not multiples of
+    # base_interval are skipped.
+    base_results = detect_patterns(df.tail(max_bars), mode="all")
+    last_open = to_millis(df.index[-1])
+    confirmations = {}
+    for interval in higher_intervals(base_interval, intervals):
+        higher = resample_ohlc(df, interval)
+        if len(higher) and last_open + INTERVAL_MS[base_interval] < to_millis(higher.index[-1]) + INTERVAL_MS[interval]:
+            higher = higher.iloc[:-1]
+        best = detect_patterns(higher.tail(max_bars)) if len(higher) else None
+        confirmations[interval] = [best] if best else []
+    return _blend_all(base_results, confirmations, mode, weights)
+
+
+# Confirms base-interval detections against higher intervals built from the same base
+# candles, so no extra klines are fetched. Every interval keeps a StreamingPatternDetector:
+# the base one is updated on every candle (the forming one included), higher ones only
+# receive a candle once its last base candle has closed. Their detections are cached per
+# closed higher candle, so a base tick costs one base detection plus a few additions.
+# Seed it with CandleCache().load(symbol, base_interval, detector.history_bars).
+class MultiTimeframeDetector:
+    def __init__(self, base_interval="30m", intervals=HIGHER_INTERVALS, max_bars=MAX_BARS, weights=None):
+        base_step = INTERVAL_MS[base_interval]
+        for interval in intervals:
+            if INTERVAL_MS[interval] <= base_step or INTERVAL_MS[interval] % base_step:
+                raise ValueError(f"{interval} is not a multiple of {base_interval}")
+        self.base_interval = base_interval
+        self.intervals = tuple(intervals)
+        self.weights = weights
+        self.base = StreamingPatternDetector(max_bars)
+        self.frames = {interval: StreamingPatternDetector(max_bars) for interval in self.intervals}
+        # Base candles of the forming higher candle: {interval: (bucket open, {base open: bar})}
+        self._buckets = {interval: None for interval in self.intervals}
+        self._detections = {interval: (None, []) for interval in self.intervals}
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def last_open_time(self):
+        return self.base.last_open_time
+
+    @property
+    def history_bars(self):
+        # Base candles needed to fill every higher interval's buffer
+        return max([self.base.max_bars] + [
+            self.frames[interval].max_bars * INTERVAL_MS[interval] // INTERVAL_MS[self.base_interval]
+            for interval in self.intervals
+        ])
+
+    def _close_bucket(self, interval):
+        bucket_open, bars = self._buckets[interval]
+        if bars:
+            rows = [bars[open_time] for open_time in sorted(bars)]
+            self.frames[interval].update(
+                bucket_open, rows[0][0], max(row[1] for row in rows), min(row[2] for row in rows),
+                rows[-1][3], sum(row[4] for row in rows),
+            )
+        self._buckets[interval] = (bucket_open, None)
+
+    def update(self, open_time, open, high, low, close, volume=0.0, closed=False):
+        # closed=True once the candle is final (e.g. the websocket's "x"); a candle is also
+        # known to be closed when a later one arrives
+        open_time = to_millis(open_time)
+        self.base.update(open_time, open, high, low, close, volume)
+        base_step = INTERVAL_MS[self.base_interval]
+        for interval in self.intervals:
+            bucket_open = interval_open_ms(open_time, interval)
+            current = self._buckets[interval]
+            if current is not None and bucket_open > current[0] and current[1] is not None:
+                self._close_bucket(interval)
+                current = self._buckets[interval]
+            if current is None or bucket_open > current[0]:
+                # Like resample_ohlc, only the first bucket can be joined midway (e.g. at the
+                # first seeded candle), and it is never completed
+                complete = current is not None or open_time == bucket_open
+                current = self._buckets[interval] = (bucket_open, {} if complete else None)
+            if current[1] is None:
+                continue
+            current[1][open_time] = (float(open), float(high), float(low), float(close), float(volume))
+            if closed and open_time + base_step >= bucket_open + INTERVAL_MS[interval]:
+                self._close_bucket(interval)
+
+    def extend(self, df, closed=True):
+        # Base candles in open-time order; with closed=True all but the last are final and
+        # the last one is too (pass closed=False when it may still be forming)
+        rows = list(zip(df.index, df[["open", "high", "low", "close", "volume"]].itertuples(index=False)))
+        for position, (open_time, row) in enumerate(rows):
+            self.update(open_time, *row, closed=closed or position + 1 < len(rows))
+
+    def confirmations(self):
+        confirmations = {}
+        for interval in self.intervals:
+            buffer = self.frames[interval]
+            last_open, detections = self._detections[interval]
+            if len(buffer) and buffer.last_open_time != last_open:
+                # Only the strongest higher-interval detection counts (see blend_confidence)
+                best = buffer.detect()
+                detections = [best] if best else []
+                self._detections[interval] = (buffer.last_open_time, detections)
+            confirmations[interval] = detections
+        return confirmations
+
+    def snapshot(self):
+        # Base frames plus the current confirmations, for detect_snapshot to run later or
+        # off-thread while updates continue
+        return self.base.frames(), self.confirmations()
+
+    def detect(self, mode="best"):
+        if not len(self.base):
+            return None if mode == "best" else []
+        return detect_snapshot(self.snapshot(), mode, self.weights)
+
+
+def detect_snapshot(snapshot, mode="best", weights=None):
+    (df, features), confirmations = snapshot
+    return _blend_all(detect_patterns(df, features, mode="all"), confirmations, mode, weights)
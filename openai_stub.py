@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Local stand-in for the OpenAI chat completions endpoint, for exercising ai_advisor
+# without a key: AdviceService(openai.OpenAI(api_key="test", base_url=stub.url)).
+# Replies with reply (or "Advice: <last prompt line>"), after delay seconds, or with
+# status as an error.
+class ChatCompletionStub:
+    def __init__(self, reply=None, delay=0.0, status=200, host="127.0.0.1", port=0):
+        self.reply = reply
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.prompts = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._send(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.prompts.append(prompt)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.status != 200:
+                    return self._send(stub.status, {"error": {"message": "Stub error", "type": "server_error"}})
+                lines = prompt.strip().splitlines()
+                content = stub.reply if stub.reply is not None else f"Advice: {lines[-1] if lines else ''}"
+                self._send(200, {
+                    "id": f"chatcmpl-stub-{stub.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                              "total_tokens": (len(prompt) + len(content)) // 4},
+                })
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
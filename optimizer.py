@@ -0,0 +1,269 @@
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from backtester import MAX_HOLD, _max_drawdown, signal_shorts, trade_arrays, trade_returns
+from batch_detector import BATCH_FUNCTIONS, WINDOW, batch_detect, batch_inputs
+from candle_cache import CandleCache, _closed
+from data_fetcher import INTERVAL_MS
+from pattern_detector import DETECTOR_PARAMS, SLOPE_WINDOWS, compute_features, detector_name, pattern_functions
+from scanner import make_executor
+
+# Trade settings a sweep can vary next to the detector parameters
+TRADE_PARAMS = {"sl_percent": 1.5, "tp_percent": 3.0, "max_hold": MAX_HOLD, "confidence_threshold": 0}
+# Price columns each detector fits its "window" trend over
+SLOPE_COLUMNS = {
+    "ascending_triangle": ("low",),
+    "bullish_flag": ("close",),
+    "rising_wedge": ("high", "low"),
+    "symmetrical_triangle": ("high", "low"),
+}
+# Per-detector signals each worker keeps, keyed by (detector, its parameters)
+DETECTION_CACHE_SIZE = 512
+CHUNKSIZE = 16
+OBJECTIVES = ["expectancy_pct", "total_return_pct", "hit_rate", "trades", "return_to_drawdown"]
+
+# A small grid around the defaults: 3 * 3 * 3 * 3 * 2 * 2 * 2 * 2 = 1296 points
+DEFAULT_SPACE = {
+    "sl_percent": [1.0, 1.5, 2.0],
+    "tp_percent": [2.0, 3.0, 4.0],
+    "head_and_shoulders.rsi_max": [50, 60, 70],
+    "double_bottom.rsi_max": [30, 40, 50],
+    "double_bottom.low_tolerance": [0.03, 0.05],
+    "triple_top.peak_tolerance": [0.015, 0.03],
+    "bullish_flag.min_rise": [0.03, 0.05],
+    "cup_and_handle.window": [40, 50],
+}
+
+
+# Sweeps evaluate detector settings with the batch detectors (one pass over the whole
+# history per setting) and score them by backtesting the resulting signals. A point is a
+# flat dict: "<detector>.<param>" keys override DETECTOR_PARAMS, the TRADE_PARAMS keys set
+# the trade. Every worker builds the indicators once, including the trend slopes of every
+# window the space asks for, and caches each detector's signals per its own parameters,
+# so points that only differ in other detectors' values or in trade settings reuse them.
+
+
+def split_point(point):
+    detectors, trade = {}, dict(TRADE_PARAMS)
+    for key, value in point.items():
+        if key in TRADE_PARAMS:
+            trade[key] = value
+            continue
+        name, _, param = key.partition(".")
+        if name not in DETECTOR_PARAMS or param not in DETECTOR_PARAMS[name]:
+            raise ValueError(f"Unknown sweep parameter: {key}")
+        detectors.setdefault(name, {})[param] = value
+    return detectors, trade
+
+
+def param_grid(space):
+    # Every combination of the listed values
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_params(space, samples, seed=None):
+    # Lists are sampled from, (low, high) pairs drawn uniformly (as ints when both are ints)
+    rng = random.Random(seed)
+    points = []
+    for _ in range(samples):
+        point = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    point[key] = rng.randint(low, high)
+                else:
+                    point[key] = rng.uniform(low, high)
+            else:
+                point[key] = rng.choice(values)
+        points.append(point)
+    return points
+
+
+def slope_windows(space):
+    # SLOPE_WINDOWS plus every (column, window) the space can ask for
+    windows = set(SLOPE_WINDOWS)
+    for key, values in space.items():
+        name, _, param = key.partition(".")
+        if param != "window" or name not in SLOPE_COLUMNS:
+            continue
+        if isinstance(values, tuple):
+            values = range(values[0], values[1] + 1)
+        windows.update((column, int(window)) for column in SLOPE_COLUMNS[name] for window in values)
+    return sorted(windows)
+
+
+_context = None
+
+
+def _init(df, windows, window, detectors):
+    global _context
+    features = compute_features(df, slope_windows=windows)
+    arrays, features = batch_inputs(df, features)
+    _context = {
+        "df": df,
+        "arrays": arrays,
+        "features": features,
+        "window": window,
+        "detectors": detectors,
+        "cache": OrderedDict(),
+    }
+
+
+def _signals(func, overrides):
+    # (bars, confidence, entry) where func fires, memoized per worker
+    cache = _context["cache"]
+    key = (func.__name__, tuple(sorted(overrides.items())))
+    hit = cache.get(key)
+    if hit is not None:
+        cache.move_to_end(key)
+        return hit
+    confidence, entry = batch_detect(func, _context["arrays"], _context["features"], _context["window"], overrides)
+    bars = np.flatnonzero(~np.isnan(confidence))
+    hit = cache[key] = (bars, confidence[bars].astype("float64").round(2), entry[bars])
+    while len(cache) > DETECTION_CACHE_SIZE:
+        cache.popitem(last=False)
+    return hit
+
+
+def score(returns_pct, outcome):
+    returns_pct = np.asarray(returns_pct)
+    if not len(returns_pct):
+        return {"trades": 0, "hit_rate": np.nan, "expectancy_pct": np.nan, "total_return_pct": 0.0,
+                "max_drawdown_pct": 0.0, "return_to_drawdown": np.nan}
+    drawdown = _max_drawdown(returns_pct)
+    total = (np.prod(1 + returns_pct / 100) - 1) * 100
+    return {
+        "trades": len(returns_pct),
+        "hit_rate": float((np.asarray(outcome) == "tp").mean() * 100),
+        "expectancy_pct": float(returns_pct.mean()),
+        "total_return_pct": float(total),
+        "max_drawdown_pct": drawdown,
+        "return_to_drawdown": float(total / drawdown) if drawdown else np.nan,
+    }
+
+
+def evaluate(point):
+    # Same trades simulate_trades(generate_signals(...)) gives for this point, scored
+    # over all patterns together, without building any DataFrames
+    detectors, trade = split_point(point)
+    arrays = _context["arrays"]
+    bars, entry, patterns = [], [], []
+    for position, func in enumerate(_context["detectors"]):
+        hit_bars, hit_confidence, hit_entry = _signals(func, detectors.get(detector_name(func), {}))
+        keep = hit_confidence >= trade["confidence_threshold"]
+        bars.append(hit_bars[keep])
+        entry.append(hit_entry[keep])
+        patterns.append(np.full(keep.sum(), position))
+    bars = np.concatenate(bars)
+    if not len(bars):
+        return {**point, **score([], [])}
+    # Bar order, detector order within a bar, as signal_rows lists them
+    order = np.argsort(bars, kind="stable")
+    bars, entry, patterns = bars[order], np.concatenate(entry)[order], np.concatenate(patterns)[order]
+    names = [BATCH_FUNCTIONS[func][0] for func in _context["detectors"]]
+    short = signal_shorts([names[position] for position in patterns], entry, arrays["close"][bars])
+    keep, _, _, _, exit_price, outcome = trade_arrays(
+        arrays["high"], arrays["low"], arrays["close"], bars, entry, patterns,
+        trade["sl_percent"], trade["tp_percent"], int(trade["max_hold"]), short=short,
+    )
+    return {**point, **score(trade_returns(entry[keep], exit_price[keep], short[keep]), outcome[keep])}
+
+
+def sweep(df, points, window=WINDOW, detectors=None, backend="process", workers=None, objective="expectancy_pct",
+          min_trades=1, chunksize=CHUNKSIZE):
+    # One row per point with its score columns, best objective first
+    detectors = detectors or pattern_functions
+    space = {}
+    for point in points:
+        for key, value in point.items():
+            space.setdefault(key, set()).add(value)
+    initargs = (df, slope_windows(space), window, detectors)
+    if backend == "thread":
+        # Threads share the one context, built here
+        _init(*initargs)
+        executor = make_executor(backend, workers)
+    else:
+        executor = make_executor(backend, workers, initializer=_init, initargs=initargs)
+    with executor:
+        rows = list(executor.map(evaluate, points, chunksize=chunksize))
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    results = results[results["trades"] >= min_trades]
+    return results.sort_values(objective, ascending=False, kind="stable", ignore_index=True)
+
+
+def load_history(symbol, interval, days, base_url=None, cache=None):
+    # The last `days` of closed candles, from the candle cache when it holds enough (topped
+    # up with the candles closed since), otherwise fetched (and appended to the cache)
+    bars = int(days * 86_400_000 // INTERVAL_MS[interval])
+    cache = cache or CandleCache(base_url=base_url)
+    cached = cache.load(symbol, interval, bars)
+    if cached is not None and len(cached) >= bars:
+        # fetch() only requests the candles after the last stored one and stores the closed ones
+        cache.fetch(symbol, interval, bars)
+        return cache.load(symbol, interval, bars)
+    now_ms = int(time.time() * 1000)
+    from binance_client import fetch_history
+
+    df = fetch_history(symbol, interval, now_ms - bars * INTERVAL_MS[interval], base_url=base_url)
+    df = _closed(df, interval, now_ms)
+    cache.append(symbol, interval, df)
+    return df.tail(bars)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep detector and trade parameters over cached history")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="30m")
+    parser.add_argument("--days", type=float, default=365, help="days of history to backtest over")
+    parser.add_argument("--space", help="JSON file: {\"<detector>.<param>\" or trade param: [values] or [low, high]}")
+    parser.add_argument("--method", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=1000, help="points drawn by --method random")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--objective", choices=OBJECTIVES, default="expectancy_pct")
+    parser.add_argument("--min-trades", type=int, default=20, help="drop points with fewer trades")
+    parser.add_argument("--backend", choices=["thread", "process"], default="process")
+    parser.add_argument("--workers", type=int, help="default: CPU count")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    parser.add_argument("--output", help="write every scored point to this CSV")
+    args = parser.parse_args(argv)
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    if args.method == "random":
+        # JSON has no tuples: two-number lists are ranges for random search
+        space = {key: tuple(values) if len(values) == 2 and all(isinstance(v, (int, float)) for v in values)
+                 else values for key, values in space.items()}
+        points = random_params(space, args.samples, args.seed)
+    else:
+        points = param_grid(space)
+
+    df = load_history(args.symbol, args.interval, args.days)
+    if df is None or df.empty:
+        print(f"No history for {args.symbol} {args.interval}")
+        return 1
+    started = time.perf_counter()
+    results = sweep(df, points, backend=args.backend, workers=args.workers, objective=args.objective,
+                    min_trades=args.min_trades)
+    print(f"Scored {len(points)} point(s) on {len(df)} bars in {time.perf_counter() - started:.1f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+    print(results.head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,152 @@
+import hashlib
+
 import numpy as np
 import pandas as pd
-import ta
+from numpy.lib.stride_tricks import sliding_window_view
+
+import metrics
+
+# (column, window) pairs the detectors fit a linear trend over
+SLOPE_WINDOWS = [("low", 20), ("close", 20), ("high", 30), ("low", 30)]
+
+# Tuning values of every detector, keyed by detector name (the function name without
+# "detect_"). Detectors take a dict overriding some of their own values; windows other
+# than the ones in SLOPE_WINDOWS get their trend slopes computed on the fly unless the
+# features were built for them (compute_features(df, slope_windows=...)).
+DETECTOR_PARAMS = {
+    "head_and_shoulders": {
+        "min_gap_hours": 6, "rsi_max": 60, "min_confidence": 85, "breakout": 1.005,
+        # Shoulders within this fraction of the head and a head above both; None skips
+        # the check, as the detector always has
+        "shoulder_tolerance": None,
+    },
+    "double_bottom": {
+        "min_gap_hours": 6, "low_tolerance": 0.05, "rsi_max": 40, "min_confidence": 80, "breakout": 1.005,
+    },
+    "ascending_triangle": {
+        "window": 20, "flatness": 0.01, "min_confidence": 80, "breakout": 1.005,
+    },
+    "triple_top": {
+        "min_gap_hours": 6, "peak_tolerance": 0.015, "breakout": 1.005,
+    },
+    "bullish_flag": {
+        "window": 20, "min_rise": 0.05, "max_flag_range": 0.03, "max_slope": 0.001, "breakout": 1.005,
+    },
+    "cup_and_handle": {
+        "window": 50, "rim_tolerance": 0.05, "min_depth": 0.05, "max_handle_range": 0.03, "breakout": 1.005,
+    },
+    "rising_wedge": {
+        "window": 30, "breakout": 1.005,
+    },
+    "symmetrical_triangle": {
+        "window": 30, "breakout": 1.005, "breakdown": 0.995,
+    },
+}
+
+
+def _rejected(gate):
+    # Detectors return through here when a gate fails, so metrics can say which one
+    if metrics.enabled:
+        metrics.reject(gate)
+    return None
+
+
+def detector_name(func):
+    return func.__name__[len("detect_"):]
+
+
+def detector_params(name, overrides=None):
+    params = DETECTOR_PARAMS[name]
+    if not overrides:
+        return params
+    unknown = set(overrides) - set(params)
+    if unknown:
+        raise ValueError(f"Unknown {name} parameter(s): {', '.join(sorted(unknown))}")
+    return {**params, **overrides}
+
+
+def _slope(df, features, column, window):
+    name = f"slope_{column}_{window}"
+    return features[name] if name in features else rolling_slope(df[column], window)
+
+
+def _swing_highs(series):
+    return (series.shift(1) < series) & (series.shift(-1) < series)
 
-def detect_head_and_shoulders(df):
+
+def _swing_lows(series):
+    return (series.shift(1) > series) & (series.shift(-1) > series)
+
+
+def rolling_slope(series, window):
+    # Same slope np.polyfit(range(window), y, 1)[0] gives for every trailing window,
+    # computed as one dot product against the centred x weights.
+    values = series.to_numpy(dtype="float64")
+    slopes = np.full(len(values), np.nan)
+    if len(values) >= window:
+        x = np.arange(window) - (window - 1) / 2
+        slopes[window - 1:] = sliding_window_view(values, window) @ (x / (x * x).sum())
+    return pd.Series(slopes, index=series.index)
+
+
+def compute_features(df, slope_windows=SLOPE_WINDOWS):
+    import ta  # only needed once indicators are computed; keeps detector imports light
+
+    close = df['close']
+    features = pd.DataFrame({
+        "peak_close": _swing_highs(close),
+        "trough_close": _swing_lows(close),
+        "peak_high": _swing_highs(df['high']),
+        "rsi": ta.momentum.rsi(close, window=14),
+        "macd_diff": ta.trend.macd_diff(close),
+    }, index=df.index)
+    for column, window in slope_windows:
+        features[f"slope_{column}_{window}"] = rolling_slope(df[column], window)
+    return features
+
+
+def detect_head_and_shoulders(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("head_and_shoulders", params)
     close = df['close']
-    window = 5
-    maxima = (close.shift(1) < close) & (close.shift(-1) < close)
-    peaks = close[maxima]
+    peaks = close[features['peak_close']]
     if len(peaks) < 3:
-        return None
+        return _rejected("peaks")
     last_three_peaks = peaks.tail(3)
     if len(last_three_peaks) < 3:
-        return None
+        return _rejected("peaks")
 
     left_shoulder_price, head_price, right_shoulder_price = last_three_peaks.values
     left_shoulder_idx, head_idx, right_shoulder_idx = last_three_peaks.index
 
     # Require reasonable time gap (6h min between peaks)
-    if (right_shoulder_idx - head_idx).total_seconds() < 6*3600 or (head_idx - left_shoulder_idx).total_seconds() < 6*3600:
-        return None
+    gap = p["min_gap_hours"] * 3600
+    if (right_shoulder_idx - head_idx).total_seconds() < gap or (head_idx - left_shoulder_idx).total_seconds() < gap:
+        return _rejected("time_gap")
 
     # Conditions
-    is_head_highest = head_price > left_shoulder_price and head_price > right_shoulder_price
-    shoulders_similar = abs(left_shoulder_price - right_shoulder_price) / head_price < 0.15
+    if p["shoulder_tolerance"] is not None:
+        is_head_highest = head_price > left_shoulder_price and head_price > right_shoulder_price
+        shoulders_similar = abs(left_shoulder_price - right_shoulder_price) / head_price < p["shoulder_tolerance"]
+        if not (is_head_highest and shoulders_similar):
+            return _rejected("shape")
 
     # RSI check
-    rsi = ta.momentum.rsi(close, window=14).iloc[-1]
-    if rsi > 60:
-        return None
+    rsi = features['rsi'].iloc[-1]
+    if rsi > p["rsi_max"]:
+        return _rejected("rsi")
 
     confidence = 80 + 10 * (1 - abs(left_shoulder_price - right_shoulder_price) / head_price)
-    if confidence < 85:
-        return None
+    if confidence < p["min_confidence"]:
+        return _rejected("confidence")
 
     neckline = min(left_shoulder_price, right_shoulder_price)
     entry = neckline
 
     # Price breakout confirmation
-    if close.iloc[-1] < entry * 1.005:
-        return None
+    if close.iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Head & Shoulders",
@@ -52,39 +160,40 @@ def detect_head_and_shoulders(df):
         }
     }
 
-def detect_double_bottom(df):
+def detect_double_bottom(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("double_bottom", params)
     close = df['close']
-    minima = (close.shift(1) > close) & (close.shift(-1) > close)
-    lows = close[minima]
+    lows = close[features['trough_close']]
 
     if len(lows) < 2:
-        return None
+        return _rejected("troughs")
 
     first_low_price, second_low_price = lows.tail(2).values
     first_low_idx, second_low_idx = lows.tail(2).index
 
     # Time gap at least 6h
-    if (second_low_idx - first_low_idx).total_seconds() < 6*3600:
-        return None
+    if (second_low_idx - first_low_idx).total_seconds() < p["min_gap_hours"] * 3600:
+        return _rejected("time_gap")
 
     peak_between = close.loc[first_low_idx:second_low_idx].max()
 
-    lows_close = abs(first_low_price - second_low_price) / max(first_low_price, second_low_price) < 0.05
+    lows_close = abs(first_low_price - second_low_price) / max(first_low_price, second_low_price) < p["low_tolerance"]
     if not lows_close or peak_between <= first_low_price:
-        return None
+        return _rejected("shape")
 
-    rsi_series = ta.momentum.rsi(close, window=14)
-    if rsi_series.loc[second_low_idx] > 40:
-        return None
+    if features['rsi'].loc[second_low_idx] > p["rsi_max"]:
+        return _rejected("rsi")
 
     confidence = 75 + 15 * (1 - abs(first_low_price - second_low_price) / max(first_low_price, second_low_price))
-    if confidence < 80:
-        return None
+    if confidence < p["min_confidence"]:
+        return _rejected("confidence")
 
     entry = peak_between
 
-    if close.iloc[-1] < entry * 1.005:
-        return None
+    if close.iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Double Bottom",
@@ -98,36 +207,39 @@ def detect_double_bottom(df):
         }
     }
 
-def detect_ascending_triangle(df):
+def detect_ascending_triangle(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("ascending_triangle", params)
     highs = df['high']
     lows = df['low']
 
-    window = 20
+    window = p["window"]
     recent_highs = highs.tail(window)
     recent_lows = lows.tail(window)
 
     resistance = recent_highs.max()
     resistance_idx = recent_highs.idxmax()
-    support_slope = np.polyfit(range(window), recent_lows.values, 1)[0]
+    support_slope = _slope(df, features, "low", window).iloc[-1]
 
-    resistance_flat = recent_highs.std() / resistance < 0.01
+    resistance_flat = recent_highs.std() / resistance < p["flatness"]
     support_rising = support_slope > 0
 
-    macd = ta.trend.macd_diff(df['close']).iloc[-1]
+    macd = features['macd_diff'].iloc[-1]
     if macd < 0:
-        return None
+        return _rejected("macd")
 
     if not (resistance_flat and support_rising):
-        return None
+        return _rejected("shape")
 
     confidence = 70 + 20 * (1 - recent_highs.std() / resistance)
-    if confidence < 80:
-        return None
+    if confidence < p["min_confidence"]:
+        return _rejected("confidence")
 
     entry = resistance
 
-    if df['close'].iloc[-1] < entry * 1.005:
-        return None
+    if df['close'].iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     # Support line points (first and last lows)
     support_start_idx = recent_lows.index[0]
@@ -147,28 +259,31 @@ def detect_ascending_triangle(df):
         }
     }
 
-def detect_triple_top(df):
+def detect_triple_top(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("triple_top", params)
     highs = df['high']
-    maxima = (highs.shift(1) < highs) & (highs.shift(-1) < highs)
-    peaks = highs[maxima]
+    peaks = highs[features['peak_high']]
 
     if len(peaks) < 3:
-        return None
+        return _rejected("peaks")
 
     last_three_peaks = peaks.tail(3)
     if len(last_three_peaks) < 3:
-        return None
+        return _rejected("peaks")
 
     p1, p2, p3 = last_three_peaks.values
     i1, i2, i3 = last_three_peaks.index
 
     # Peaks roughly equal within 1.5%
-    if max(p1, p2, p3) - min(p1, p2, p3) > 0.015 * max(p1, p2, p3):
-        return None
+    if max(p1, p2, p3) - min(p1, p2, p3) > p["peak_tolerance"] * max(p1, p2, p3):
+        return _rejected("shape")
 
     # Time gap check (6h minimum between peaks)
-    if (i2 - i1).total_seconds() < 6*3600 or (i3 - i2).total_seconds() < 6*3600:
-        return None
+    gap = p["min_gap_hours"] * 3600
+    if (i2 - i1).total_seconds() < gap or (i3 - i2).total_seconds() < gap:
+        return _rejected("time_gap")
 
     resistance = max(p1, p2, p3)
     entry = resistance
@@ -176,8 +291,8 @@ def detect_triple_top(df):
     confidence = 75 + 10 * (1 - ((max(p1,p2,p3) - min(p1,p2,p3)) / resistance))
 
     # Confirm breakout above resistance
-    if df['close'].iloc[-1] < entry * 1.005:
-        return None
+    if df['close'].iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Triple Top",
@@ -190,12 +305,15 @@ def detect_triple_top(df):
         }
     }
 
-def detect_bullish_flag(df):
+def detect_bullish_flag(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("bullish_flag", params)
     close = df['close']
-    window = 20
+    window = p["window"]
 
     if len(close) < window * 2:
-        return None
+        return _rejected("history")
 
     # Flagpole: sharp rise in first half of window
     flagpole = close[-window*2:-window]
@@ -203,25 +321,25 @@ def detect_bullish_flag(df):
 
     rise_pct = (flagpole.iloc[-1] - flagpole.iloc[0]) / flagpole.iloc[0]
 
-    if rise_pct < 0.05:  # require at least 5% rise
-        return None
+    if rise_pct < p["min_rise"]:  # require at least 5% rise
+        return _rejected("pole")
 
     # Flag: small consolidation, price mostly sideways or slight downward slope
     flag_range = flag.max() - flag.min()
-    if flag_range / flag.min() > 0.03:  # max 3% price range in flag
-        return None
+    if flag_range / flag.min() > p["max_flag_range"]:  # max 3% price range in flag
+        return _rejected("flag_range")
 
-    slope = np.polyfit(range(window), flag.values, 1)[0]
-    if slope > 0.001:  # slight downward or flat slope only
-        return None
+    slope = _slope(df, features, "close", window).iloc[-1]
+    if slope > p["max_slope"]:  # slight downward or flat slope only
+        return _rejected("slope")
 
     entry = flag.max()
 
     confidence = 80 + 10 * (rise_pct / 0.1)  # confidence scales with rise_pct
 
     # Confirm breakout above flag high
-    if df['close'].iloc[-1] < entry * 1.005:
-        return None
+    if df['close'].iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Bullish Flag",
@@ -234,12 +352,13 @@ def detect_bullish_flag(df):
         }
     }
 
-def detect_cup_and_handle(df):
+def detect_cup_and_handle(df, features=None, params=None):
+    p = detector_params("cup_and_handle", params)
     close = df['close']
-    window = 50  # analyze last 50 candles
+    window = p["window"]  # analyze last 50 candles
 
     if len(close) < window:
-        return None
+        return _rejected("history")
 
     data = close.tail(window)
 
@@ -253,36 +372,36 @@ def detect_cup_and_handle(df):
     right_max = smooth[cup_min_idx:]
 
     if len(left_max) < 5 or len(right_max) < 5:
-        return None
+        return _rejected("shape")
 
     left_max_val = left_max.max()
     right_max_val = right_max.max()
 
     # Cup shape: left and right max roughly equal and significantly above min
-    if abs(left_max_val - right_max_val) / max(left_max_val, right_max_val) > 0.05:
-        return None
+    if abs(left_max_val - right_max_val) / max(left_max_val, right_max_val) > p["rim_tolerance"]:
+        return _rejected("rim")
 
-    if (left_max_val - cup_min_val) / cup_min_val < 0.05:
-        return None
+    if (left_max_val - cup_min_val) / cup_min_val < p["min_depth"]:
+        return _rejected("depth")
 
     # Handle: small consolidation/pullback after cup right max
     handle_start_idx = right_max.idxmax()
     handle = data[handle_start_idx:]
 
     if len(handle) < 5:
-        return None
+        return _rejected("handle")
 
     handle_range = handle.max() - handle.min()
-    if handle_range / handle.min() > 0.03:
-        return None
+    if handle_range / handle.min() > p["max_handle_range"]:
+        return _rejected("handle_range")
 
     entry = right_max_val
 
     confidence = 75 + 15 * (1 - handle_range / handle.min())
 
     # Confirm breakout above entry
-    if df['close'].iloc[-1] < entry * 1.005:
-        return None
+    if df['close'].iloc[-1] < entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Cup and Handle",
@@ -296,31 +415,34 @@ def detect_cup_and_handle(df):
         }
     }
 
-def detect_rising_wedge(df):
+def detect_rising_wedge(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("rising_wedge", params)
     highs = df['high']
     lows = df['low']
-    window = 30
+    window = p["window"]
 
     if len(df) < window:
-        return None
+        return _rejected("history")
 
     recent_highs = highs.tail(window)
     recent_lows = lows.tail(window)
 
     # Fit lines to highs and lows
-    high_slope = np.polyfit(range(window), recent_highs.values, 1)[0]
-    low_slope = np.polyfit(range(window), recent_lows.values, 1)[0]
+    high_slope = _slope(df, features, "high", window).iloc[-1]
+    low_slope = _slope(df, features, "low", window).iloc[-1]
 
     # Check if both slopes positive (rising wedge)
     if high_slope <= 0 or low_slope <= 0:
-        return None
+        return _rejected("slope")
 
     # Check if lines are converging: distance between highs and lows decreases
     distance_start = recent_highs.iloc[0] - recent_lows.iloc[0]
     distance_end = recent_highs.iloc[-1] - recent_lows.iloc[-1]
 
     if distance_end >= distance_start:
-        return None
+        return _rejected("converging")
 
     # Entry point: breakout below lower trendline
     entry = recent_lows.min()
@@ -328,8 +450,8 @@ def detect_rising_wedge(df):
     confidence = 75 + 15 * (distance_start - distance_end) / distance_start
 
     # Confirm price currently below lower trendline? (Bearish breakout)
-    if df['close'].iloc[-1] > entry * 1.005:
-        return None
+    if df['close'].iloc[-1] > entry * p["breakout"]:
+        return _rejected("breakout")
 
     return {
         "name": "Rising Wedge",
@@ -343,31 +465,34 @@ def detect_rising_wedge(df):
         }
     }
 
-def detect_symmetrical_triangle(df):
+def detect_symmetrical_triangle(df, features=None, params=None):
+    if features is None:
+        features = compute_features(df)
+    p = detector_params("symmetrical_triangle", params)
     highs = df['high']
     lows = df['low']
-    window = 30
+    window = p["window"]
 
     if len(df) < window:
-        return None
+        return _rejected("history")
 
     recent_highs = highs.tail(window)
     recent_lows = lows.tail(window)
 
     # Slopes
-    high_slope = np.polyfit(range(window), recent_highs.values, 1)[0]
-    low_slope = np.polyfit(range(window), recent_lows.values, 1)[0]
+    high_slope = _slope(df, features, "high", window).iloc[-1]
+    low_slope = _slope(df, features, "low", window).iloc[-1]
 
     # Check high slope negative, low slope positive (triangle converging)
     if not (high_slope < 0 and low_slope > 0):
-        return None
+        return _rejected("slope")
 
     # Distance between lines decreasing
     dist_start = recent_highs.iloc[0] - recent_lows.iloc[0]
     dist_end = recent_highs.iloc[-1] - recent_lows.iloc[-1]
 
     if dist_end >= dist_start:
-        return None
+        return _rejected("converging")
 
     # Entry: breakout above high or below low (detect recent close)
     entry_high = recent_highs.max()
@@ -376,14 +501,14 @@ def detect_symmetrical_triangle(df):
 
     confidence = 75 + 15 * (dist_start - dist_end) / dist_start
 
-    if last_close > entry_high * 1.005:
+    if last_close > entry_high * p["breakout"]:
         entry = entry_high
         breakout_dir = "bullish"
-    elif last_close < entry_low * 0.995:
+    elif last_close < entry_low * p["breakdown"]:
         entry = entry_low
         breakout_dir = "bearish"
     else:
-        return None
+        return _rejected("breakout")
 
     return {
         "name": "Symmetrical Triangle",
@@ -410,16 +535,162 @@ pattern_functions = [
     detect_triple_top,
 ]
 
-def detect_patterns(df):
+# Highest confidence each detector can return, so detection can stop once none of the
+# detectors left could make the top k
+CONFIDENCE_CEILING = {
+    detect_head_and_shoulders: 90,
+    detect_double_bottom: 90,
+    detect_ascending_triangle: 90,
+    detect_cup_and_handle: 90,
+    detect_rising_wedge: 90,
+    detect_symmetrical_triangle: 90,
+    detect_bullish_flag: 95,
+    detect_triple_top: 85,
+}
+# Direction each pattern calls for; results with a "breakout" key use that instead
+PATTERN_BIAS = {
+    "Head & Shoulders": "bearish",
+    "Double Bottom": "bullish",
+    "Ascending Triangle": "bullish",
+    "Cup and Handle": "bullish",
+    "Rising Wedge": "bearish",
+    "Bullish Flag": "bullish",
+    "Triple Top": "bearish",
+}
+# Share of the shorter pattern's span two patterns must have in common to count as
+# describing the same bars
+OVERLAP_RATIO = 0.5
+
+
+def pattern_direction(pattern_info):
+    return pattern_info.get("breakout") or PATTERN_BIAS.get(pattern_info["name"])
+
+
+def trade_levels(entry, sl_percent, tp_percent, short=False):
+    # (sl, tp) around entry, scalars or arrays. Not rounded: a 2-decimal SL/TP collapses
+    # onto the entry for anything priced under a few dollars. Shorts put the stop above
+    # the entry and the target below.
+    side = np.where(short, -1.0, 1.0)
+    sl = entry * (1 - side * sl_percent / 100)
+    tp = entry * (1 + side * tp_percent / 100)
+    if np.ndim(sl) == 0:
+        return float(sl), float(tp)
+    return sl, tp
+
+
+def pattern_span(pattern_info):
+    times = [point[0] for point in pattern_info.get("key_points", {}).values() if isinstance(point, tuple)]
+    return (min(times), max(times)) if times else None
+
+
+def patterns_overlap(a, b, ratio=OVERLAP_RATIO):
+    span_a, span_b = pattern_span(a), pattern_span(b)
+    if span_a is None or span_b is None:
+        return False
+    start, end = max(span_a[0], span_b[0]), min(span_a[1], span_b[1])
+    if end < start:
+        return False
+    shorter = min(span_a[1] - span_a[0], span_b[1] - span_b[0])
+    return shorter.total_seconds() == 0 or (end - start) / shorter >= ratio
+
+
+def resolve_patterns(results, overlap=OVERLAP_RATIO):
+    # results ranked best first. A result overlapping a better one is folded into it:
+    # listed under "merged" when both point the same way, under "conflicts" when they
+    # contradict (e.g. a bearish Rising Wedge on the bars of a bullish Ascending Triangle).
+    resolved = []
+    for result in results:
+        for kept in resolved:
+            if patterns_overlap(kept, result, overlap):
+                same_way = pattern_direction(kept) == pattern_direction(result)
+                kept.setdefault("merged" if same_way else "conflicts", []).append(result["name"])
+                break
+        else:
+            resolved.append(dict(result))
+    return resolved
+
+
+def _ranked(results, mode, overlap):
+    # results: (position in pattern_functions, result) pairs
+    ranked = [result for _, result in sorted(results, key=lambda item: (-item[1]["confidence"], item[0]))]
+    return resolve_patterns(ranked, overlap) if mode == "all" else ranked
+
+
+def select_patterns(run, mode="best", top_k=None, confidence_threshold=None, overlap=OVERLAP_RATIO):
+    # Shared by detect_patterns and pattern_kernels.detect_patterns: run(i) calls the
+    # detector at position i of pattern_functions (or its kernel) and returns its result.
+    # mode="best": the highest-confidence detection or None (ties go to the detector listed
+    # first). mode="all": every detection at or above confidence_threshold, ranked, with
+    # overlapping ones resolved (see resolve_patterns), cut to top_k if given. Detectors
+    # run in order of CONFIDENCE_CEILING and stop as soon as the top k can no longer change.
+    if mode == "best":
+        top_k = 1
+    elif mode != "all":
+        raise ValueError(f"Unknown detect_patterns mode: {mode}")
+    threshold = confidence_threshold if confidence_threshold is not None else float("-inf")
+
+    order = sorted(range(len(pattern_functions)),
+                   key=lambda i: -CONFIDENCE_CEILING.get(pattern_functions[i], 100))
     results = []
-    for func in pattern_functions:
+    for position, i in enumerate(order):
         try:
-            result = func(df)
-            if result:
-                results.append(result)
+            result = run(i)
+            if result and result["confidence"] >= threshold:
+                results.append((i, result))
         except Exception as e:
-            print(f"Error in {func.__name__}: {e}")
-
-    if results:
-        return sorted(results, key=lambda x: x["confidence"], reverse=True)[0]
-    return None
+            print(f"Error in {pattern_functions[i].__name__}: {e}")
+            continue
+        if top_k is not None and len(results) >= top_k and position + 1 < len(order):
+            ranked = _ranked(results, mode, overlap)
+            ceiling = CONFIDENCE_CEILING.get(pattern_functions[order[position + 1]], 100)
+            if len(ranked) >= top_k and ceiling < ranked[top_k - 1]["confidence"]:
+                break
+
+    ranked = _ranked(results, mode, overlap)
+    if mode == "best":
+        return ranked[0] if ranked else None
+    return ranked[:top_k] if top_k is not None else ranked
+
+
+def detect_patterns(df, features=None, mode="best", top_k=None, confidence_threshold=None,
+                    overlap=OVERLAP_RATIO, params=None):
+    # See select_patterns for mode, top_k and confidence_threshold.
+    # params: {detector name: overrides of its DETECTOR_PARAMS}
+    # Indicators and swing points are shared by all detectors, so build them once
+    if features is None:
+        features = compute_features(df)
+
+    def run(i):
+        func = pattern_functions[i]
+        overrides = params.get(detector_name(func)) if params else None
+        if metrics.enabled:
+            return metrics.observe(func, df, features, overrides)
+        return func(df, features, overrides)
+
+    return select_patterns(run, mode, top_k, confidence_threshold, overlap)
+
+
+# Key points that mark swing points of the structure itself. The other key points of a
+# result (window starts and ends, the current bar) move with every new candle.
+ANCHOR_POINTS = {
+    "Head & Shoulders": ("Left Shoulder", "Head", "Right Shoulder"),
+    "Double Bottom": ("First Low", "Second Low"),
+    "Triple Top": ("Peak 1", "Peak 2", "Peak 3"),
+    "Cup and Handle": ("Cup Bottom",),
+}
+
+
+def signal_fingerprint(pattern_info, symbol=None, interval=None):
+    # Identifies a signal by its pattern and the structure that formed it, so reruns and
+    # later candles that keep re-detecting the same formation map to one key: the times
+    # of its swing-point anchors plus its entry level. Trendline patterns (wedges,
+    # triangles, flags) have no stable anchors and are keyed on their entry level alone,
+    # which stays put while the same high/low bounds the window.
+    key_points = pattern_info.get("key_points", {})
+    times = [
+        pd.Timestamp(key_points[name][0]).isoformat()
+        for name in ANCHOR_POINTS.get(pattern_info["name"], ())
+        if isinstance(key_points.get(name), tuple)
+    ]
+    parts = [symbol or "", interval or "", pattern_info["name"], f"{float(pattern_info['entry']):.8g}"] + times
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
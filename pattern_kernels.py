@@ -0,0 +1,466 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pattern_detector import OVERLAP_RATIO, SLOPE_WINDOWS, detector_name, detector_params, select_patterns
+
+# Array versions of the detectors in pattern_detector. Each takes contiguous
+# open_time (int64 epoch ms) and float64 open/high/low/close arrays, does all the
+# work on NumPy arrays and only builds Timestamps for the key points of a hit, so
+# they can run in tight scan/backtest loops. They read the same DETECTOR_PARAMS and
+# take the same overrides, and results match the pandas detectors (the cup's 5-bar
+# average can differ from rolling().mean() in the last ulp).
+
+
+def _timestamp(open_time):
+    return pd.Timestamp(int(open_time), unit="ms")
+
+
+def _ema(values, alpha):
+    # ewm(alpha=alpha, adjust=False) starting at the first non-NaN value
+    out = np.full(len(values), np.nan)
+    previous = None
+    for i, value in enumerate(values.tolist()):
+        if value != value:
+            continue
+        previous = value if previous is None else alpha * value + (1 - alpha) * previous
+        out[i] = previous
+    return out
+
+
+def rsi(close, window=14):
+    diff = np.diff(close, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    avg_up, avg_down = _ema(up, 1 / window), _ema(down, 1 / window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+    values[:window - 1] = np.nan
+    return values
+
+
+def macd_diff(close, fast=12, slow=26, signal=9):
+    ema_fast, ema_slow = _ema(close, 2 / (fast + 1)), _ema(close, 2 / (slow + 1))
+    ema_fast[:fast - 1] = np.nan
+    ema_slow[:slow - 1] = np.nan
+    macd = ema_fast - ema_slow
+    macd_signal = _ema(macd, 2 / (signal + 1))
+    macd_signal[:slow + signal - 2] = np.nan
+    return macd - macd_signal
+
+
+def swing_highs(values):
+    mask = np.zeros(len(values), dtype=bool)
+    mask[1:-1] = (values[:-2] < values[1:-1]) & (values[2:] < values[1:-1])
+    return mask
+
+
+def swing_lows(values):
+    mask = np.zeros(len(values), dtype=bool)
+    mask[1:-1] = (values[:-2] > values[1:-1]) & (values[2:] > values[1:-1])
+    return mask
+
+
+def tail_slope(values, window):
+    # np.polyfit(range(window), values[-window:], 1)[0]
+    if len(values) < window:
+        return np.nan
+    x = np.arange(window) - (window - 1) / 2
+    return float(values[-window:] @ (x / (x * x).sum()))
+
+
+def compute_features(high, low, close):
+    columns = {"low": low, "close": close, "high": high}
+    features = {
+        "peak_close": swing_highs(close),
+        "trough_close": swing_lows(close),
+        "peak_high": swing_highs(high),
+        "rsi": rsi(close),
+        "macd_diff": macd_diff(close),
+    }
+    # Detectors only read the slope at the last bar
+    for column, window in SLOPE_WINDOWS:
+        features[f"slope_{column}_{window}"] = tail_slope(columns[column], window)
+    return features
+
+
+def _features(features, high, low, close):
+    return compute_features(high, low, close) if features is None else features
+
+
+def _slope(features, values, column, window):
+    # The precomputed last-bar slope, or one fitted now for windows outside SLOPE_WINDOWS
+    name = f"slope_{column}_{window}"
+    return features[name] if features is not None and name in features else tail_slope(values, window)
+
+
+def _gap_ms(p):
+    return p["min_gap_hours"] * 3600 * 1000
+
+
+def detect_head_and_shoulders(open_time, open, high, low, close, features=None, params=None):
+    features = _features(features, high, low, close)
+    p = detector_params("head_and_shoulders", params)
+    peaks = np.flatnonzero(features["peak_close"])
+    if len(peaks) < 3:
+        return None
+    i1, i2, i3 = peaks[-3:]
+    left_shoulder_price, head_price, right_shoulder_price = close[i1], close[i2], close[i3]
+
+    gap = _gap_ms(p)
+    if open_time[i3] - open_time[i2] < gap or open_time[i2] - open_time[i1] < gap:
+        return None
+
+    if p["shoulder_tolerance"] is not None:
+        is_head_highest = head_price > left_shoulder_price and head_price > right_shoulder_price
+        shoulders_similar = abs(left_shoulder_price - right_shoulder_price) / head_price < p["shoulder_tolerance"]
+        if not (is_head_highest and shoulders_similar):
+            return None
+
+    if features["rsi"][-1] > p["rsi_max"]:
+        return None
+
+    confidence = 80 + 10 * (1 - abs(left_shoulder_price - right_shoulder_price) / head_price)
+    if confidence < p["min_confidence"]:
+        return None
+
+    entry = min(left_shoulder_price, right_shoulder_price)
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Head & Shoulders",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": {
+            "Left Shoulder": (_timestamp(open_time[i1]), left_shoulder_price),
+            "Head": (_timestamp(open_time[i2]), head_price),
+            "Right Shoulder": (_timestamp(open_time[i3]), right_shoulder_price),
+            "Neckline": entry
+        }
+    }
+
+
+def detect_double_bottom(open_time, open, high, low, close, features=None, params=None):
+    features = _features(features, high, low, close)
+    p = detector_params("double_bottom", params)
+    lows = np.flatnonzero(features["trough_close"])
+    if len(lows) < 2:
+        return None
+    i1, i2 = lows[-2:]
+    first_low_price, second_low_price = close[i1], close[i2]
+
+    if open_time[i2] - open_time[i1] < _gap_ms(p):
+        return None
+
+    between = close[i1:i2 + 1]
+    peak_between = between.max()
+
+    similarity = abs(first_low_price - second_low_price) / max(first_low_price, second_low_price)
+    if not similarity < p["low_tolerance"] or peak_between <= first_low_price:
+        return None
+
+    if features["rsi"][i2] > p["rsi_max"]:
+        return None
+
+    confidence = 75 + 15 * (1 - similarity)
+    if confidence < p["min_confidence"]:
+        return None
+
+    entry = peak_between
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Double Bottom",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": {
+            "First Low": (_timestamp(open_time[i1]), first_low_price),
+            "Second Low": (_timestamp(open_time[i2]), second_low_price),
+            "Resistance": (_timestamp(open_time[i1 + between.argmax()]), peak_between),
+            "Entry": (_timestamp(open_time[-1]), close[-1])
+        }
+    }
+
+
+def detect_ascending_triangle(open_time, open, high, low, close, features=None, params=None):
+    p = detector_params("ascending_triangle", params)
+    window = p["window"]
+    if len(close) < window:
+        return None
+    features = _features(features, high, low, close)
+
+    recent_highs = high[-window:]
+    resistance = recent_highs.max()
+    flatness = recent_highs.std(ddof=1) / resistance
+
+    if features["macd_diff"][-1] < 0:
+        return None
+
+    if not (flatness < p["flatness"] and _slope(features, low, "low", window) > 0):
+        return None
+
+    confidence = 70 + 20 * (1 - flatness)
+    if confidence < p["min_confidence"]:
+        return None
+
+    entry = resistance
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Ascending Triangle",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": {
+            "Resistance": (_timestamp(open_time[-window + recent_highs.argmax()]), resistance),
+            "Support Start": (_timestamp(open_time[-window]), low[-window]),
+            "Support End": (_timestamp(open_time[-1]), low[-1]),
+            "Entry": (_timestamp(open_time[-1]), close[-1])
+        }
+    }
+
+
+def detect_triple_top(open_time, open, high, low, close, features=None, params=None):
+    features = _features(features, high, low, close)
+    p = detector_params("triple_top", params)
+    peaks = np.flatnonzero(features["peak_high"])
+    if len(peaks) < 3:
+        return None
+    i1, i2, i3 = peaks[-3:]
+    p1, p2, p3 = high[i1], high[i2], high[i3]
+
+    if max(p1, p2, p3) - min(p1, p2, p3) > p["peak_tolerance"] * max(p1, p2, p3):
+        return None
+
+    gap = _gap_ms(p)
+    if open_time[i2] - open_time[i1] < gap or open_time[i3] - open_time[i2] < gap:
+        return None
+
+    resistance = max(p1, p2, p3)
+    entry = resistance
+    confidence = 75 + 10 * (1 - ((max(p1, p2, p3) - min(p1, p2, p3)) / resistance))
+
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Triple Top",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": {
+            "Peak 1": (_timestamp(open_time[i1]), p1),
+            "Peak 2": (_timestamp(open_time[i2]), p2),
+            "Peak 3": (_timestamp(open_time[i3]), p3),
+        }
+    }
+
+
+def detect_bullish_flag(open_time, open, high, low, close, features=None, params=None):
+    p = detector_params("bullish_flag", params)
+    window = p["window"]
+    if len(close) < window * 2:
+        return None
+
+    flagpole = close[-window * 2:-window]
+    flag = close[-window:]
+    rise_pct = (flagpole[-1] - flagpole[0]) / flagpole[0]
+    if rise_pct < p["min_rise"]:
+        return None
+
+    flag_min = flag.min()
+    if (flag.max() - flag_min) / flag_min > p["max_flag_range"]:
+        return None
+
+    if _slope(features, close, "close", window) > p["max_slope"]:
+        return None
+
+    entry = flag.max()
+    confidence = 80 + 10 * (rise_pct / 0.1)
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Bullish Flag",
+        "confidence": round(min(confidence, 95), 2),
+        "entry": entry,
+        "key_points": {
+            "Flagpole Start": (_timestamp(open_time[-window * 2]), flagpole[0]),
+            "Flagpole End": (_timestamp(open_time[-window - 1]), flagpole[-1]),
+            "Flag High": (_timestamp(open_time[-window + flag.argmax()]), entry),
+        }
+    }
+
+
+def detect_cup_and_handle(open_time, open, high, low, close, features=None, params=None):
+    p = detector_params("cup_and_handle", params)
+    window = p["window"]
+    if len(close) < window:
+        return None
+
+    data = close[-window:]
+    # 5-bar mean; the first 4 positions have no value, as with rolling(5)
+    smooth = np.full(window, np.nan)
+    smooth[4:] = sliding_window_view(data, 5).mean(axis=1)
+
+    bottom = 4 + smooth[4:].argmin()
+    cup_min_val = smooth[bottom]
+    left_max, right_max = smooth[:bottom + 1], smooth[bottom:]
+    if len(left_max) < 5 or len(right_max) < 5:
+        return None
+
+    left_peak = 4 + left_max[4:].argmax()
+    left_max_val, right_max_val = smooth[left_peak], right_max.max()
+
+    if abs(left_max_val - right_max_val) / max(left_max_val, right_max_val) > p["rim_tolerance"]:
+        return None
+
+    if (left_max_val - cup_min_val) / cup_min_val < p["min_depth"]:
+        return None
+
+    handle_start = bottom + right_max.argmax()
+    handle = data[handle_start:]
+    if len(handle) < 5:
+        return None
+
+    handle_min = handle.min()
+    handle_range = handle.max() - handle_min
+    if handle_range / handle_min > p["max_handle_range"]:
+        return None
+
+    entry = right_max_val
+    confidence = 75 + 15 * (1 - handle_range / handle_min)
+    if close[-1] < entry * p["breakout"]:
+        return None
+
+    times = open_time[-window:]
+    return {
+        "name": "Cup and Handle",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": {
+            "Cup Left Max": (_timestamp(times[left_peak]), left_max_val),
+            "Cup Bottom": (_timestamp(times[bottom]), cup_min_val),
+            "Cup Right Max": (_timestamp(times[handle_start]), right_max_val),
+            "Handle End": (_timestamp(times[-1]), data[-1])
+        }
+    }
+
+
+def _converging_lines(high, low, features, window):
+    # Shared by the rising wedge and symmetrical triangle: trend slopes over the window
+    # and the high-low distance at both ends of it
+    if len(high) < window:
+        return None
+    high_slope, low_slope = _slope(features, high, "high", window), _slope(features, low, "low", window)
+    return high_slope, low_slope, high[-window] - low[-window], high[-1] - low[-1]
+
+
+def _line_key_points(open_time, high, low, window):
+    return {
+        "High Start": (_timestamp(open_time[-window]), high[-window]),
+        "High End": (_timestamp(open_time[-1]), high[-1]),
+        "Low Start": (_timestamp(open_time[-window]), low[-window]),
+        "Low End": (_timestamp(open_time[-1]), low[-1]),
+    }
+
+
+def detect_rising_wedge(open_time, open, high, low, close, features=None, params=None):
+    p = detector_params("rising_wedge", params)
+    window = p["window"]
+    lines = _converging_lines(high, low, features, window)
+    if lines is None:
+        return None
+    high_slope, low_slope, distance_start, distance_end = lines
+
+    if high_slope <= 0 or low_slope <= 0:
+        return None
+
+    if distance_end >= distance_start:
+        return None
+
+    entry = low[-window:].min()
+    confidence = 75 + 15 * (distance_start - distance_end) / distance_start
+
+    if close[-1] > entry * p["breakout"]:
+        return None
+
+    return {
+        "name": "Rising Wedge",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "key_points": _line_key_points(open_time, high, low, window)
+    }
+
+
+def detect_symmetrical_triangle(open_time, open, high, low, close, features=None, params=None):
+    p = detector_params("symmetrical_triangle", params)
+    window = p["window"]
+    lines = _converging_lines(high, low, features, window)
+    if lines is None:
+        return None
+    high_slope, low_slope, dist_start, dist_end = lines
+
+    if not (high_slope < 0 and low_slope > 0):
+        return None
+
+    if dist_end >= dist_start:
+        return None
+
+    entry_high = high[-window:].max()
+    entry_low = low[-window:].min()
+    last_close = close[-1]
+    confidence = 75 + 15 * (dist_start - dist_end) / dist_start
+
+    if last_close > entry_high * p["breakout"]:
+        entry = entry_high
+        breakout_dir = "bullish"
+    elif last_close < entry_low * p["breakdown"]:
+        entry = entry_low
+        breakout_dir = "bearish"
+    else:
+        return None
+
+    return {
+        "name": "Symmetrical Triangle",
+        "confidence": round(confidence, 2),
+        "entry": entry,
+        "breakout": breakout_dir,
+        "key_points": _line_key_points(open_time, high, low, window)
+    }
+
+
+# Same order as pattern_detector.pattern_functions
+kernel_functions = [
+    detect_head_and_shoulders,
+    detect_double_bottom,
+    detect_ascending_triangle,
+    detect_cup_and_handle,
+    detect_rising_wedge,
+    detect_symmetrical_triangle,
+    detect_bullish_flag,
+    detect_triple_top,
+]
+
+
+def frame_arrays(df):
+    # Contiguous (open_time, open, high, low, close) arrays for a fetch_ohlc_data frame
+    open_time = np.asarray(df.index, dtype="datetime64[ms]").astype("int64")
+    return (open_time,) + tuple(
+        np.ascontiguousarray(df[column].to_numpy(dtype="float64"))
+        for column in ("open", "high", "low", "close")
+    )
+
+
+def detect_patterns(open_time, open, high, low, close, features=None, mode="best", top_k=None,
+                    confidence_threshold=None, overlap=OVERLAP_RATIO, params=None):
+    # Same modes and params as pattern_detector.detect_patterns (see select_patterns)
+    features = _features(features, high, low, close)
+
+    def run(i):
+        kernel = kernel_functions[i]
+        overrides = params.get(detector_name(kernel)) if params else None
+        return kernel(open_time, open, high, low, close, features, overrides)
+
+    return select_patterns(run, mode, top_k, confidence_threshold, overlap)
@@ -0,0 +1,73 @@
+import json
+import os
+import queue
+import threading
+import time
+
+# Attempts per HTTP batch before publish() gives up
+HTTP_RETRIES = 3
+HTTP_TIMEOUT = 10
+
+
+# Publishers take a list of signal dicts (see alerts.signal_payload) per call.
+class QueuePublisher:
+    # In-process hand-off; anything with put() works (queue.Queue, multiprocessing.Queue)
+    def __init__(self, target=None):
+        self.queue = target if target is not None else queue.Queue()
+
+    def publish(self, signals):
+        for signal in signals:
+            self.queue.put(signal)
+
+
+class FilePublisher:
+    # JSON lines, one signal per line; "-" writes to stdout
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def publish(self, signals):
+        lines = "".join(json.dumps(signal) + "\n" for signal in signals)
+        if self.path == "-":
+            print(lines, end="", flush=True)
+            return
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class HttpPublisher:
+    # POSTs each batch as a JSON array; retried with backoff, then the last error is raised
+    def __init__(self, url, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self._session = None
+
+    def publish(self, signals):
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+        for attempt in range(self.retries):
+            try:
+                response = self._session.post(self.url, json=signals, timeout=self.timeout)
+                response.raise_for_status()
+                return
+            except requests.RequestException as e:
+                print(f"Error publishing {len(signals)} signal(s) to {self.url}: {e}")
+                if attempt + 1 == self.retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+
+def make_publisher(spec):
+    # "queue", "file:<path>" (or a bare path, "-" for stdout), "http(s)://..."
+    if spec == "queue":
+        return QueuePublisher()
+    if spec.startswith(("http://", "https://")):
+        return HttpPublisher(spec)
+    if spec.startswith("file:"):
+        spec = spec[len("file:"):]
+    return FilePublisher(spec)
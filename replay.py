@@ -0,0 +1,191 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from binance_stub import KlineStubServer
+from data_fetcher import INTERVAL_MS, fetch_ohlc_data
+from logger import CsvBackend, TradeLogger
+from pattern_detector import detect_patterns, pattern_direction, trade_levels
+from synthetic import TOLERANCE, pattern_schedule, score_detections, synthetic_ohlc
+
+SPEED = 1000.0
+STAGES = ["fetch", "detect", "log", "plot"]
+
+
+# Simulated time running `speed` times faster than the wall clock from start_ms. With
+# speed=None it never sleeps: time jumps straight to whatever sleep_until asks for.
+class ReplayClock:
+    def __init__(self, start_ms, speed=SPEED):
+        self.start_ms = start_ms
+        self.speed = speed
+        self._started = time.monotonic()
+        self._now = start_ms
+
+    def now_ms(self):
+        if not self.speed:
+            return self._now
+        return self.start_ms + (time.monotonic() - self._started) * 1000 * self.speed
+
+    def sleep_until(self, time_ms):
+        if not self.speed:
+            self._now = max(self._now, time_ms)
+            return
+        delay = (time_ms - self.now_ms()) / 1000 / self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+
+# What KlineStubServer serves from: each (symbol, interval) frame cut down to the candles
+# that have closed by the replay clock, so fetches see the history unfold candle by candle
+class ClockedFrames:
+    def __init__(self, frames, clock):
+        self.frames = frames
+        self.clock = clock
+        self._close_ms = {
+            key: df.index.as_unit("ms").asi8 + INTERVAL_MS[key[1]] for key, df in frames.items()
+        }
+
+    def get(self, key):
+        df = self.frames.get(key)
+        if df is None:
+            return None
+        return df.iloc[:int(np.searchsorted(self._close_ms[key], self.clock.now_ms(), side="right"))]
+
+
+# Replays candle frames through the same fetch -> detect -> log -> plot path the app runs,
+# against a local kline server on an accelerated clock. Every pair is processed right
+# after each of its candles closes (in simulated time); a tick is late when the work
+# takes longer than the candle lasts in wall-clock time.
+class ReplayHarness:
+    def __init__(self, frames, speed=SPEED, limit=100, sl_percent=1.5, tp_percent=3.0, log_path=None,
+                 plot=True, fetch=fetch_ohlc_data, detect=detect_patterns):
+        # frames: {(symbol, interval): DataFrame} in fetch_ohlc_data's layout
+        self.frames = frames
+        self.speed = speed
+        self.limit = limit
+        self.sl_percent = sl_percent
+        self.tp_percent = tp_percent
+        self.log_path = log_path or os.path.join(tempfile.mkdtemp(prefix="replay-"), "trade_log.csv")
+        self.plot = plot
+        self.fetch = fetch
+        self.detect = detect
+        self.detections = []
+
+    def _schedule(self, bars):
+        # (close time, symbol, interval, bar) for every candle after the first `limit`
+        events = []
+        for (symbol, interval), df in self.frames.items():
+            open_ms = df.index.as_unit("ms").asi8
+            last = len(df) if bars is None else min(len(df), self.limit + bars)
+            events += [(int(open_ms[bar]) + INTERVAL_MS[interval], symbol, interval, bar)
+                       for bar in range(self.limit - 1, last)]
+        return sorted(events)
+
+    def run(self, bars=None):
+        # Replays up to `bars` candles per pair; returns timing and detection stats
+        events = self._schedule(bars)
+        if not events:
+            return None
+        if self.plot:
+            from chart_plotter import plot_chart
+
+        clock = ReplayClock(events[0][0], self.speed)
+        logger = TradeLogger(CsvBackend(self.log_path))
+        timings = {stage: [] for stage in STAGES}
+        latencies, late, logged = [], 0, 0
+        self.detections = []
+        started = time.perf_counter()
+        with KlineStubServer(ClockedFrames(self.frames, clock)) as server:
+            for close_ms, symbol, interval, bar in events:
+                clock.sleep_until(close_ms)
+                tick = time.perf_counter()
+                df = self.fetch(symbol, interval, self.limit, base_url=server.url)
+                fetched = time.perf_counter()
+                timings["fetch"].append(fetched - tick)
+                if df is None or df.empty:
+                    continue
+                pattern_info = self.detect(df)
+                detected = time.perf_counter()
+                timings["detect"].append(detected - fetched)
+                if pattern_info:
+                    self.detections.append((symbol, interval, bar, pattern_info["name"]))
+                    short = pattern_direction(pattern_info) == "bearish"
+                    sl, tp = trade_levels(pattern_info["entry"], self.sl_percent, self.tp_percent, short=short)
+                    logged += logger.log(pattern_info, sl, tp, symbol, interval)
+                    timings["log"].append(time.perf_counter() - detected)
+                    if self.plot:
+                        plotted = time.perf_counter()
+                        plot_chart(df, pattern_info, sl, tp, symbol=symbol, interval=interval)
+                        timings["plot"].append(time.perf_counter() - plotted)
+                elapsed = time.perf_counter() - tick
+                latencies.append(elapsed)
+                if self.speed and elapsed > INTERVAL_MS[interval] / 1000 / self.speed:
+                    late += 1
+        logger.flush()
+        wall = time.perf_counter() - started
+        return {
+            "ticks": len(latencies),
+            "hits": len(self.detections),
+            "logged": logged,
+            "late": late,
+            "wall_s": wall,
+            "simulated_s": (events[-1][0] - events[0][0]) / 1000,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+            "p95_ms": float(np.percentile(latencies, 95)) * 1000 if latencies else None,
+            "stages_ms": {stage: statistics.median(values) * 1000 for stage, values in timings.items() if values},
+            "log_path": self.log_path,
+        }
+
+    def accuracy(self, planted, tolerance=TOLERANCE):
+        # planted: {(symbol, interval): synthetic_ohlc's planted frame}; scored over all pairs
+        rows = []
+        for key, expected in planted.items():
+            detections = [(bar, name) for symbol, interval, bar, name in self.detections if (symbol, interval) == key]
+            rows.append(score_detections(expected, detections, tolerance))
+        table = pd.concat(rows, ignore_index=True).groupby("pattern", as_index=False).sum()
+        table["recall"] = table["found"] / table["planted"].where(table["planted"] > 0) * 100
+        return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic candles with planted patterns at accelerated speed")
+    parser.add_argument("--pairs", type=int, default=1, help="synthetic symbols to replay side by side")
+    parser.add_argument("--interval", default="30m")
+    parser.add_argument("--bars", type=int, default=500, help="candles replayed per pair")
+    parser.add_argument("--speed", type=float, default=SPEED,
+                        help="simulated seconds per wall-clock second; 0 replays as fast as possible")
+    parser.add_argument("--strength", type=float, default=1.0, help="1.0 plants clean patterns, lower adds noise")
+    parser.add_argument("--spacing", type=int, default=150, help="bars between planted patterns")
+    parser.add_argument("--limit", type=int, default=100, help="candles per detection window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-plot", action="store_true", help="skip building the chart on hits")
+    parser.add_argument("--log", help="trade log to write (default: a temporary file)")
+    args = parser.parse_args(argv)
+
+    total = args.bars + args.limit
+    frames, planted = {}, {}
+    for pair in range(args.pairs):
+        key = (f"SYN{pair}USDT", args.interval)
+        schedule = pattern_schedule(total, spacing=args.spacing, strength=args.strength, interval=args.interval,
+                                    first=args.limit + args.spacing // 2)
+        frames[key], planted[key] = synthetic_ohlc(total, args.interval, seed=args.seed + pair, patterns=schedule)
+
+    harness = ReplayHarness(frames, speed=args.speed, limit=args.limit, log_path=args.log, plot=not args.no_plot)
+    report = harness.run()
+    print(f"Replayed {report['ticks']} candle(s) ({report['simulated_s'] / 3600:.1f}h simulated) "
+          f"in {report['wall_s']:.1f}s: p50 {report['p50_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms, "
+          f"{report['late']} late at {f'{args.speed:g}x' if args.speed else 'full speed'}")
+    print("Median per stage: " + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in report["stages_ms"].items()))
+    print(f"{report['hits']} hit(s), {report['logged']} new logged to {report['log_path']}")
+    print(harness.accuracy(planted).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+
+import pandas as pd
+
+import metrics
+from data_fetcher import INTERVAL_MS
+from pattern_detector import detect_patterns
+
+RESULT_COLUMNS = ["symbol", "interval", "pattern", "confidence", "entry", "close", "time"]
+
+# Concurrent kline requests; fetching runs on the event loop regardless of the detect backend
+FETCH_WORKERS = 16
+
+
+def make_executor(backend="process", workers=None, initializer=None, initargs=()):
+    workers = workers or os.cpu_count() or 1
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    if backend == "thread":
+        return ThreadPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    raise ValueError(f"Unknown scan backend: {backend}")
+
+
+def _hit_row(symbol, interval, df, pattern_info):
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "pattern": pattern_info["name"],
+        "confidence": pattern_info["confidence"],
+        "entry": pattern_info["entry"],
+        "close": df["close"].iloc[-1],
+        "time": df.index[-1],
+    }
+
+
+def _detect_with_metrics(detect, df):
+    # Process-pool task: detection plus the metrics it recorded in the worker, which the
+    # parent merges, since a worker's registry is never seen otherwise
+    metrics.enable()
+    metrics.reset()
+    return detect(df), metrics.snapshot()
+
+
+def history_limit(interval, limit, multi_timeframe=False):
+    # Candles fetched per pair: the detection window, or with multi_timeframe enough to
+    # build limit candles of every higher interval (up to one request's worth)
+    if not multi_timeframe:
+        return limit
+    from binance_client import MAX_LIMIT
+    from multi_timeframe import history_bars
+
+    return min(history_bars(interval, max_bars=limit), MAX_LIMIT)
+
+
+def _detector(interval, limit, multi_timeframe):
+    # Picklable, so the process backend can run it
+    if not multi_timeframe:
+        return detect_patterns
+    from multi_timeframe import detect_multi_timeframe
+
+    return partial(detect_multi_timeframe, base_interval=interval, max_bars=limit)
+
+
+async def _fetch_and_submit(pairs, limit, base_url, fetch_workers, executor, closed_only=False, store=None,
+                            multi_timeframe=False):
+    # aiohttp is imported here rather than with the module, so backtests and sweeps that
+    # only need make_executor never load it
+    from binance_client import AsyncKlineClient
+
+    async with AsyncKlineClient(base_url, max_concurrency=fetch_workers) as client:
+        async def fetch(symbol, interval):
+            fetch_limit = history_limit(interval, limit, multi_timeframe)
+            try:
+                if store is not None:
+                    return (symbol, interval), await store.fetch_async(client, symbol, interval, fetch_limit)
+                return (symbol, interval), await client.fetch_ohlc(symbol, interval, fetch_limit)
+            except Exception as e:
+                print(f"Error fetching Binance data for {symbol} {interval}: {e}")
+                return (symbol, interval), None
+
+        detections = {}
+        for next_done in asyncio.as_completed([fetch(*pair) for pair in pairs]):
+            pair, df = await next_done
+            if df is not None and closed_only:
+                # Drop the still-forming candle so detection only sees settled bars
+                now_ms = int(time.time() * 1000)
+                df = df[df.index.as_unit("ms").asi8 + INTERVAL_MS[pair[1]] <= now_ms]
+            if df is None or df.empty:
+                continue
+            detect = _detector(pair[1], limit, multi_timeframe)
+            worker_metrics = metrics.enabled and isinstance(executor, ProcessPoolExecutor)
+            if worker_metrics:
+                future = executor.submit(_detect_with_metrics, detect, df)
+            else:
+                future = executor.submit(detect, df)
+            detections[future] = (pair, df, worker_metrics)
+        return detections
+
+
+def scan_hits(pairs, limit=100, base_url=None, backend="process", workers=None,
+              fetch_workers=FETCH_WORKERS, executor=None, closed_only=False, store=None, multi_timeframe=False):
+    # pairs: iterable of (symbol, interval). Detection for a pair starts as soon as
+    # its candles arrive, so fetch and detect overlap instead of running in phases.
+    # Returns (symbol, interval, df, pattern_info) for every pair where a pattern fired.
+    # With a candle_buffer.CandleStore, candles are kept between scans and only the
+    # newest bars are requested. With multi_timeframe, enough history is fetched to build
+    # the higher intervals and detections are confirmed against them (see multi_timeframe).
+    pairs = [tuple(pair) for pair in pairs]
+    owns_executor = executor is None
+    if owns_executor:
+        executor = make_executor(backend, workers)
+
+    hits = []
+    try:
+        detections = asyncio.run(_fetch_and_submit(pairs, limit, base_url, fetch_workers, executor, closed_only, store,
+                                                   multi_timeframe))
+        for future in as_completed(detections):
+            (symbol, interval), df, worker_metrics = detections[future]
+            try:
+                pattern_info = future.result()
+            except Exception as e:
+                print(f"Error scanning {symbol} {interval}: {e}")
+                continue
+            if worker_metrics:
+                pattern_info, recorded = pattern_info
+                metrics.merge(recorded)
+            if pattern_info:
+                hits.append((symbol, interval, df, pattern_info))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    return hits
+
+
+def scan(pairs, limit=100, base_url=None, backend="process", workers=None,
+         fetch_workers=FETCH_WORKERS, executor=None):
+    rows = [_hit_row(symbol, interval, df, pattern_info)
+            for symbol, interval, df, pattern_info in scan_hits(pairs, limit, base_url, backend, workers,
+                                                                fetch_workers, executor)]
+    hits = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return hits.sort_values("confidence", ascending=False, ignore_index=True)
@@ -0,0 +1,162 @@
+import argparse
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import metrics
+from alerts import COOLDOWN, AlertManager, signal_payload
+from candle_buffer import CandleStore
+from config import MULTI_TIMEFRAME
+from data_fetcher import INTERVAL_MS, interval_open_ms
+from logger import log_trade
+from pattern_detector import pattern_direction, trade_levels
+from publishers import make_publisher
+from scanner import FETCH_WORKERS, history_limit, make_executor, scan_hits
+
+# Seconds after a candle close before scanning, so Binance has published the closed bar
+CLOSE_DELAY = 2.0
+
+
+def next_close_ms(interval, now_ms):
+    return interval_open_ms(now_ms, interval) + INTERVAL_MS[interval]
+
+
+def parse_watchlist(text):
+    # "BTCUSDT:30m,ETHUSDT:1h" or one "SYMBOL:INTERVAL" per line
+    pairs = []
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item or item.startswith("#"):
+            continue
+        symbol, _, interval = item.partition(":")
+        interval = interval or "30m"
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unknown interval in watchlist: {item}")
+        pairs.append((symbol.upper(), interval))
+    return pairs
+
+
+# Runs the fetch -> detect -> log pipeline for a watchlist on every candle close, with
+# no UI attached. Pairs are grouped by interval and each group is scanned CLOSE_DELAY
+# seconds after its candles close, on closed bars only. Hits are logged through
+# log_trade (which dedupes repeats) and handed to an AlertManager, which drops repeats
+# and pairs still in cooldown and delivers the rest to every publisher in the background.
+class ScannerService:
+    def __init__(self, watchlist, publishers=(), limit=100, sl_percent=1.5, tp_percent=3.0,
+                 backend="thread", workers=None, fetch_workers=FETCH_WORKERS, close_delay=CLOSE_DELAY,
+                 base_url=None, metrics_path=None, cooldown=COOLDOWN, multi_timeframe=False):
+        self.groups = defaultdict(list)
+        for symbol, interval in watchlist:
+            self.groups[interval].append((symbol, interval))
+        self.alerts = AlertManager(publishers, cooldown=cooldown)
+        self.limit = limit
+        self.sl_percent = sl_percent
+        self.tp_percent = tp_percent
+        self.backend = backend
+        self.workers = workers
+        self.fetch_workers = fetch_workers
+        self.close_delay = close_delay
+        self.base_url = base_url
+        self.metrics_path = metrics_path
+        self.multi_timeframe = multi_timeframe
+        # Candles stay in per-pair ring buffers between scans; each cycle only tops them up
+        self.store = CandleStore(capacity=max(
+            [limit] + [history_limit(interval, limit, multi_timeframe) for interval in self.groups]))
+        self._stop = threading.Event()
+
+    def scan(self, pairs, executor=None):
+        started = time.perf_counter()
+        hits = scan_hits(pairs, self.limit, self.base_url, self.backend, self.workers,
+                         self.fetch_workers, executor, closed_only=True, store=self.store,
+                         multi_timeframe=self.multi_timeframe)
+        signals = []
+        logged = 0
+        for symbol, interval, df, pattern_info in hits:
+            short = pattern_direction(pattern_info) == "bearish"
+            sl, tp = trade_levels(pattern_info["entry"], self.sl_percent, self.tp_percent, short=short)
+            logged += log_trade(pattern_info, sl, tp, symbol, interval)
+            signals.append(signal_payload(symbol, interval, df, pattern_info, sl, tp))
+        # Never blocks: slow publishers only back up their own queues
+        signals = self.alerts.submit(signals)
+        if self.metrics_path:
+            metrics.write_prometheus(self.metrics_path)
+        print(f"Scanned {len(pairs)} pair(s) in {time.perf_counter() - started:.2f}s: "
+              f"{len(hits)} hit(s), {logged} new, {len(signals)} alerted")
+        return signals
+
+    def run(self, once=False):
+        # The executor lives for the whole run so workers (and their imports) are reused
+        with make_executor(self.backend, self.workers) as executor:
+            try:
+                if once:
+                    return self.scan([pair for pairs in self.groups.values() for pair in pairs], executor)
+                self._loop(executor)
+            finally:
+                self.alerts.close()
+
+    def _loop(self, executor):
+        while not self._stop.is_set():
+            now_ms = int(time.time() * 1000)
+            closes = {interval: next_close_ms(interval, now_ms) for interval in self.groups}
+            due_ms = min(closes.values())
+            if self._stop.wait(max(0.0, (due_ms - now_ms) / 1000 + self.close_delay)):
+                break
+            pairs = [pair for interval, close in closes.items() if close == due_ms
+                     for pair in self.groups[interval]]
+            try:
+                self.scan(pairs, executor)
+            except Exception as e:
+                print(f"Error in scan cycle: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a watchlist for chart patterns on every candle close")
+    parser.add_argument("--watchlist", default="BTCUSDT:30m", help="SYMBOL:INTERVAL pairs, comma-separated")
+    parser.add_argument("--watchlist-file", help="file with one SYMBOL:INTERVAL per line")
+    parser.add_argument("--publish", action="append", default=[],
+                        help="file:<path>, - (stdout) or http(s)://url; repeatable")
+    parser.add_argument("--limit", type=int, default=100, help="candles per detection window")
+    parser.add_argument("--sl", type=float, default=1.5, help="stop loss %%")
+    parser.add_argument("--tp", type=float, default=3.0, help="take profit %%")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, help="detection workers (default: CPU count)")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS, help="concurrent kline requests")
+    parser.add_argument("--delay", type=float, default=CLOSE_DELAY, help="seconds to wait after a candle close")
+    parser.add_argument("--cooldown", type=float, default=COOLDOWN,
+                        help="seconds between alerts for the same pair")
+    parser.add_argument("--base-url", help="Binance REST API base URL (default: BINANCE_API_URL)")
+    parser.add_argument("--metrics", help="write Prometheus detector metrics to this file after each scan")
+    parser.add_argument("--multi-timeframe", action=argparse.BooleanOptionalAction, default=MULTI_TIMEFRAME,
+                        help="confirm detections against 1h/4h candles built from each pair's own "
+                             "(default: MULTI_TIMEFRAME)")
+    parser.add_argument("--once", action="store_true", help="scan once and exit")
+    args = parser.parse_args(argv)
+
+    watchlist = args.watchlist
+    if args.watchlist_file:
+        with open(args.watchlist_file) as f:
+            watchlist = f.read()
+    if args.metrics:
+        metrics.enable()
+
+    service = ScannerService(
+        parse_watchlist(watchlist),
+        [make_publisher(spec) for spec in args.publish],
+        limit=args.limit, sl_percent=args.sl, tp_percent=args.tp, backend=args.backend,
+        workers=args.workers, fetch_workers=args.fetch_workers, close_delay=args.delay,
+        base_url=args.base_url, metrics_path=args.metrics, cooldown=args.cooldown,
+        multi_timeframe=args.multi_timeframe,
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: service.stop())
+    service.run(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from backtester import MAX_HOLD, resolve_exits, trade_returns
+from candle_cache import CandleCache
+from logger import HEADERS as LOG_COLUMNS, SEEN_LIMIT
+
+SIGNAL_COLUMNS = ["time", "symbol", "interval", "pattern", "confidence", "entry", "sl", "tp", "fingerprint",
+                  "outcome", "exit_time", "exit_price", "return_pct"]
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS signals ("
+    " id INTEGER PRIMARY KEY,"
+    " time_ms INTEGER NOT NULL, symbol TEXT, interval TEXT, pattern TEXT,"
+    " confidence REAL, entry REAL, sl REAL, tp REAL, fingerprint TEXT UNIQUE,"
+    " outcome TEXT, exit_ms INTEGER, exit_price REAL, return_pct REAL)",
+    "CREATE INDEX IF NOT EXISTS signals_time ON signals (time_ms)",
+    # Covering indexes, so filtered range queries and aggregates never touch the table
+    "CREATE INDEX IF NOT EXISTS signals_pattern_time ON signals"
+    " (pattern, time_ms, symbol, confidence, outcome, return_pct)",
+    "CREATE INDEX IF NOT EXISTS signals_symbol_time ON signals"
+    " (symbol, time_ms, pattern, confidence, outcome, return_pct)",
+    "CREATE INDEX IF NOT EXISTS signals_pending ON signals (symbol, interval, time_ms) WHERE outcome IS NULL",
+    # Per (day, symbol, pattern) totals kept in step by triggers, so aggregates over the
+    # whole history read a few thousand rollup rows instead of every signal
+    "CREATE TABLE IF NOT EXISTS signal_daily ("
+    " day INTEGER, symbol TEXT, pattern TEXT, signals INTEGER, confidence_sum REAL,"
+    " tp INTEGER DEFAULT 0, sl INTEGER DEFAULT 0, timeout INTEGER DEFAULT 0, return_sum REAL DEFAULT 0,"
+    " first_ms INTEGER, last_ms INTEGER, PRIMARY KEY (day, symbol, pattern))",
+    "CREATE TRIGGER IF NOT EXISTS signals_rollup_insert AFTER INSERT ON signals BEGIN"
+    " INSERT INTO signal_daily (day, symbol, pattern, signals, confidence_sum, first_ms, last_ms)"
+    " VALUES (NEW.time_ms / 86400000, NEW.symbol, NEW.pattern, 1, NEW.confidence, NEW.time_ms, NEW.time_ms)"
+    " ON CONFLICT (day, symbol, pattern) DO UPDATE SET signals = signals + 1,"
+    " confidence_sum = confidence_sum + excluded.confidence_sum,"
+    " first_ms = MIN(first_ms, excluded.first_ms), last_ms = MAX(last_ms, excluded.last_ms); END",
+    "CREATE TRIGGER IF NOT EXISTS signals_rollup_outcome AFTER UPDATE OF outcome ON signals"
+    " WHEN OLD.outcome IS NULL AND NEW.outcome IS NOT NULL BEGIN"
+    " UPDATE signal_daily SET tp = tp + (NEW.outcome = 'tp'), sl = sl + (NEW.outcome = 'sl'),"
+    " timeout = timeout + (NEW.outcome = 'timeout'), return_sum = return_sum + NEW.return_pct"
+    " WHERE day = NEW.time_ms / 86400000 AND symbol IS NEW.symbol AND pattern IS NEW.pattern; END",
+]
+DAY_MS = 86_400_000
+# Pending signals resolved per batch, bounding the (signals x max_hold) window arrays
+RESOLVE_CHUNK = 100_000
+
+
+def _ms(value):
+    # Timestamps, datetimes and "YYYY-mm-dd HH:MM:SS" strings (as the logger writes them).
+    # Naive values are UTC, the same as query() returns; aware ones are converted.
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return int(pd.Timestamp(value).timestamp() * 1000)
+
+
+def _where(start=None, end=None, pattern=None, symbol=None):
+    clauses, params = [], []
+    for column, value in (("pattern", pattern), ("symbol", symbol)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        clauses.append("time_ms >= ?")
+        params.append(_ms(start))
+    if end is not None:
+        clauses.append("time_ms < ?")
+        params.append(_ms(end))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+# SQLite history of logged signals, indexed by time, pattern and symbol. It is the
+# logger's backend for .db/.sqlite paths (see logger.make_backend), so every batch the
+# TradeLogger flushes lands here; fingerprints are unique, so repeats from other
+# workers are dropped on insert. Realized outcomes of the logged SL/TP are filled in
+# later from cached candles by resolve_outcomes().
+class SignalStore:
+    def __init__(self, path="trade_log.db"):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            had_rollup = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'signal_daily'"
+            ).fetchone()
+            for statement in SCHEMA:
+                conn.execute(statement)
+            if not had_rollup:
+                self._rebuild_rollup(conn)
+
+    def _rebuild_rollup(self, conn):
+        conn.execute("DELETE FROM signal_daily")
+        conn.execute(
+            "INSERT INTO signal_daily SELECT time_ms / 86400000, symbol, pattern, COUNT(*), SUM(confidence),"
+            " SUM(outcome = 'tp'), SUM(outcome = 'sl'), SUM(outcome = 'timeout'), TOTAL(return_pct),"
+            " MIN(time_ms), MAX(time_ms) FROM signals GROUP BY 1, 2, 3"
+        )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def recent_fingerprints(self, limit=SEEN_LIMIT):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT fingerprint FROM signals ORDER BY id DESC LIMIT ?", (limit,))
+            return [row[0] for row in rows][::-1]
+
+    def write(self, rows):
+        # rows: logger records (LOG_COLUMNS keys)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO signals"
+                " (time_ms, symbol, interval, pattern, confidence, entry, sl, tp, fingerprint)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(_ms(row["Time"]),) + tuple(row[column] for column in LOG_COLUMNS[1:]) for row in rows],
+            )
+
+    def query(self, start=None, end=None, pattern=None, symbol=None, limit=None):
+        # Signals with start <= time < end, oldest first
+        where, params = _where(start, end, pattern, symbol)
+        sql = (
+            "SELECT time_ms, symbol, interval, pattern, confidence, entry, sl, tp, fingerprint,"
+            f" outcome, exit_ms, exit_price, return_pct FROM signals{where} ORDER BY time_ms"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=SIGNAL_COLUMNS)
+        for column in ("time", "exit_time"):
+            df[column] = pd.to_datetime(df[column], unit="ms")
+        return df
+
+    def aggregate(self, start=None, end=None, pattern=None, symbol=None):
+        # Per-pattern counts, confidence and realized outcome stats. Whole days inside the
+        # range come from the signal_daily rollup; only the partial days at either end
+        # are read from the signals table.
+        start, end = _ms(start), _ms(end)
+        first_day = None if start is None else -(-start // DAY_MS)
+        last_day = None if end is None else end // DAY_MS
+        if first_day is not None and last_day is not None and first_day >= last_day:
+            rollup_where, rollup_params = " WHERE 0", []
+            edges = [(start, end)]
+        else:
+            clauses, rollup_params = [], []
+            for column, value in (("pattern", pattern), ("symbol", symbol)):
+                if value is not None:
+                    clauses.append(f"{column} = ?")
+                    rollup_params.append(value)
+            if first_day is not None:
+                clauses.append("day >= ?")
+                rollup_params.append(first_day)
+            if last_day is not None:
+                clauses.append("day < ?")
+                rollup_params.append(last_day)
+            rollup_where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+            edges = []
+            if start is not None and start < first_day * DAY_MS:
+                edges.append((start, first_day * DAY_MS))
+            if end is not None and last_day * DAY_MS < end:
+                edges.append((last_day * DAY_MS, end))
+
+        parts = [
+            "SELECT pattern, signals, confidence_sum, tp, sl, timeout, return_sum, first_ms, last_ms"
+            f" FROM signal_daily{rollup_where}"
+        ]
+        params = rollup_params
+        for edge_start, edge_end in edges:
+            where, edge_params = _where(edge_start, edge_end, pattern, symbol)
+            parts.append(
+                "SELECT pattern, 1, confidence, outcome = 'tp', outcome = 'sl', outcome = 'timeout',"
+                f" return_pct, time_ms, time_ms FROM signals{where}"
+            )
+            params += edge_params
+        sql = (
+            "SELECT pattern, SUM(signals), SUM(confidence_sum), TOTAL(tp), TOTAL(sl), TOTAL(timeout),"
+            f" TOTAL(return_sum), MIN(first_ms), MAX(last_ms) FROM ({' UNION ALL '.join(parts)})"
+            " GROUP BY pattern HAVING SUM(signals) > 0"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=["pattern", "signals", "confidence_sum", "tp", "sl", "timeout",
+                                         "return_sum", "first", "last"])
+        resolved = (df["tp"] + df["sl"] + df["timeout"]).where(lambda x: x > 0)
+        df = df.assign(
+            avg_confidence=df["confidence_sum"] / df["signals"],
+            pending=df["signals"] - resolved.fillna(0),
+            hit_rate=df["tp"] / resolved * 100,
+            avg_return_pct=df["return_sum"] / resolved,
+            first=pd.to_datetime(df["first"], unit="ms"),
+            last=pd.to_datetime(df["last"], unit="ms"),
+        )
+        for column in ("tp", "sl", "timeout", "pending"):
+            df[column] = df[column].astype("int64")
+        columns = ["pattern", "signals", "avg_confidence", "tp", "sl", "timeout", "pending",
+                   "hit_rate", "avg_return_pct", "first", "last"]
+        return df[columns].sort_values("signals", ascending=False, ignore_index=True)
+
+    def resolve_outcomes(self, cache=None, max_hold=MAX_HOLD):
+        # Fills outcome/exit/return for signals whose SL/TP window has played out in the
+        # cached candles. The position opens on the candle the signal was logged in, exits
+        # are checked from the next candle (same rules as the backtester). Signals whose
+        # window is not complete yet stay pending. Returns how many were resolved.
+        cache = cache or CandleCache()
+        with self._connect() as conn:
+            pending = pd.DataFrame(
+                conn.execute(
+                    "SELECT id, time_ms, symbol, interval, entry, sl, tp FROM signals"
+                    " WHERE outcome IS NULL AND symbol != '' AND interval != ''"
+                ).fetchall(),
+                columns=["id", "time_ms", "symbol", "interval", "entry", "sl", "tp"],
+            )
+        updates = []
+        for (symbol, interval), group in pending.groupby(["symbol", "interval"]):
+            candles = cache.load(symbol, interval)
+            if candles is None:
+                continue
+            open_ms = candles.index.as_unit("ms").asi8
+            bars = np.searchsorted(open_ms, group["time_ms"].to_numpy(), side="right") - 1
+            known = bars >= 0
+            group, bars = group[known], bars[known]
+            if group.empty:
+                continue
+            high = candles["high"].to_numpy(dtype="float64")
+            low = candles["low"].to_numpy(dtype="float64")
+            close = candles["close"].to_numpy(dtype="float64")
+            for chunk in range(0, len(group), RESOLVE_CHUNK):
+                rows, chunk_bars = group.iloc[chunk:chunk + RESOLVE_CHUNK], bars[chunk:chunk + RESOLVE_CHUNK]
+                exit_bar, exit_price, outcome = resolve_exits(
+                    high, low, close, chunk_bars,
+                    rows["sl"].to_numpy(dtype="float64"), rows["tp"].to_numpy(dtype="float64"), max_hold,
+                )
+                done = (outcome != "timeout") | (chunk_bars + max_hold <= len(candles) - 1)
+                sl = rows["sl"].to_numpy(dtype="float64")
+                return_pct = trade_returns(rows["entry"].to_numpy(dtype="float64"), exit_price,
+                                           sl > rows["tp"].to_numpy(dtype="float64"))
+                updates += zip(outcome[done].tolist(), open_ms[exit_bar[done]].tolist(), exit_price[done].tolist(),
+                               return_pct[done].tolist(), rows["id"].to_numpy()[done].tolist())
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE signals SET outcome = ?, exit_ms = ?, exit_price = ?, return_pct = ? WHERE id = ?", updates
+            )
+        return len(updates)
+
+    def import_csv(self, path, tz=None):
+        # Loads an existing trade_log.csv (any column layout the logger has written). Times
+        # are read as UTC; logs written before the logger switched to UTC hold local wall
+        # clock times, so pass their timezone (e.g. "Europe/Berlin") as tz.
+        df = pd.read_csv(path)
+        if tz is not None:
+            df["Time"] = pd.to_datetime(df["Time"]).dt.tz_localize(tz).dt.tz_convert("UTC")
+        for column in LOG_COLUMNS:
+            if column not in df.columns:
+                df[column] = ""
+        df["Fingerprint"] = df["Fingerprint"].fillna("").astype(str)
+        legacy = df["Fingerprint"] == ""
+        # Old rows have no fingerprint; key them on their own content so a re-import is a no-op
+        df.loc[legacy, "Fingerprint"] = (
+            "csv:" + df.loc[legacy, "Time"].astype(str) + ":" + df.loc[legacy, "Pattern"].astype(str)
+        )
+        self.write(df[LOG_COLUMNS].fillna("").to_dict("records"))
+        return len(df)
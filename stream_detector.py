@@ -0,0 +1,185 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import to_millis
+from pattern_detector import SLOPE_WINDOWS, detect_patterns
+
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+# Running regression sums drift slightly in float64, so rebuild them from the buffer now and then
+RESYNC_EVERY = 500
+
+BAR_COLUMNS = ["open_time", "open", "high", "low", "close", "volume"]
+SWING_COLUMNS = ["peak_close", "trough_close", "peak_high"]
+SLOPE_COLUMNS = [f"slope_{column}_{window}" for column, window in SLOPE_WINDOWS]
+FEATURE_COLUMNS = SWING_COLUMNS + ["rsi", "macd_diff"] + SLOPE_COLUMNS
+
+# Longest tail any detector looks at (cup and handle uses 50 bars)
+MIN_BARS = 51
+
+
+def _ema_step(previous, value, alpha):
+    if previous is None:
+        return value
+    return alpha * value + (1 - alpha) * previous
+
+
+# Keeps the detector feature frame up to date one candle at a time. RSI and MACD
+# follow the same recursions as `ta` but carry their state across the whole stream,
+# regression slopes use running sums and swing points only touch the last three
+# bars, so each new candle costs the same no matter how much history has gone by.
+class StreamingPatternDetector:
+    def __init__(self, max_bars=100):
+        if max_bars < MIN_BARS:
+            raise ValueError(f"max_bars must be at least {MIN_BARS}")
+        self.max_bars = max_bars
+        self._bars = {column: deque(maxlen=max_bars) for column in BAR_COLUMNS}
+        self._features = {column: deque(maxlen=max_bars) for column in FEATURE_COLUMNS}
+        self._state = {
+            "count": 0,
+            "prev_close": None,
+            "avg_up": None,
+            "avg_down": None,
+            "ema_fast": None,
+            "ema_slow": None,
+            "ema_signal": None,
+            "macd_count": 0,
+        }
+        for column, window in SLOPE_WINDOWS:
+            self._state[f"slope_{column}_{window}"] = (0.0, 0.0, 0)
+        self._previous_state = None
+
+    def __len__(self):
+        return len(self._bars["open_time"])
+
+    @property
+    def last_open_time(self):
+        if not len(self):
+            return None
+        return self._bars["open_time"][-1]
+
+    def update(self, open_time, open, high, low, close, volume=0.0):
+        open_time = to_millis(open_time)
+        last = self.last_open_time
+
+        if last is not None and open_time < last:
+            raise ValueError("candles must arrive in open_time order")
+
+        if open_time == last:
+            # Same candle again (still forming): undo it and apply the new values
+            for column in BAR_COLUMNS:
+                self._bars[column].pop()
+            for column in FEATURE_COLUMNS:
+                self._features[column].pop()
+            self._state = self._previous_state
+
+        self._previous_state = dict(self._state)
+        bar = (open_time, float(open), float(high), float(low), float(close), float(volume))
+        for column, value in zip(BAR_COLUMNS, bar):
+            self._bars[column].append(value)
+
+        state = self._state
+        state["count"] += 1
+
+        self._features["rsi"].append(self._update_rsi(state, bar[4]))
+        self._features["macd_diff"].append(self._update_macd(state, bar[4]))
+        for column, window in SLOPE_WINDOWS:
+            key = f"slope_{column}_{window}"
+            self._features[key].append(self._update_slope(state, key, column, window))
+        self._update_swings()
+
+    def extend(self, df):
+        for open_time, row in zip(df.index, df[["open", "high", "low", "close", "volume"]].itertuples(index=False)):
+            self.update(open_time, *row)
+
+    def _update_rsi(self, state, close):
+        previous = state["prev_close"]
+        state["prev_close"] = close
+        diff = 0.0 if previous is None else close - previous
+        alpha = 1 / RSI_WINDOW
+        state["avg_up"] = _ema_step(state["avg_up"], max(diff, 0.0), alpha)
+        state["avg_down"] = _ema_step(state["avg_down"], max(-diff, 0.0), alpha)
+
+        if state["count"] < RSI_WINDOW:
+            return np.nan
+        if state["avg_down"] == 0:
+            return 100.0
+        return 100 - 100 / (1 + state["avg_up"] / state["avg_down"])
+
+    def _update_macd(self, state, close):
+        state["ema_fast"] = _ema_step(state["ema_fast"], close, 2 / (MACD_FAST + 1))
+        state["ema_slow"] = _ema_step(state["ema_slow"], close, 2 / (MACD_SLOW + 1))
+        if state["count"] < MACD_SLOW:
+            return np.nan
+
+        macd = state["ema_fast"] - state["ema_slow"]
+        state["ema_signal"] = _ema_step(state["ema_signal"], macd, 2 / (MACD_SIGNAL + 1))
+        state["macd_count"] += 1
+        if state["macd_count"] < MACD_SIGNAL:
+            return np.nan
+        return macd - state["ema_signal"]
+
+    def _update_slope(self, state, key, column, window):
+        # s0 = sum(y), s1 = sum(i * y) over the trailing window with i = 0..window-1
+        values = self._bars[column]
+        value = values[-1]
+        s0, s1, count = state[key]
+
+        if count < window:
+            s1 += count * value
+            s0 += value
+            count += 1
+        elif state["count"] % RESYNC_EVERY == 0:
+            tail = np.array([values[i] for i in range(-window, 0)])
+            s0 = tail.sum()
+            s1 = np.arange(window) @ tail
+        else:
+            leaving = values[-window - 1]
+            s1 = s1 - (s0 - leaving) + (window - 1) * value
+            s0 = s0 - leaving + value
+        state[key] = (s0, s1, count)
+
+        if count < window:
+            return np.nan
+        return (s1 - (window - 1) / 2 * s0) / (window * (window * window - 1) / 12)
+
+    def _update_swings(self):
+        # The newest bar has no right neighbour yet, so it can never be a swing point;
+        # the bar before it is settled now that its right neighbour exists.
+        for column in SWING_COLUMNS:
+            self._features[column].append(False)
+        if len(self) < 3:
+            return
+
+        close, high = self._bars["close"], self._bars["high"]
+        self._features["peak_close"][-2] = close[-3] < close[-2] and close[-1] < close[-2]
+        self._features["trough_close"][-2] = close[-3] > close[-2] and close[-1] > close[-2]
+        self._features["peak_high"][-2] = high[-3] < high[-2] and high[-1] < high[-2]
+
+    def frames(self):
+        index = pd.DatetimeIndex(
+            pd.to_datetime(np.fromiter(self._bars["open_time"], dtype="int64", count=len(self)), unit="ms"),
+            name="open_time",
+        )
+        df = pd.DataFrame({
+            column: np.fromiter(self._bars[column], dtype="float64", count=len(self))
+            for column in BAR_COLUMNS[1:]
+        }, index=index)
+        features = pd.DataFrame({
+            column: np.fromiter(
+                self._features[column],
+                dtype="bool" if column in SWING_COLUMNS else "float64",
+                count=len(self),
+            )
+            for column in FEATURE_COLUMNS
+        }, index=index)
+        return df, features
+
+    def detect(self):
+        if not len(self):
+            return None
+        df, features = self.frames()
+        return detect_patterns(df, features)
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from data_fetcher import INTERVAL_MS
+
+# On the grid of every interval up to 1d, like real open times
+START_MS = 1_600_000_000_000 - 1_600_000_000_000 % INTERVAL_MS["1d"]
+VOLATILITY = 0.004
+WICK = 0.002
+# Bars after a planted pattern confirms in which its detection still counts
+TOLERANCE = 10
+
+# Pattern shapes as (bar offset, log price relative to the pattern's first bar) anchors,
+# joined by straight lines; the last anchor is the bar the pattern confirms on. They are
+# laid out in 30m bars (the detectors' gaps are in hours) and stretched for shorter
+# intervals. "wick" anchors, where given, set the candles' wick size instead of WICK.
+PATTERN_SHAPES = {
+    "Head & Shoulders": {
+        "close": [(0, 0.0), (12, 0.02), (24, 0.0), (36, 0.07), (48, 0.01), (60, 0.05), (66, -0.03),
+                  (69, 0.025)],
+    },
+    "Double Bottom": {
+        "close": [(0, 0.0), (14, -0.06), (26, -0.02), (40, -0.06), (52, -0.015)],
+    },
+    "Cup and Handle": {
+        "close": [(0, 0.0), (12, 0.0), (26, -0.10), (40, 0.0), (46, 0.015), (48, 0.015), (52, 0.003),
+                  (56, 0.006), (57, 0.022)],
+    },
+    "Bullish Flag": {
+        "close": [(0, 0.0), (20, 0.07), (39, 0.055), (40, 0.075)],
+    },
+    "Rising Wedge": {
+        "close": [(0, 0.0), (29, 0.02), (30, -0.037)],
+        "wick": [(0, 0.0), (1, 0.04), (2, 0.0), (30, 0.0)],
+    },
+}
+
+
+def _path(anchors, stretch):
+    offsets, values = zip(*anchors)
+    offsets = np.asarray(offsets) * stretch
+    return np.interp(np.arange(offsets[-1] + 1), offsets, values)
+
+
+def pattern_span(name, interval="30m"):
+    # Bars a planted pattern takes, its confirming bar included
+    stretch = max(1, INTERVAL_MS["30m"] // INTERVAL_MS[interval])
+    return PATTERN_SHAPES[name]["close"][-1][0] * stretch + 1
+
+
+def pattern_schedule(bars, names=None, spacing=150, strength=1.0, interval="30m", first=None):
+    # (name, confirming bar, strength) for each of names in turn, one every spacing bars
+    names = list(names or PATTERN_SHAPES)
+    end = first if first is not None else spacing
+    schedule = []
+    while end < bars:
+        name = names[len(schedule) % len(names)]
+        if end - pattern_span(name, interval) + 1 >= 0:
+            schedule.append((name, end, strength))
+        end += spacing
+    return schedule
+
+
+def synthetic_ohlc(bars, interval="30m", seed=0, patterns=(), price=30000.0, volatility=VOLATILITY,
+                   start_ms=START_MS):
+    # Seeded geometric random walk in fetch_ohlc_data's frame layout, with patterns planted
+    # as (name, confirming bar, strength). Inside a pattern the walk follows its shape plus
+    # noise scaled by 1 - strength, so strength 1.0 is the clean textbook shape; outside,
+    # it continues from wherever the pattern left off. Returns (df, planted): planted has
+    # one {"pattern", "start", "end", "strength"} row per pattern, bars as positions.
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, volatility, bars)
+    wick = np.abs(rng.normal(0, WICK, (2, bars)))
+    volume = rng.uniform(1, 100, bars)
+
+    stretch = max(1, INTERVAL_MS["30m"] // INTERVAL_MS[interval])
+    planted = []
+    for name, end, strength in sorted(patterns, key=lambda pattern: pattern[1]):
+        shape = PATTERN_SHAPES[name]
+        path = _path(shape["close"], stretch)
+        start = end - len(path) + 1
+        if start < 1 or end >= bars:
+            raise ValueError(f"{name} ending at bar {end} does not fit in {bars} bars")
+        if planted and start <= planted[-1]["end"]:
+            raise ValueError(f"{name} ending at bar {end} overlaps {planted[-1]['pattern']}")
+        noise = 1 - strength
+        returns[start + 1:end + 1] = np.diff(path) + returns[start + 1:end + 1] * noise
+        wick[:, start:end + 1] *= noise
+        if "wick" in shape:
+            wick[:, start:end + 1] += _path(shape["wick"], stretch)
+        planted.append({"pattern": name, "start": start, "end": end, "strength": strength})
+
+    close = price * np.exp(np.cumsum(returns))
+    opens = np.concatenate([[close[0]], close[:-1]])
+    index = pd.DatetimeIndex(
+        pd.to_datetime(start_ms + np.arange(bars) * INTERVAL_MS[interval], unit="ms"), name="open_time"
+    )
+    df = pd.DataFrame({
+        "open": opens,
+        "high": np.maximum(opens, close) * (1 + wick[0]),
+        "low": np.minimum(opens, close) * (1 - wick[1]),
+        "close": close,
+        "volume": volume,
+    }, index=index)
+    return df, pd.DataFrame(planted, columns=["pattern", "start", "end", "strength"])
+
+
+def score_detections(planted, detections, tolerance=TOLERANCE):
+    # detections: (bar, pattern name) pairs. A planted pattern is found if its detector
+    # fires on its confirming bar or up to tolerance bars later; detections outside every
+    # planted span (plus tolerance) count as false alarms. One row per pattern.
+    detections = pd.DataFrame(list(detections), columns=["bar", "pattern"])
+    bars = detections["bar"].to_numpy()
+    covered = np.zeros(len(detections), dtype=bool)
+    for start, end in zip(planted["start"], planted["end"]):
+        covered |= (bars >= start) & (bars <= end + tolerance)
+    rows = []
+    for name in sorted(set(planted["pattern"]) | set(detections["pattern"])):
+        expected = planted["end"][planted["pattern"] == name].to_numpy()
+        named = (detections["pattern"] == name).to_numpy()
+        fired = bars[named]
+        found = sum(bool(((fired >= end) & (fired <= end + tolerance)).any()) for end in expected)
+        rows.append({
+            "pattern": name,
+            "planted": len(expected),
+            "found": found,
+            "recall": found / len(expected) * 100 if len(expected) else np.nan,
+            "detections": len(fired),
+            "false_alarms": int((named & ~covered).sum()),
+        })
+    return pd.DataFrame(rows, columns=["pattern", "planted", "found", "recall", "detections", "false_alarms"])
@@ -0,0 +1,55 @@
+import threading
+
+import openai
+
+from ai_advisor import AdviceService, advice_prompt, template_advice
+from openai_stub import ChatCompletionStub
+
+PATTERN = {"name": "Double Bottom", "entry": 30000.0, "confidence": 90.0}
+
+
+def _service(stub):
+    return AdviceService(openai.OpenAI(api_key="test", base_url=stub.url, max_retries=0), timeout=5)
+
+
+def test_concurrent_sessions_share_one_call():
+    with ChatCompletionStub(reply="Buy the dip", delay=0.3) as stub:
+        service = _service(stub)
+        assert service.advice(PATTERN, 1.5, 3.0) == (template_advice(PATTERN, 1.5, 3.0), "pending")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.advice(PATTERN, 1.5, 3.0, wait=5)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        service.close()
+    assert results == [("Buy the dip", "llm")] * 8
+    assert stub.requests == service.calls == 1
+
+
+def test_failed_call_stops_pending_and_backs_off(caplog):
+    with ChatCompletionStub(status=500) as stub:
+        service = _service(stub)
+        assert service.advice(PATTERN, 1.5, 3.0, wait=5) == (template_advice(PATTERN, 1.5, 3.0), "template")
+        # Not pending any more, so the app stops polling; the failure is not retried yet
+        assert service.advice(PATTERN, 1.5, 3.0)[1] == "template"
+        service.close()
+    assert stub.requests == service.calls == service.errors == 1
+    assert [record.name for record in caplog.records] == ["ai_advisor"]
+
+
+def test_slow_call_answers_with_the_template_meanwhile():
+    with ChatCompletionStub(reply="Wait for it", delay=0.5) as stub:
+        service = _service(stub)
+        assert service.advice(PATTERN, 1.5, 3.0, wait=0.05) == (template_advice(PATTERN, 1.5, 3.0), "pending")
+        assert service.advice(PATTERN, 1.5, 3.0, wait=5) == ("Wait for it", "llm")
+        service.close()
+
+
+def test_bearish_advice_is_short_and_unrounded():
+    wedge = {"name": "Rising Wedge", "entry": 0.004, "confidence": 80.0}
+    prompt = advice_prompt(wedge, 1.5, 3.0)
+    assert "Side: Short" in prompt
+    assert "Stop Loss: $0.00406\n" in prompt and "Take Profit: $0.00388\n" in prompt
+    assert "SL at $29550," in template_advice(PATTERN, 1.5, 3.0)
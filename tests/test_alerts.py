@@ -0,0 +1,121 @@
+import http.server
+import threading
+import time
+
+import pytest
+
+from alerts import AlertManager
+from publishers import HttpPublisher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingPublisher:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def publish(self, signals):
+        if self.fail:
+            raise RuntimeError("sink down")
+        self.sent += [signal["fingerprint"] for signal in signals]
+
+
+def _alert(fingerprint, symbol="BTCUSDT", interval="30m"):
+    return {"symbol": symbol, "interval": interval, "fingerprint": fingerprint}
+
+
+def _manager(sink, clock):
+    return AlertManager([sink], cooldown=60, batch_wait=0, clock=clock)
+
+
+def _settle(manager):
+    # Waits until every submitted alert was delivered or failed
+    deadline = time.monotonic() + 5
+    while manager.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not manager.stats()["in_flight"]
+
+
+def test_failed_alert_is_not_recorded():
+    clock = Clock()
+    sink = RecordingPublisher(fail=True)
+    manager = _manager(sink, clock)
+    assert manager.submit([_alert("a")])
+    _settle(manager)
+    stats = manager.stats()
+    assert stats["undelivered"] == 1
+    assert stats["sinks"]["0:RecordingPublisher"] == {"delivered": 0, "failed": 1, "dropped": 0, "pending": 0}
+
+    # Neither the fingerprint nor the pair's cooldown were recorded, so it goes out again
+    sink.fail = False
+    assert manager.submit([_alert("a")])
+    _settle(manager)
+    assert sink.sent == ["a"]
+    assert manager.stats()["sinks"]["0:RecordingPublisher"]["delivered"] == 1
+    manager.close()
+
+
+def test_signal_held_by_cooldown_fires_later():
+    clock = Clock()
+    sink = RecordingPublisher()
+    manager = _manager(sink, clock)
+    assert manager.submit([_alert("a")])
+    _settle(manager)
+
+    clock.now = 30
+    assert not manager.submit([_alert("b")])
+    assert manager.stats()["cooling"] == 1
+    clock.now = 61
+    assert manager.submit([_alert("b")])
+    assert not manager.submit([_alert("a")])
+    _settle(manager)
+    assert sink.sent == ["a", "b"]
+    assert manager.stats()["duplicates"] == 1
+    manager.close()
+
+
+def test_in_flight_alert_holds_its_pair():
+    clock = Clock()
+    release = threading.Event()
+
+    class SlowPublisher:
+        def publish(self, signals):
+            release.wait(5)
+
+    manager = _manager(SlowPublisher(), clock)
+    assert manager.submit([_alert("a")])
+    assert not manager.submit([_alert("a"), _alert("b")])
+    assert manager.submit([_alert("c", symbol="ETHUSDT")])
+    release.set()
+    _settle(manager)
+    stats = manager.stats()
+    assert (stats["duplicates"], stats["cooling"], stats["undelivered"]) == (1, 1, 0)
+    manager.close()
+
+
+def test_http_publisher_raises_after_last_retry():
+    class Failing(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(500)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Failing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        publisher = HttpPublisher(f"http://127.0.0.1:{server.server_port}/", retries=1)
+        with pytest.raises(Exception):
+            publisher.publish([_alert("a")])
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,35 @@
+import numpy as np
+
+from batch_detector import BATCH_FUNCTIONS, detect_patterns_batch
+from pattern_detector import compute_features, pattern_functions
+from synthetic import pattern_schedule, synthetic_ohlc
+
+WINDOW = 100
+
+
+def test_batch_matches_live_detectors_bar_for_bar():
+    df, _ = synthetic_ohlc(600, seed=1, patterns=pattern_schedule(600, spacing=100))
+    features = compute_features(df)
+    table = detect_patterns_batch(df, features=features)
+    # The batch pass sees converged indicators but, like the live window, cannot know
+    # whether its last bar is a swing point
+    swings = [features.columns.get_loc(column) for column in features.columns
+              if column.startswith(("peak_", "trough_"))]
+
+    fired = set()
+    for bar in range(WINDOW - 1, len(df)):
+        window = df.iloc[bar - WINDOW + 1:bar + 1]
+        window_features = features.iloc[bar - WINDOW + 1:bar + 1].copy()
+        window_features.iloc[-1, swings] = False
+        for func in pattern_functions:
+            name = BATCH_FUNCTIONS[func][0]
+            confidence = table["confidence"][name].iloc[bar]
+            entry = table["entry"][name].iloc[bar]
+            result = func(window, window_features)
+            if result:
+                fired.add(name)
+                assert np.isclose(confidence, result["confidence"], atol=0.01), (bar, name)
+                assert np.isclose(entry, result["entry"]), (bar, name)
+            else:
+                assert np.isnan(confidence) and np.isnan(entry), (bar, name)
+    assert len(fired) >= 3
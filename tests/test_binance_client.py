@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from binance_client import AsyncKlineClient, RateLimitError
+from binance_stub import KlineStubServer
+from data_fetcher import INTERVAL_MS
+from synthetic import synthetic_ohlc
+
+PAIR = ("SYNUSDT", "1m")
+STEP = INTERVAL_MS["1m"]
+
+
+def _frame(bars):
+    # bars candles ending with the one forming now
+    now_ms = int(time.time() * 1000)
+    return synthetic_ohlc(bars, "1m", start_ms=now_ms - now_ms % STEP - (bars - 1) * STEP)[0]
+
+
+def _fresh_minute():
+    # Binance and the stub count weight per wall-clock minute; stay inside one
+    if time.time() % 60 > 57:
+        time.sleep(60 - time.time() % 60)
+
+
+def test_rate_limited_request_waits_retry_after_then_succeeds():
+    df = _frame(50)
+    with KlineStubServer({PAIR: df}, weight_limit=1000, retry_after=0.2) as server:
+        answers = iter([2000, 2000])
+        server._use_weight = lambda weight: next(answers, 1)
+
+        async def fetch():
+            async with AsyncKlineClient(server.url, max_retries=2) as client:
+                return await client.fetch_ohlc(*PAIR, 50)
+
+        started = time.monotonic()
+        fetched = asyncio.run(fetch())
+    assert time.monotonic() - started >= 0.4
+    pd.testing.assert_frame_equal(fetched, df.round(8), check_freq=False, check_names=False)
+
+
+def test_rate_limit_error_after_last_retry():
+    _fresh_minute()
+    with KlineStubServer({PAIR: _frame(50)}, weight_limit=0, retry_after=0) as server:
+        async def fetch():
+            async with AsyncKlineClient(server.url, max_retries=2) as client:
+                return await client.fetch_ohlc(*PAIR, 50)
+
+        with pytest.raises(RateLimitError) as error:
+            asyncio.run(fetch())
+        assert server.requests == 3
+    assert error.value.status == 429
+    assert error.value.retry_after == 0
+
+
+def test_weight_budget_follows_the_server_and_holds_requests():
+    _fresh_minute()
+    with KlineStubServer({PAIR: _frame(50)}) as server:
+        async def scenario():
+            # Weight spent by another client on the same IP shows up in the header
+            async with AsyncKlineClient(server.url) as other:
+                for _ in range(3):
+                    await other.fetch_ohlc(*PAIR, 50)
+            # Budget 9: this request brings the count to 4, two of weight 2 fit, a third waits
+            async with AsyncKlineClient(server.url, weight_limit=10) as client:
+                await client.fetch_ohlc(*PAIR, 50)
+                used = client.used_weight
+                await client.fetch_ohlc(*PAIR, 200)
+                await client.fetch_ohlc(*PAIR, 200)
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.fetch_ohlc(*PAIR, 200), 0.5)
+                return used, client.used_weight
+
+        used, spent = asyncio.run(scenario())
+        assert server.requests == 6
+    assert (used, spent) == (4, 8)
+
+
+def test_fetch_history_pages_through_the_range():
+    df = _frame(2500)
+    with KlineStubServer({PAIR: df}) as server:
+        async def fetch():
+            async with AsyncKlineClient(server.url) as client:
+                return await client.fetch_history(*PAIR, df.index[0])
+
+        fetched = asyncio.run(fetch())
+        assert server.requests == 3
+    pd.testing.assert_frame_equal(fetched, df.round(8), check_freq=False, check_names=False)
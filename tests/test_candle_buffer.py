@@ -0,0 +1,54 @@
+import numpy as np
+
+from candle_buffer import PRICE_COLUMNS, CandleBuffer
+
+STEP = 60_000
+
+
+def _rows(start, n):
+    open_time = np.arange(start, start + n, dtype="int64") * STEP
+    values = np.arange(start, start + n, dtype="float64")[:, None] + np.arange(5) / 10
+    return open_time, values
+
+
+def test_wraparound_keeps_the_newest_rows_contiguous():
+    buffer = CandleBuffer(capacity=8)
+    buffer.extend(*_rows(0, 5))
+    buffer.extend(*_rows(5, 6))
+    for position in range(11, 14):
+        buffer.update(position * STEP, *(position + np.arange(5) / 10))
+    assert len(buffer) == 8
+    assert buffer.last_open_time == 13 * STEP
+
+    open_time, values = _rows(6, 8)
+    frame = buffer.frame()
+    assert (frame.index.as_unit("ms").asi8 == open_time).all()
+    assert (frame.to_numpy() == values).all()
+    arrays = buffer.arrays(3)
+    assert (arrays["open_time"] == open_time[-3:]).all()
+    assert (arrays["close"] == values[-3:, PRICE_COLUMNS.index("close")]).all()
+
+
+def test_views_share_the_buffer_memory():
+    buffer = CandleBuffer(capacity=8)
+    buffer.extend(*_rows(0, 11))
+    frame = buffer.frame()
+    arrays = buffer.arrays()
+    assert np.shares_memory(frame.to_numpy(), buffer._values)
+    assert np.shares_memory(arrays["close"], buffer._values)
+    assert np.shares_memory(frame.index.asi8, buffer._open_time)
+
+    # The forming candle changes in place, under every view
+    buffer.update(10 * STEP, 1.0, 2.0, 0.5, 1.5, 9.0)
+    assert frame["close"].iloc[-1] == 1.5
+    assert arrays["volume"][-1] == 9.0
+
+
+def test_extend_skips_old_rows_and_replaces_the_forming_one():
+    buffer = CandleBuffer(capacity=8)
+    buffer.extend(*_rows(0, 4))
+    open_time, values = _rows(2, 4)
+    values[1] = -1.0
+    assert buffer.extend(open_time, values) == 2
+    assert (buffer.arrays()["open"] == [0.0, 1.0, 2.0, -1.0, 4.0, 5.0]).all()
+    assert not buffer.update(0, 1.0, 1.0, 1.0, 1.0)
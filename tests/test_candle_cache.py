@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import numpy as np
+
+from binance_stub import KlineStubServer
+from candle_cache import CandleCache, _closed
+from data_fetcher import INTERVAL_MS
+from synthetic import synthetic_ohlc
+
+STEP = INTERVAL_MS["1m"]
+
+
+def _frame(bars):
+    # bars candles ending with the one forming now
+    now_ms = int(time.time() * 1000)
+    return synthetic_ohlc(bars, "1m", start_ms=now_ms - now_ms % STEP - (bars - 1) * STEP)[0]
+
+
+def _check_contiguous(df):
+    assert (np.diff(df.index.as_unit("ms").asi8) == STEP).all()
+
+
+def test_fetch_fills_a_gap_longer_than_one_request(tmp_path):
+    df = _frame(2600)
+    cache = CandleCache(root=str(tmp_path))
+    cache.append("SYNUSDT", "1m", df.iloc[:300])
+    with KlineStubServer({("SYNUSDT", "1m"): df}) as server:
+        cache.base_url = server.url
+        fetched = cache.fetch("SYNUSDT", "1m", limit=100)
+    stored = cache.load("SYNUSDT", "1m")
+    assert len(fetched) == 100 and fetched.index[-1] == df.index[-1]
+    _check_contiguous(stored)
+    assert stored.index[0] == df.index[0]
+    assert len(stored) == len(_closed(df, "1m", int(time.time() * 1000)))
+
+
+def test_fetch_fills_a_gap_longer_than_limit(tmp_path):
+    df = _frame(800)
+    cache = CandleCache(root=str(tmp_path))
+    cache.append("SYNUSDT", "1m", df.iloc[:100])
+    with KlineStubServer({("SYNUSDT", "1m"): df}) as server:
+        cache.base_url = server.url
+        cache.fetch("SYNUSDT", "1m", limit=100)
+    stored = cache.load("SYNUSDT", "1m")
+    _check_contiguous(stored)
+    assert len(stored) >= 799
+
+
+def test_fetch_backfills_a_short_store(tmp_path):
+    df = _frame(300)
+    cache = CandleCache(root=str(tmp_path))
+    cache.append("SYNUSDT", "1m", df.iloc[-40:-10])
+    with KlineStubServer({("SYNUSDT", "1m"): df}) as server:
+        cache.base_url = server.url
+        fetched = cache.fetch("SYNUSDT", "1m", limit=100)
+    assert fetched.index.equals(df.index[-100:])
+    stored = cache.load("SYNUSDT", "1m")
+    _check_contiguous(stored)
+    assert len(stored) >= 99 and stored.index[0] == df.index[-100]
+
+
+def test_gap_fetch_inside_a_running_loop(tmp_path):
+    df = _frame(2600)
+    cache = CandleCache(root=str(tmp_path))
+    cache.append("SYNUSDT", "1m", df.iloc[:300])
+
+    async def fetch():
+        return cache.fetch("SYNUSDT", "1m", limit=100)
+
+    with KlineStubServer({("SYNUSDT", "1m"): df}) as server:
+        cache.base_url = server.url
+        fetched = asyncio.run(fetch())
+    assert fetched.index[-1] == df.index[-1]
+    _check_contiguous(cache.load("SYNUSDT", "1m"))
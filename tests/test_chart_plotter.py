@@ -0,0 +1,30 @@
+import numpy as np
+
+from chart_plotter import decimate_ohlc, plot_chart
+from synthetic import synthetic_ohlc
+
+
+def test_decimation_keeps_every_extreme():
+    df = synthetic_ohlc(2503, seed=2)[0]
+    candles = decimate_ohlc(df, max_candles=1000)
+    # 3 rows per bucket, the last one short
+    assert len(candles) == 835
+    assert candles.index.equals(df.index[::3])
+    assert candles["open"].iloc[0] == df["open"].iloc[0]
+    assert candles["close"].iloc[-1] == df["close"].iloc[-1]
+    assert candles["high"].max() == df["high"].max()
+    assert candles["low"].min() == df["low"].min()
+    assert np.isclose(candles["volume"].sum(), df["volume"].sum())
+
+    bucket = df.iloc[3:6]
+    expected = [bucket["open"].iloc[0], bucket["high"].max(), bucket["low"].min(), bucket["close"].iloc[-1],
+                bucket["volume"].sum()]
+    assert np.allclose(candles.iloc[1][["open", "high", "low", "close", "volume"]].to_numpy(), expected)
+
+
+def test_short_frames_are_drawn_as_is():
+    df = synthetic_ohlc(300, seed=2)[0]
+    assert decimate_ohlc(df, max_candles=1000) is df
+    fig = plot_chart(df)
+    assert len(fig.data[0].x) == 300
+    assert plot_chart(synthetic_ohlc(5000, seed=2)[0]).data[0].x.shape == (1000,)
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import config
+
+
+def test_import_reads_nothing_until_a_setting_is_used():
+    code = "import sys, config; print('dotenv' in sys.modules, config._settings is None)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(config.__file__))
+    assert result.stdout.split() == ["False", "True"]
+
+
+def test_settings_are_read_after_the_env_file(tmp_path, monkeypatch):
+    env = tmp_path / ".env"
+    env.write_text("BINANCE_WS_URL=ws://127.0.0.1:9\nALERT_COOLDOWN=5\n")
+    monkeypatch.setattr(config, "find_env_file", lambda: str(env))
+    monkeypatch.setattr(config, "_settings", None)
+    # Set first so the value load_dotenv writes is undone afterwards too
+    monkeypatch.setenv("BINANCE_WS_URL", "")
+    monkeypatch.delenv("BINANCE_WS_URL")
+    # Already set in the environment: wins over the file
+    monkeypatch.setenv("ALERT_COOLDOWN", "60")
+    assert config.BINANCE_WS_URL == "ws://127.0.0.1:9"
+    assert config.ALERT_COOLDOWN == 60.0
@@ -0,0 +1,61 @@
+from logger import TradeLogger
+from pattern_detector import detect_patterns, signal_fingerprint
+from synthetic import pattern_schedule, synthetic_ohlc
+
+WINDOW = 100
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.rows = []
+
+    def recent_fingerprints(self, limit=None):
+        return []
+
+    def write(self, rows):
+        self.rows += rows
+
+
+def _replay(df, start, end):
+    # Best detection of every window ending in [start, end), as the app sees them bar by bar
+    results = []
+    for bar in range(start, end):
+        result = detect_patterns(df.iloc[bar - WINDOW + 1:bar + 1])
+        if result:
+            results.append((bar, result))
+    return results
+
+
+def test_formation_keeps_its_fingerprint_across_bars():
+    # Seed 4 has a Rising Wedge that stays detected on bars 287-289 and again on 1037-1039
+    df, _ = synthetic_ohlc(1100, seed=4, patterns=pattern_schedule(1100))
+    results = _replay(df, 280, 295) + _replay(df, 1030, 1045)
+    consecutive = [
+        (a, b) for (bar_a, a), (bar_b, b) in zip(results, results[1:])
+        if bar_b == bar_a + 1 and a["name"] == b["name"] and a["entry"] == b["entry"]
+    ]
+    assert len(consecutive) >= 4
+    for a, b in consecutive:
+        assert a["key_points"] != b["key_points"]
+        assert signal_fingerprint(a, "SYNUSDT", "30m") == signal_fingerprint(b, "SYNUSDT", "30m")
+
+
+def test_logger_logs_each_formation_once():
+    df, _ = synthetic_ohlc(1100, seed=4, patterns=pattern_schedule(1100))
+    results = _replay(df, 280, 295)
+    backend = MemoryBackend()
+    logger = TradeLogger(backend)
+    logged = sum(logger.log(result, 1.0, 2.0, "SYNUSDT", "30m") for _, result in results)
+    logger.flush()
+    assert len(results) == 3
+    assert logged == 1
+    assert len(backend.rows) == 1
+
+
+def test_fingerprint_separates_symbols_and_levels():
+    df, _ = synthetic_ohlc(1100, seed=4, patterns=pattern_schedule(1100))
+    (_, result), = _replay(df, 287, 288)
+    fingerprint = signal_fingerprint(result, "SYNUSDT", "30m")
+    assert signal_fingerprint(result, "OTHERUSDT", "30m") != fingerprint
+    assert signal_fingerprint(result, "SYNUSDT", "1h") != fingerprint
+    assert signal_fingerprint(dict(result, entry=result["entry"] * 1.01), "SYNUSDT", "30m") != fingerprint
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import numpy as np
+
+from binance_stub import KlineStreamStub, KlineStubServer
+from data_fetcher import INTERVAL_MS
+from kline_stream import KlineStream
+from pattern_detector import compute_features
+from synthetic import synthetic_ohlc
+
+STEP = INTERVAL_MS["1m"]
+PAIR = ("SYNUSDT", "1m")
+
+
+def _frame(bars):
+    now_ms = int(time.time() * 1000)
+    return synthetic_ohlc(bars, "1m", start_ms=now_ms - now_ms % STEP - (bars - 1) * STEP)[0]
+
+
+async def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_receive_loop_keeps_buffering_while_a_close_is_processed():
+    df = _frame(150)
+    last = int(df.index[-1:].as_unit("ms").asi8[0])
+    row = tuple(df.iloc[-1][["open", "high", "low", "close", "volume"]])
+    closes = []
+    release = asyncio.Event()
+
+    async def on_close(symbol, interval, frame, pattern_info):
+        await release.wait()
+        closes.append((symbol, interval, int(frame.index[-1:].as_unit("ms").asi8[0])))
+
+    async def scenario(rest, ws):
+        stream = KlineStream([PAIR], on_close=on_close, ws_url=ws.url, base_url=rest.url, max_retries=0)
+        runner = asyncio.create_task(stream.run())
+        await asyncio.to_thread(ws.wait_for_connections)
+        await _wait_for(lambda: stream.resyncs == 1)
+
+        await asyncio.to_thread(ws.send_candle, *PAIR, last, row, True)
+        await asyncio.to_thread(ws.send_candle, *PAIR, last + STEP, row, False)
+        # on_close is still blocked on the first candle, yet the next one is buffered
+        await _wait_for(lambda: stream.buffers[PAIR].last_open_time == last + STEP)
+        assert closes == []
+
+        # A skipped candle queues a resync instead of fetching inside the receive loop.
+        # REST has nothing newer than the close already detected, so nothing is repeated.
+        await asyncio.to_thread(ws.send_candle, *PAIR, last + 3 * STEP, row, True)
+        release.set()
+        await _wait_for(lambda: len(closes) == 1)
+        await stream.join()
+        assert stream.resyncs == 2
+        assert closes == [(*PAIR, last)]
+        await stream.stop()
+        await runner
+
+    with KlineStubServer({PAIR: df}) as rest, KlineStreamStub() as ws:
+        asyncio.run(scenario(rest, ws))
+
+
+def test_closes_carry_ta_features_and_reconnects_reseed():
+    df = _frame(150)
+    last = int(df.index[-1:].as_unit("ms").asi8[0])
+    row = tuple(df.iloc[-1][["open", "high", "low", "close", "volume"]])
+    closes = []
+
+    def on_close(symbol, interval, frame, pattern_info):
+        closes.append(frame)
+
+    async def scenario(rest, ws):
+        stream = KlineStream([PAIR], on_close=on_close, ws_url=ws.url, base_url=rest.url, max_retries=3)
+        runner = asyncio.create_task(stream.run())
+        await asyncio.to_thread(ws.wait_for_connections)
+        await _wait_for(lambda: stream.resyncs == 1)
+        await asyncio.to_thread(ws.send_candle, *PAIR, last, row, True)
+        await _wait_for(lambda: len(closes) == 1)
+        await stream.join()
+        _, features = stream.buffers[PAIR].frames()
+
+        await asyncio.to_thread(ws.disconnect)
+        await asyncio.to_thread(ws.wait_for_connections, 2)
+        await _wait_for(lambda: stream.resyncs == 2)
+        await stream.stop()
+        await runner
+        return features
+
+    with KlineStubServer({PAIR: df}) as rest, KlineStreamStub() as ws:
+        features = asyncio.run(scenario(rest, ws))
+    assert closes[0].index[-1] == df.index[-1]
+    # The stream was seeded with the closed candle before the window, which its
+    # indicators carry on from
+    expected = compute_features(df.tail(len(closes[0]) + 1)).iloc[1:]
+    for column in ("rsi", "macd_diff", "peak_close"):
+        assert np.allclose(features[column].to_numpy(dtype="float64"), expected[column].to_numpy(dtype="float64"),
+                           equal_nan=True), column
+
+
+def test_closes_queued_during_a_resync_are_detected_once():
+    if time.time() % 60 > 55:
+        # The frame's last candle has to still be forming when the resync fetches it
+        time.sleep(60 - time.time() % 60)
+    df = _frame(150)
+    open_ms = df.index.as_unit("ms").asi8
+    row = tuple(df.iloc[-1][["open", "high", "low", "close", "volume"]])
+    closes = []
+    release = asyncio.Event()
+
+    async def on_close(symbol, interval, frame, pattern_info):
+        await release.wait()
+        closes.append(int(frame.index[-1:].as_unit("ms").asi8[0]))
+
+    async def scenario(rest, ws):
+        stream = KlineStream([PAIR], on_close=on_close, ws_url=ws.url, base_url=rest.url, max_retries=0)
+        runner = asyncio.create_task(stream.run())
+        await asyncio.to_thread(ws.wait_for_connections)
+        await _wait_for(lambda: stream.resyncs == 1)
+        # Seeded with closed candles only
+        assert stream.buffers[PAIR].last_open_time == open_ms[-6]
+
+        await asyncio.to_thread(ws.send_candle, *PAIR, int(open_ms[-5]), row, True)
+        # While that close is detected, REST catches up and the stream skips a candle
+        rest.frames[PAIR] = df
+        for position in (-3, -2):
+            await asyncio.to_thread(ws.send_candle, *PAIR, int(open_ms[position]), row, True)
+        await _wait_for(lambda: stream._closes.qsize() == 2)
+        release.set()
+        await _wait_for(lambda: stream.resyncs == 2)
+        await stream.join()
+        buffer = stream.buffers[PAIR]
+        await stream.stop()
+        await runner
+        return buffer
+
+    with KlineStubServer({PAIR: df.iloc[:-5]}) as rest, KlineStreamStub() as ws:
+        buffer = asyncio.run(scenario(rest, ws))
+    # The forming candle is left out of the resync too
+    assert closes == [open_ms[-5], open_ms[-2]]
+    assert buffer.last_open_time == open_ms[-2]
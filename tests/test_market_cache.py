@@ -0,0 +1,37 @@
+import time
+
+from data_fetcher import INTERVAL_MS
+from market_cache import FORMING_TTL, MarketCache
+from synthetic import synthetic_ohlc
+
+
+def test_detection_reruns_when_the_forming_candle_moves():
+    df, _ = synthetic_ohlc(100)
+    frames = [df, df.copy(), df.copy()]
+    frames[2].iloc[-1, frames[2].columns.get_loc("close")] *= 1.01
+    calls = []
+
+    def detect(frame):
+        calls.append(float(frame["close"].iloc[-1]))
+        return None
+
+    cache = MarketCache(fetch=lambda symbol, interval, limit: frames.pop(0), detect=detect)
+    for _ in range(3):
+        cache.refresh("SYNUSDT", "30m")
+    # The unchanged refetch reuses the result; the moved close runs detection again
+    assert calls == [df["close"].iloc[-1], df["close"].iloc[-1] * 1.01]
+
+
+def test_forming_candle_is_refetched_within_the_ttl():
+    step = INTERVAL_MS["4h"]
+    now_ms = int(time.time() * 1000)
+    # A 4h frame whose last candle opened a minute ago
+    df, _ = synthetic_ohlc(100, "4h", start_ms=now_ms - 60_000 - 99 * step)
+
+    def fetch(symbol, interval, limit):
+        return df
+
+    entry = MarketCache(fetch=fetch, detect=lambda frame: None).refresh("SYNUSDT", "4h")
+    assert entry["expires_at"] <= time.time() + FORMING_TTL
+    entry = MarketCache(fetch=fetch, detect=lambda frame: None, ttl=None).refresh("SYNUSDT", "4h")
+    assert entry["expires_at"] > time.time() + step / 1000 - 120
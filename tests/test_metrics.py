@@ -0,0 +1,73 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    enabled = metrics.enabled
+    metrics.enable()
+    metrics.reset()
+    yield
+    metrics.reset()
+    metrics.enabled = enabled
+
+
+def detect_flag(hit):
+    if not hit:
+        metrics.reject("pole")
+        return None
+    return {"name": "Flag"}
+
+
+def detect_broken():
+    raise ValueError("bad frame")
+
+
+def _record():
+    metrics.observe(detect_flag, True)
+    metrics.observe(detect_flag, False)
+    metrics.observe(detect_flag, False)
+    with pytest.raises(ValueError):
+        metrics.observe(detect_broken)
+
+
+def test_observe_counts_outcomes():
+    _record()
+    stats = metrics.snapshot()
+    flag = stats["detect_flag"]
+    assert (flag["calls"], flag["hits"], flag["exceptions"]) == (3, 1, 0)
+    assert flag["rejections"] == {"pole": 2}
+    assert sum(flag["buckets"]) == 3
+    broken = stats["detect_broken"]
+    assert (broken["calls"], broken["hits"], broken["exceptions"]) == (1, 0, 1)
+    # Outside observe() a rejection has no detector to count against
+    metrics.reject("stray")
+    assert metrics.snapshot() == stats
+
+
+def test_merge_adds_another_registry():
+    _record()
+    worker = metrics.snapshot()
+    metrics.merge(worker)
+    flag = metrics.snapshot()["detect_flag"]
+    assert (flag["calls"], flag["hits"]) == (6, 2)
+    assert flag["rejections"] == {"pole": 4}
+    assert flag["buckets"] == [2 * count for count in worker["detect_flag"]["buckets"]]
+    assert flag["seconds"] == pytest.approx(2 * worker["detect_flag"]["seconds"])
+
+
+def test_prometheus_text():
+    _record()
+    lines = metrics.prometheus_text().splitlines()
+    assert "# TYPE pattern_detector_calls_total counter" in lines
+    assert 'pattern_detector_calls_total{detector="detect_flag"} 3' in lines
+    assert 'pattern_detector_hits_total{detector="detect_flag"} 1' in lines
+    assert 'pattern_detector_exceptions_total{detector="detect_broken"} 1' in lines
+    assert 'pattern_detector_rejections_total{detector="detect_flag",gate="pole"} 2' in lines
+    buckets = [line for line in lines if line.startswith('pattern_detector_seconds_bucket{detector="detect_flag"')]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS) + 1
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1] == 'pattern_detector_seconds_bucket{detector="detect_flag",le="+Inf"} 3'
+    assert 'pattern_detector_seconds_count{detector="detect_flag"} 3' in lines
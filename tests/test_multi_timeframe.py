@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from binance_stub import KlineStubServer
+from data_fetcher import INTERVAL_MS
+from multi_timeframe import MultiTimeframeDetector, detect_multi_timeframe, history_bars, resample_ohlc
+from scanner import scan_hits
+from synthetic import START_MS, synthetic_ohlc
+
+
+@pytest.mark.parametrize("start_ms", [
+    START_MS - START_MS % INTERVAL_MS["4h"],
+    # Starts midway through a 4h candle, as a seeded history usually does
+    START_MS - START_MS % INTERVAL_MS["4h"] + 3 * INTERVAL_MS["30m"],
+])
+def test_incremental_frames_match_resample(start_ms):
+    df = synthetic_ohlc(3000, "30m", start_ms=start_ms)[0]
+    detector = MultiTimeframeDetector("30m", max_bars=2000)
+    detector.extend(df)
+    for interval in detector.intervals:
+        frame, _ = detector.frames[interval].frames()
+        expected = resample_ohlc(df, interval)
+        bucket = pd.Timedelta(milliseconds=INTERVAL_MS[interval])
+        if expected.index[-1] + bucket > df.index[-1] + pd.Timedelta(minutes=30):
+            # resample_ohlc keeps the last candle while it is still forming
+            expected = expected.iloc[:-1]
+        assert len(frame) > 300
+        pd.testing.assert_frame_equal(frame, expected, check_freq=False, check_index_type=False,
+                                      check_names=False)
+
+
+def test_scan_confirms_on_higher_timeframes():
+    pair = ("SYNUSDT", "30m")
+    df = synthetic_ohlc(900, "30m", seed=3, patterns=[("Double Bottom", 899, 1.0)])[0]
+    with KlineStubServer({pair: df}) as server:
+        hits = scan_hits([pair], 100, server.url, backend="thread", workers=1, multi_timeframe=True)
+    assert len(hits) == 1
+    _, _, fetched, pattern_info = hits[0]
+    assert len(fetched) == history_bars("30m")
+    assert pattern_info == detect_multi_timeframe(df.tail(len(fetched)).round(8), "30m")
+    assert set(pattern_info["timeframes"]) == {"1h", "4h"}
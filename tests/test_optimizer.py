@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from backtester import simulate_trades
+from batch_detector import WINDOW, detect_patterns_batch, signal_rows
+from binance_stub import KlineStubServer
+from candle_cache import CandleCache
+from data_fetcher import INTERVAL_MS
+from optimizer import load_history, param_grid, split_point, sweep
+from synthetic import pattern_schedule, synthetic_ohlc
+
+SPACE = {
+    "sl_percent": [1.0, 2.0],
+    "double_bottom.rsi_max": [30, 50],
+    "cup_and_handle.window": [40, 50],
+    "confidence_threshold": [0, 85],
+}
+
+
+@pytest.fixture(scope="module")
+def history():
+    return synthetic_ohlc(1500, seed=5, patterns=pattern_schedule(1500, spacing=100))[0]
+
+
+def _direct(df, point):
+    # The slow path: signal table, rows and simulated trades for the point
+    detectors, trade = split_point(point)
+    signals = signal_rows(detect_patterns_batch(df, WINDOW, params=detectors))
+    signals = signals[signals["confidence"] >= trade["confidence_threshold"]]
+    trades = simulate_trades(df, signals, trade["sl_percent"], trade["tp_percent"], trade["max_hold"])
+    return len(trades), trades["return_pct"].mean() if len(trades) else np.nan
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_sweep_scores_match_the_backtester(history, backend):
+    points = param_grid(SPACE)
+    results = sweep(history, points, backend=backend, workers=2, min_trades=0)
+    assert len(results) == len(points)
+    expectancy = results["expectancy_pct"].to_numpy()
+    assert (np.diff(expectancy[~np.isnan(expectancy)]) <= 0).all()
+    trades = []
+    for row in results.to_dict("records"):
+        point = {key: row[key] for key in SPACE}
+        count, mean = _direct(history, point)
+        assert row["trades"] == count, point
+        assert np.isclose(row["expectancy_pct"], mean, equal_nan=True), point
+        trades.append(count)
+    assert max(trades) > 0
+
+    kept = sweep(history, points, backend=backend, workers=2, min_trades=max(trades))
+    assert (kept["trades"] >= max(trades)).all() and len(kept) >= 1
+
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        split_point({"double_bottom.nope": 1})
+
+
+def test_load_history_tops_up_the_cache(tmp_path):
+    if time.time() % 60 > 55:
+        # The frame's last candle has to still be forming when it is fetched
+        time.sleep(60 - time.time() % 60)
+    step = INTERVAL_MS["1m"]
+    now_ms = int(time.time() * 1000)
+    bars = 1500
+    # Ends with the candle forming now
+    df = synthetic_ohlc(bars + 40, "1m", start_ms=now_ms - now_ms % step - (bars + 39) * step)[0]
+    with KlineStubServer({("SYNUSDT", "1m"): df}) as server:
+        cache = CandleCache(root=str(tmp_path), base_url=server.url)
+        # The cache is 30 candles behind
+        cache.append("SYNUSDT", "1m", df.iloc[:-30])
+        history = load_history("SYNUSDT", "1m", bars / 1440, cache=cache)
+        assert server.requests == 1
+    assert len(history) == bars
+    assert history.index[-1] == df.index[-2]
+    assert cache.last_open_time("SYNUSDT", "1m") == df.index[-2:].as_unit("ms").asi8[0]
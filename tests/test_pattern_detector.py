@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+import metrics
+from pattern_detector import detect_patterns, patterns_overlap, resolve_patterns
+from synthetic import synthetic_ohlc
+
+
+def _result(name, confidence, first, last, **extra):
+    start = pd.Timestamp("2024-01-01")
+    return dict({
+        "name": name,
+        "confidence": confidence,
+        "entry": 100.0,
+        "key_points": {
+            "Start": (start + pd.Timedelta(hours=first), 100.0),
+            "End": (start + pd.Timedelta(hours=last), 100.0),
+            "Level": 100.0,
+        },
+    }, **extra)
+
+
+def test_overlap_is_measured_on_the_shorter_span():
+    wide = _result("Double Bottom", 90, 0, 40)
+    assert patterns_overlap(wide, _result("Cup and Handle", 80, 30, 50))
+    assert not patterns_overlap(wide, _result("Cup and Handle", 80, 35, 50))
+    assert not patterns_overlap(wide, _result("Cup and Handle", 80, 41, 50))
+    # Results without timed key points never overlap
+    assert not patterns_overlap(wide, {"name": "Bullish Flag", "confidence": 80, "key_points": {}})
+
+
+def test_resolve_folds_overlapping_results_into_the_better_one():
+    results = [
+        _result("Double Bottom", 90, 0, 40),
+        _result("Cup and Handle", 85, 10, 40),
+        _result("Head & Shoulders", 80, 5, 35),
+        _result("Symmetrical Triangle", 75, 20, 40, breakout="bearish"),
+        _result("Rising Wedge", 70, 60, 80),
+    ]
+    resolved = resolve_patterns(results)
+    assert [result["name"] for result in resolved] == ["Double Bottom", "Rising Wedge"]
+    assert resolved[0]["merged"] == ["Cup and Handle"]
+    assert resolved[0]["conflicts"] == ["Head & Shoulders", "Symmetrical Triangle"]
+    assert "merged" not in results[0]
+
+
+@pytest.fixture
+def recording():
+    enabled = metrics.enabled
+    metrics.enable()
+    metrics.reset()
+    yield
+    metrics.reset()
+    metrics.enabled = enabled
+
+
+def _calls():
+    return {name: stats["calls"] for name, stats in metrics.snapshot().items()}
+
+
+def test_best_mode_stops_once_no_detector_left_can_win(recording):
+    df = synthetic_ohlc(300, seed=0, patterns=[("Double Bottom", 299, 1.0)])[0].tail(100)
+    best = detect_patterns(df)
+    assert (best["name"], best["confidence"]) == ("Double Bottom", 90.0)
+    # Triple Top tops out at 85, so it never runs once a 90 is in hand
+    assert "detect_triple_top" not in _calls()
+
+    metrics.reset()
+    everything = detect_patterns(df, mode="all")
+    assert _calls().get("detect_triple_top") == 1
+    assert everything[0] == best
+    assert detect_patterns(df, mode="all", confidence_threshold=95) == []
+    with pytest.raises(ValueError):
+        detect_patterns(df, mode="first")
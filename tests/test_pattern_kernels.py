@@ -0,0 +1,73 @@
+import numpy as np
+
+import pattern_detector
+import pattern_kernels
+from synthetic import pattern_schedule, synthetic_ohlc
+
+WINDOW = 100
+
+
+def _same(expected, result):
+    if not expected or not result:
+        return not expected and not result
+    if (expected["name"], expected["confidence"]) != (result["name"], result["confidence"]):
+        return False
+    if not np.isclose(expected["entry"], result["entry"]):
+        return False
+    points, kernel_points = expected["key_points"], result["key_points"]
+    if points.keys() != kernel_points.keys():
+        return False
+    for name, point in points.items():
+        other = kernel_points[name]
+        if isinstance(point, tuple):
+            if point[0] != other[0] or not np.isclose(point[1], other[1]):
+                return False
+        elif not np.isclose(point, other):
+            return False
+    return True
+
+
+def test_kernels_match_pandas_detectors():
+    df, _ = synthetic_ohlc(450, seed=2, patterns=pattern_schedule(450, spacing=80))
+    fired = set()
+    for bar in range(WINDOW - 1, len(df)):
+        window = df.iloc[bar - WINDOW + 1:bar + 1]
+        arrays = pattern_kernels.frame_arrays(window)
+        features = pattern_detector.compute_features(window)
+        kernel_features = pattern_kernels.compute_features(*arrays[2:])
+        for func, kernel in zip(pattern_detector.pattern_functions, pattern_kernels.kernel_functions):
+            expected = func(window, features)
+            assert _same(expected, kernel(*arrays, kernel_features)), (bar, func.__name__)
+            if expected:
+                fired.add(expected["name"])
+        assert _same(pattern_detector.detect_patterns(window), pattern_kernels.detect_patterns(*arrays))
+    assert len(fired) >= 3
+
+
+def test_kernels_take_detector_params_and_modes():
+    df, _ = synthetic_ohlc(450, seed=2, patterns=pattern_schedule(450, spacing=80))
+    # Windows outside SLOPE_WINDOWS, and a cup breakout it can never reach
+    params = {
+        "double_bottom": {"rsi_max": 60},
+        "ascending_triangle": {"window": 15},
+        "rising_wedge": {"window": 25},
+        "symmetrical_triangle": {"window": 25},
+        "head_and_shoulders": {"shoulder_tolerance": 0.05},
+        "cup_and_handle": {"breakout": 2.0},
+    }
+    fired = set()
+    for bar in range(WINDOW - 1, len(df)):
+        window = df.iloc[bar - WINDOW + 1:bar + 1]
+        arrays = pattern_kernels.frame_arrays(window)
+        features = pattern_detector.compute_features(window)
+        expected = pattern_detector.detect_patterns(window, features, mode="all", params=params)
+        result = pattern_kernels.detect_patterns(*arrays, mode="all", params=params)
+        assert len(expected) == len(result), bar
+        for left, right in zip(expected, result):
+            assert _same(left, right), bar
+            assert (left.get("merged"), left.get("conflicts")) == (right.get("merged"), right.get("conflicts"))
+            fired.add(left["name"])
+        best = pattern_kernels.detect_patterns(*arrays, params=params)
+        assert _same(expected[0] if expected else None, best), bar
+    assert {"Rising Wedge", "Double Bottom"} <= fired
+    assert "Cup and Handle" not in fired
@@ -0,0 +1,61 @@
+import pytest
+
+import metrics
+from binance_stub import KlineStubServer
+from pattern_detector import detect_patterns
+from scanner import scan_hits
+from synthetic import PATTERN_SHAPES, synthetic_ohlc
+
+LIMIT = 100
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # One symbol per planted pattern, confirming on its last candle, plus a plain walk
+    frames = {}
+    for position, name in enumerate(PATTERN_SHAPES):
+        frames[(f"SYN{position}USDT", "30m")] = synthetic_ohlc(300, seed=position, patterns=[(name, 299, 1.0)])[0]
+    frames[("WALKUSDT", "30m")] = synthetic_ohlc(300, seed=99)[0]
+    return frames
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_scan_matches_direct_detection(frames, backend):
+    expected = {}
+    for pair, df in frames.items():
+        # Klines carry prices with 8 decimals
+        pattern_info = detect_patterns(df.tail(LIMIT).round(8))
+        if pattern_info:
+            expected[pair] = (pattern_info["name"], pattern_info["confidence"], pattern_info["entry"])
+    assert len(expected) >= 3
+
+    with KlineStubServer(frames) as server:
+        hits = scan_hits(list(frames), LIMIT, server.url, backend=backend, workers=2)
+    found = {(symbol, interval): (pattern_info["name"], pattern_info["confidence"], pattern_info["entry"])
+             for symbol, interval, df, pattern_info in hits}
+    assert found == expected
+    for symbol, interval, df, _ in hits:
+        assert df.index.equals(frames[(symbol, interval)].tail(LIMIT).index)
+
+
+
+def _calls(snapshot):
+    return {name: (stats["calls"], stats["hits"]) for name, stats in snapshot.items()}
+
+
+def test_process_workers_report_metrics(frames):
+    enabled = metrics.enabled
+    metrics.enable()
+    try:
+        metrics.reset()
+        for df in frames.values():
+            detect_patterns(df.tail(LIMIT).round(8))
+        expected = _calls(metrics.snapshot())
+        metrics.reset()
+        with KlineStubServer(frames) as server:
+            scan_hits(list(frames), LIMIT, server.url, backend="process", workers=2)
+        # The detectors ran in the workers; their counts must still reach this process
+        assert _calls(metrics.snapshot()) == expected
+    finally:
+        metrics.reset()
+        metrics.enabled = enabled
@@ -0,0 +1,47 @@
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from logger import TradeLogger
+from signal_store import SignalStore
+
+PATTERN = {"name": "Double Bottom", "confidence": 88.0, "entry": 100.0, "key_points": {}}
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_logged_times_come_back_as_utc(tmp_path, new_york):
+    store = SignalStore(str(tmp_path / "signals.db"))
+    logger = TradeLogger(store)
+    before = pd.Timestamp(datetime.now(timezone.utc)).tz_localize(None).floor("s")
+    logger.log(PATTERN, 98.0, 103.0, "BTCUSDT", "30m")
+    logger.flush()
+    logged = store.query()["time"].iloc[0]
+    assert before <= logged <= before + pd.Timedelta(seconds=2)
+
+
+def test_strings_and_timestamps_agree(tmp_path, new_york):
+    store = SignalStore(str(tmp_path / "signals.db"))
+    store.write([{"Time": "2025-07-03 23:45:54", "Symbol": "BTCUSDT", "Interval": "30m", "Pattern": "Double Bottom",
+                  "Confidence": 88.0, "Entry": 100.0, "SL": 98.0, "TP": 103.0, "Fingerprint": "a"}])
+    assert store.query()["time"].iloc[0] == pd.Timestamp("2025-07-03 23:45:54")
+    assert len(store.query(start="2025-07-03 23:45:54", end=pd.Timestamp("2025-07-03 23:45:55"))) == 1
+    # The daily rollup buckets by the UTC day
+    assert store.aggregate(start="2025-07-03", end="2025-07-04")["signals"].tolist() == [1]
+
+
+def test_import_csv_converts_local_times(tmp_path):
+    path = tmp_path / "trade_log.csv"
+    path.write_text("Time,Pattern,Confidence,Entry,SL,TP\n2025-07-03 23:45:54,Head & Shoulders,82,109476.0,107833.86,112760.28\n")
+    store = SignalStore(str(tmp_path / "signals.db"))
+    store.import_csv(str(path), tz="America/New_York")
+    assert store.query()["time"].iloc[0] == pd.Timestamp("2025-07-04 03:45:54")
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from pattern_detector import compute_features
+from stream_detector import StreamingPatternDetector
+from synthetic import synthetic_ohlc
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+
+def test_streaming_features_match_ta():
+    df, _ = synthetic_ohlc(700, seed=3)
+    stream = StreamingPatternDetector(100)
+    for open_time, row in zip(df.index, df[OHLCV].itertuples(index=False)):
+        # Each candle arrives forming first, then closed
+        stream.update(open_time, row[0], row[1] * 1.01, row[2], row[3] * 1.02, row[4])
+        stream.update(open_time, *row)
+    buffered, features = stream.frames()
+    expected = compute_features(df).tail(100)
+    pd.testing.assert_frame_equal(buffered, df[OHLCV].tail(100), check_freq=False)
+    for column in expected.columns:
+        assert np.allclose(features[column].to_numpy(dtype="float64"), expected[column].to_numpy(dtype="float64"),
+                           equal_nan=True), column